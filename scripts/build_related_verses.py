@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Precompute a "related verses" list for every verse from TF-IDF similarity.
+
+Each verse is one document: its English translation (counted twice, so a
+short verse is not drowned out by its commentary) plus its layer1 tafsir.
+Terms are lowercased words minus stopwords, kept if they occur in at least
+MIN_DF verses and at most MAX_DF of them; weights are sublinear tf x
+smoothed idf, rows L2-normalised, so a dot product is cosine similarity.
+
+The matrix is held sparse (CSR by verse, CSC by term) in NumPy arrays.
+Scores for a block of verses are accumulated from the postings of their
+terms with one bincount, so the work is proportional to the term overlaps
+rather than 6,236^2 x vocabulary, and top-k is taken per block with
+argpartition. Verses within --skip-nearby of each other in the same surah
+are left out; the reader is already one swipe from them.
+
+    python3 scripts/build_related_verses.py [--k 10] [--quran quran_data.json]
+
+Translations come from quran_columns.json / quran_data.json when present
+(see fetch_quran_data.py); without them only layer1 is used, for the
+verses that have tafsir.
+
+Output (compact JSON, like verse_index.json):
+    {"version": 1, "k": 10, "verses": {"2:255": [["3:2", 0.412], ...], ...}}
+"""
+
+import argparse
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from quran_columns import QuranColumns, columns_path_for
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_ROOT / "Thaqalayn" / "Data"
+TAFSIR_DIR = PROJECT_ROOT / "Thaqalayn" / "Thaqalayn" / "Data"
+DEFAULT_OUTPUT = DATA_DIR / "related_verses.json"
+FORMAT_VERSION = 1
+K = 10
+SKIP_NEARBY = 2
+MIN_SCORE = 0.05
+MIN_DF = 2
+MAX_DF = 0.2                 # share of verses; commoner terms carry no signal here
+TRANSLATION_WEIGHT = 2
+BLOCK_ROWS = 512
+BLOCK_PAIRS = 4_000_000      # (verse, term, posting) triples expanded per block
+
+WORD = re.compile(r"[a-z][a-z'-]{2,}")
+STOPWORDS = frozenset("""
+about above after again against all also among and any are because been before being below between
+both but can could did does doing down during each few for from further had has have having her here
+hers herself him himself his how into its itself just more most not now off once only other our ours
+ourselves out over own same she should some such than that the their theirs them themselves then there
+these they this those through too under until upon very was were what when where which while who whom
+why will with would you your yours yourself yourselves verse verses surah allah quran quranic
+""".split())
+
+Ref = Tuple[int, int]
+
+
+def tokens(text: str) -> List[str]:
+    return [w.strip("'-") for w in WORD.findall(text.lower()) if w.strip("'-") not in STOPWORDS]
+
+
+def load_documents(quran_path: Path) -> Tuple[List[Ref], List[Counter]]:
+    """Verse refs in mushaf order and their term counts."""
+    layer1: Dict[Ref, str] = {}
+    for path in TAFSIR_DIR.glob("tafsir_*.json"):
+        surah = int(path.stem.split("_")[1])
+        with open(path, encoding="utf-8") as f:
+            for verse, entry in json.load(f).items():
+                if entry.get("layer1"):
+                    layer1[(surah, int(verse))] = entry["layer1"]
+
+    columns = None
+    if columns_path_for(quran_path).exists():
+        columns = QuranColumns.load(columns_path_for(quran_path))
+    elif quran_path.exists():
+        with open(quran_path, encoding="utf-8") as f:
+            columns = QuranColumns.from_quran_data(json.load(f))
+
+    if columns is not None and "translation" in columns.text:
+        print(f"→ Using translations from {quran_path.parent} and layer1 for {len(layer1)} verses")
+        refs = [columns.ref(i) for i in range(len(columns))]
+        translations = columns.text["translation"]
+    else:
+        print(f"→ {quran_path} not found; using layer1 only ({len(layer1)} verses)")
+        refs = sorted(layer1)
+        translations = [""] * len(refs)
+
+    documents = []
+    for ref, translation in zip(refs, translations):
+        counts = Counter(tokens(layer1.get(ref, "")))
+        for term in tokens(translation or ""):
+            counts[term] += TRANSLATION_WEIGHT
+        documents.append(counts)
+    return refs, documents
+
+
+def tfidf(documents: List[Counter]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """CSR (indptr, indices, data) of L2-normalised tf-idf rows, and vocabulary size."""
+    n = len(documents)
+    df = Counter(term for doc in documents for term in doc)
+    vocab = {t: i for i, t in enumerate(sorted(t for t, c in df.items() if MIN_DF <= c <= MAX_DF * n))}
+    idf = np.zeros(len(vocab), dtype=np.float64)
+    for term, i in vocab.items():
+        idf[i] = np.log((1 + n) / (1 + df[term])) + 1
+
+    indptr = [0]
+    indices: List[int] = []
+    counts: List[int] = []
+    for doc in documents:
+        row = sorted((vocab[t], c) for t, c in doc.items() if t in vocab)
+        indices.extend(i for i, _ in row)
+        counts.extend(c for _, c in row)
+        indptr.append(len(indices))
+    indptr = np.array(indptr, dtype=np.int64)
+    indices = np.array(indices, dtype=np.int64)
+    data = (1 + np.log(np.array(counts, dtype=np.float64))) * idf[indices]
+
+    row_of = np.repeat(np.arange(n), np.diff(indptr))
+    norms = np.sqrt(np.bincount(row_of, weights=data ** 2, minlength=n))
+    data /= np.where(norms > 0, norms, 1)[row_of]
+    return indptr, indices, data, len(vocab)
+
+
+def transpose(indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, n_cols: int):
+    """CSR -> CSC: (col_ptr, row indices, data)."""
+    order = np.argsort(indices, kind="stable")
+    rows = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))[order]
+    col_ptr = np.zeros(n_cols + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=n_cols), out=col_ptr[1:])
+    return col_ptr, rows, data[order]
+
+
+def row_blocks(indptr: np.ndarray, indices: np.ndarray, df: np.ndarray) -> List[Tuple[int, int]]:
+    """Row ranges whose expanded postings stay under BLOCK_PAIRS (and BLOCK_ROWS rows)."""
+    n = len(indptr) - 1
+    cost = np.add.reduceat(df[indices], indptr[:-1]) if len(indices) else np.zeros(n)
+    cost = np.where(np.diff(indptr) > 0, cost, 0)
+    blocks, start, total = [], 0, 0
+    for row in range(n):
+        if row > start and (total + cost[row] > BLOCK_PAIRS or row - start >= BLOCK_ROWS):
+            blocks.append((start, row))
+            start, total = row, 0
+        total += cost[row]
+    blocks.append((start, n))
+    return blocks
+
+
+def related(refs: List[Ref], documents: List[Counter], k: int = K,
+            skip_nearby: int = SKIP_NEARBY) -> Dict[Ref, List[Tuple[Ref, float]]]:
+    n = len(refs)
+    indptr, indices, data, n_terms = tfidf(documents)
+    col_ptr, col_rows, col_data = transpose(indptr, indices, data, n_terms)
+    df = np.diff(col_ptr)
+    print(f"  {n} verses, {n_terms} terms, {len(data)} non-zeros")
+
+    surah = np.array([s for s, _ in refs])
+    position = np.arange(n)
+    out: Dict[Ref, List[Tuple[Ref, float]]] = {}
+    for r0, r1 in row_blocks(indptr, indices, df):
+        b = r1 - r0
+        lo, hi = indptr[r0], indptr[r1]
+        q_rows = np.repeat(np.arange(b), np.diff(indptr[r0:r1 + 1]))
+        terms, weights = indices[lo:hi], data[lo:hi]
+
+        # Expand every (query row, term) entry into that term's postings
+        lengths = df[terms]
+        entry = np.repeat(np.arange(len(terms)), lengths)
+        offset = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        posting = col_ptr[terms][entry] + offset
+        flat = q_rows[entry] * n + col_rows[posting]
+        scores = np.bincount(flat, weights=weights[entry] * col_data[posting], minlength=b * n).reshape(b, n)
+
+        rows = np.arange(r0, r1)
+        nearby = ((surah[rows][:, None] == surah[None, :])
+                  & (np.abs(position[rows][:, None] - position[None, :]) <= skip_nearby))
+        scores[nearby] = 0.0
+        scores[np.arange(b), rows] = 0.0
+
+        kk = min(k, n - 1)
+        top = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+        for i, row in enumerate(rows):
+            out[refs[row]] = [(refs[j], float(s)) for j, s in zip(top[i], top_scores[i]) if s >= MIN_SCORE]
+    return out
+
+
+def serialise(table: Dict[Ref, List[Tuple[Ref, float]]], k: int) -> dict:
+    return {
+        "version": FORMAT_VERSION,
+        "k": k,
+        "verses": {
+            f"{s}:{v}": [[f"{rs}:{rv}", round(score, 3)] for (rs, rv), score in table[(s, v)]]
+            for s, v in sorted(table)
+            if table[(s, v)]
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the related-verses table from TF-IDF similarity")
+    parser.add_argument("--quran", default="quran_data.json", help="quran_data.json (quran_columns.json next to it is preferred)")
+    parser.add_argument("--k", type=int, default=K)
+    parser.add_argument("--skip-nearby", type=int, default=SKIP_NEARBY,
+                        help="leave out verses this close in the same surah (0 keeps all but the verse itself)")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    args = parser.parse_args()
+
+    refs, documents = load_documents(Path(args.quran))
+    table = related(refs, documents, args.k, args.skip_nearby)
+    linked = sum(1 for v in table.values() if v)
+    print(f"✓ {linked}/{len(table)} verses have related verses")
+
+    out = Path(args.output)
+    tmp = out.with_name(out.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(serialise(table, args.k), f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, out)
+    print(f"✅ Wrote {out} ({out.stat().st_size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
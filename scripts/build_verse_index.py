@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Build one reverse index, verse -> [(dataset, id)], over every bundled dataset
+that references Quran verses, and fail if any reference points at a verse
+that does not exist.
+
+Each Swift manager currently loads and scans its own file to find content
+for a verse; this index answers "what else mentions 2:255?" with one lookup.
+Datasets are described declaratively in DATASETS; a reference is either the
+item itself (surahNumber/verseNumber or surah/verse keys) or each entry of
+the item's `verses` list. Quizzes carry the surah at file level.
+
+Usage:
+    python3 scripts/build_verse_index.py                     # write Thaqalayn/Data/verse_index.json
+    python3 scripts/build_verse_index.py --check             # validate only, write nothing
+    python3 scripts/build_verse_index.py --quran quran_data.json
+
+Verse existence is checked against quran_data.json when it is present,
+otherwise against the standard per-surah verse counts below.
+
+Output (compact JSON):
+    {"version": 1, "datasets": ["foods", ...],
+     "verses": {"16:69": [[0, "honey"], ...], ...}}
+where the first element of each pair indexes into "datasets".
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_ROOT / "Thaqalayn" / "Data"
+APP_DATA_DIR = PROJECT_ROOT / "Thaqalayn" / "Thaqalayn" / "Data"
+DEFAULT_OUTPUT = DATA_DIR / "verse_index.json"
+FORMAT_VERSION = 1
+
+# (dataset name, file glob, list key, id key)
+DATASETS = [
+    ("ahlulbayt_quran", DATA_DIR / "ahlulbayt_quran.json", "entries", "id"),
+    ("daily_duas", DATA_DIR / "daily_duas.json", "duas", "id"),
+    ("daily_messages", DATA_DIR / "daily_messages.json", "messages", "id"),
+    ("fasting_verses", DATA_DIR / "fasting_verses.json", "categories", "id"),
+    ("foods", DATA_DIR / "foods.json", "foods", "id"),
+    ("life_moments", DATA_DIR / "life_moments.json", "moments", "id"),
+    ("prophetic_parallels", DATA_DIR / "prophetic_parallels.json", "parallels", "id"),
+    ("prophetic_stories", DATA_DIR / "prophetic_stories.json", "stories", "id"),
+    ("questions", DATA_DIR / "questions.json", "questions", "id"),
+    ("fatimiyya_journey", DATA_DIR / "fatimiyya_journey.json", "days", "id"),
+    ("hajj_journey", DATA_DIR / "hajj_journey.json", "days", "id"),
+    ("muharram_journey", DATA_DIR / "muharram_journey.json", "days", "id"),
+    ("ramadan_journey", DATA_DIR / "ramadan_journey.json", "days", "id"),
+    ("islamic_month_verses", APP_DATA_DIR / "islamic_month_verses.json", "months", "month"),
+    ("quizzes", DATA_DIR / "quiz_*.json", "questions", "id"),
+]
+
+SURAH_VERSE_COUNTS = [
+    7, 286, 200, 176, 120, 165, 206, 75, 129, 109, 123, 111, 43, 52, 99, 128,
+    111, 110, 98, 135, 112, 78, 118, 64, 77, 227, 93, 88, 69, 60, 34, 30, 73,
+    54, 45, 83, 182, 88, 75, 85, 54, 53, 89, 59, 37, 35, 38, 29, 18, 45, 60,
+    49, 62, 55, 78, 96, 29, 22, 24, 13, 14, 11, 11, 18, 12, 12, 30, 52, 52,
+    44, 28, 28, 20, 56, 40, 31, 50, 40, 46, 42, 29, 19, 36, 25, 22, 17, 19,
+    26, 30, 20, 15, 21, 11, 8, 8, 19, 5, 8, 8, 11, 11, 8, 3, 9, 5, 4, 7, 3,
+    6, 3, 5, 4, 5, 6,
+]
+assert len(SURAH_VERSE_COUNTS) == 114 and sum(SURAH_VERSE_COUNTS) == 6236
+
+
+def _ref(obj: dict, surah: Optional[int] = None) -> Optional[Tuple[int, int]]:
+    """(surah, verse) from either key style, or None if obj carries no verse."""
+    s = obj.get("surahNumber", obj.get("surah", surah))
+    v = obj.get("verseNumber", obj.get("verse"))
+    if s is None or v is None:
+        return None
+    return int(s), int(v)
+
+
+def iter_refs(doc: dict, list_key: str, id_key: str) -> Iterator[Tuple[str, Tuple[int, int]]]:
+    """(item id, (surah, verse)) for every verse reference in one file."""
+    file_surah = doc.get("surahNumber")
+    for item in doc.get(list_key, []):
+        item_id = str(item[id_key])
+        nested = item.get("verses")
+        refs = ([_ref(v, file_surah) for v in nested] if isinstance(nested, list)
+                else [_ref(item, file_surah)])
+        for ref in refs:
+            if ref is not None:
+                yield item_id, ref
+
+
+def load_verse_counts(quran_path: Optional[Path]) -> Dict[int, int]:
+    if quran_path and quran_path.exists():
+        with open(quran_path, encoding="utf-8") as f:
+            verses = json.load(f)["verses"]
+        print(f"→ Validating against {quran_path}")
+        return {int(s): len(v) for s, v in verses.items()}
+    print("→ quran_data.json not found; validating against built-in verse counts")
+    return {i + 1: n for i, n in enumerate(SURAH_VERSE_COUNTS)}
+
+
+def build_index(datasets=DATASETS) -> Tuple[List[str], Dict[Tuple[int, int], List[Tuple[int, str]]], List[str]]:
+    """Returns (dataset names, {(surah, verse): [(dataset idx, id)]}, sources)."""
+    names: List[str] = []
+    index: Dict[Tuple[int, int], List[Tuple[int, str]]] = {}
+    sources: Dict[Tuple[int, int, str], List[str]] = {}
+    for name, pattern, list_key, id_key in datasets:
+        paths = sorted(glob.glob(str(pattern)))
+        if not paths:
+            print(f"  ⚠️  {name}: no files match {pattern}")
+            continue
+        ds = len(names)
+        names.append(name)
+        count = 0
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                doc = json.load(f)
+            for item_id, ref in iter_refs(doc, list_key, id_key):
+                entry = (ds, item_id)
+                bucket = index.setdefault(ref, [])
+                if entry not in bucket:
+                    bucket.append(entry)
+                sources.setdefault((ds, ref[0], ref[1]), []).append(Path(path).name)
+                count += 1
+        print(f"  {name}: {count} references in {len(paths)} file(s)")
+    return names, index, sources
+
+
+def broken_refs(index, sources, names, verse_counts: Dict[int, int]) -> List[str]:
+    problems = []
+    for (s, v), entries in sorted(index.items()):
+        if 1 <= v <= verse_counts.get(s, 0):
+            continue
+        for ds, item_id in entries:
+            files = ", ".join(sorted(set(sources[(ds, s, v)])))
+            problems.append(f"{names[ds]} id={item_id} → {s}:{v} does not exist ({files})")
+    return problems
+
+
+def serialise(names: List[str], index) -> dict:
+    return {
+        "version": FORMAT_VERSION,
+        "datasets": names,
+        "verses": OrderedDict(
+            (f"{s}:{v}", [[ds, item_id] for ds, item_id in index[(s, v)]])
+            for s, v in sorted(index)
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build verse → content reverse index")
+    parser.add_argument("--quran", default="quran_data.json", help="quran_data.json used for validation")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    parser.add_argument("--check", action="store_true", help="validate only; do not write the index")
+    args = parser.parse_args()
+
+    print("→ Collecting verse references ...")
+    names, index, sources = build_index()
+    problems = broken_refs(index, sources, names, load_verse_counts(Path(args.quran)))
+    if problems:
+        for p in problems:
+            print(f"❌ {p}", file=sys.stderr)
+        print(f"❌ {len(problems)} broken verse reference(s)", file=sys.stderr)
+        sys.exit(1)
+
+    total = sum(len(e) for e in index.values())
+    print(f"✓ {total} (dataset, id) entries over {len(index)} distinct verses")
+    if args.check:
+        return
+
+    out = Path(args.output)
+    tmp = out.with_name(out.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(serialise(names, index), f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, out)
+    print(f"✅ Wrote {out} ({out.stat().st_size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
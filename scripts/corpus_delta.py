@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Delta update packages between two snapshots of the tafsir corpus.
+
+A snapshot is a directory of JSON files (Thaqalayn/Thaqalayn/Data). Files
+shaped like tafsir_N.json, {verse: {key: text}}, are diffed at
+(file, verse, key) granularity; anything else that changed ships whole.
+
+    python3 scripts/corpus_delta.py diff OLD_DIR NEW_DIR -o update.delta
+    python3 scripts/corpus_delta.py verify update.delta OLD_DIR
+    python3 scripts/corpus_delta.py apply update.delta OLD_DIR [--out NEW_DIR]
+
+The package is a deflated zip:
+
+    manifest.json       {"version": 1, "base": {name: sha256},
+                         "target": {name: {"sha256", "size"}},
+                         "files": {name: {"op": "patch"|"add"|"remove", ...}},
+                         "corpus": {"names": [...], "sha256": digest}}
+    patches/<name>      {"format": {...}, "verses": {verse: {"set": {}, "del": [],
+                         "order": [...]} | null}, "order": [...]}
+    files/<name>        full bytes for added files and unpatchable changes
+
+A patch records only the keys that changed plus, when it moved, the new
+key order, and the JSON formatting needed to re-serialise the file. apply
+checks every touched base file against the manifest before patching and
+every output file against its target hash afterwards, so a package either
+reproduces the new corpus byte for byte or fails without writing. Only
+changed files carry per-file hashes; the untouched rest is covered by one
+digest over every (name, sha256) of the new corpus.
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import sys
+import zipfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CORPUS_DIR = PROJECT_ROOT / "Thaqalayn" / "Thaqalayn" / "Data"
+FORMAT_VERSION = 1
+
+# Serialisations tried, in order, when checking a file can be rebuilt exactly
+JSON_FORMATS = [
+    {"indent": 2, "ensureAscii": False},
+    {"indent": 2, "ensureAscii": True},
+    {"indent": 4, "ensureAscii": False},
+    {"indent": None, "ensureAscii": False},
+]
+
+
+class DeltaError(ValueError):
+    """The package does not match the corpus it is applied to."""
+
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def dump_json(obj: Any, fmt: Dict[str, Any]) -> bytes:
+    separators = (",", ":") if fmt["indent"] is None else None
+    text = json.dumps(obj, ensure_ascii=fmt["ensureAscii"], indent=fmt["indent"], separators=separators)
+    return (text + ("\n" if fmt.get("newline") else "")).encode("utf-8")
+
+
+def detect_format(raw: bytes, obj: Any) -> Optional[Dict[str, Any]]:
+    """The JSON_FORMATS entry (plus trailing newline flag) that reproduces raw."""
+    for fmt in JSON_FORMATS:
+        for newline in (False, True):
+            candidate = {**fmt, "newline": newline}
+            if dump_json(obj, candidate) == raw:
+                return candidate
+    return None
+
+
+def corpus_digest(hashes: Dict[str, str]) -> str:
+    return sha256("".join(f"{name}\0{hashes[name]}\n" for name in sorted(hashes)).encode("utf-8"))
+
+
+def load_snapshot(directory: Path, pattern: str) -> Dict[str, bytes]:
+    return {
+        p.name: p.read_bytes()
+        for p in sorted(Path(directory).iterdir())
+        if p.is_file() and fnmatch.fnmatch(p.name, pattern)
+    }
+
+
+def _is_verse_map(obj: Any) -> bool:
+    return isinstance(obj, dict) and all(isinstance(v, dict) for v in obj.values())
+
+
+def _same(a: Any, b: Any) -> bool:
+    """Equal as serialised JSON (so True != 1 and 1.0 != 1, unlike ==)."""
+    return json.dumps(a, ensure_ascii=False) == json.dumps(b, ensure_ascii=False)
+
+
+def diff_file(old_raw: bytes, new_raw: bytes) -> Tuple[Optional[dict], int]:
+    """(patch, changed key count), or (None, 0) when the file must ship whole."""
+    try:
+        old, new = json.loads(old_raw), json.loads(new_raw)
+    except ValueError:
+        return None, 0
+    fmt = detect_format(new_raw, new)
+    if fmt is None or not (_is_verse_map(old) and _is_verse_map(new)):
+        return None, 0
+
+    verses: Dict[str, Optional[dict]] = {}
+    changed = 0
+    for verse in old:
+        if verse not in new:
+            verses[verse] = None
+            changed += len(old[verse])
+    for verse, entry in new.items():
+        before = old.get(verse, {})
+        ops: Dict[str, Any] = {}
+        set_keys = {k: v for k, v in entry.items() if k not in before or not _same(before[k], v)}
+        del_keys = [k for k in before if k not in entry]
+        if set_keys:
+            ops["set"] = set_keys
+        if del_keys:
+            ops["del"] = del_keys
+        merged = [k for k in before if k not in del_keys] + [k for k in entry if k not in before]
+        if merged != list(entry):
+            ops["order"] = list(entry)
+        if ops:
+            verses[verse] = ops
+            changed += len(set_keys) + len(del_keys)
+
+    patch: Dict[str, Any] = {"format": fmt, "verses": verses}
+    merged = [v for v in old if v in new] + [v for v in new if v not in old]
+    if merged != list(new):
+        patch["order"] = list(new)
+    return patch, changed
+
+
+def apply_patch(old_raw: bytes, patch: dict) -> bytes:
+    doc = json.loads(old_raw)
+    for verse, ops in patch["verses"].items():
+        if ops is None:
+            doc.pop(verse, None)
+            continue
+        entry = doc.setdefault(verse, {})
+        for key in ops.get("del", ()):
+            entry.pop(key, None)
+        entry.update(ops.get("set", {}))
+        if "order" in ops:
+            doc[verse] = {k: entry[k] for k in ops["order"]}
+    if "order" in patch:
+        doc = {v: doc[v] for v in patch["order"]}
+    return dump_json(doc, patch["format"])
+
+
+def build_package(old_dir: Path, new_dir: Path, out_path: Path, pattern: str = "*.json") -> dict:
+    old, new = load_snapshot(old_dir, pattern), load_snapshot(new_dir, pattern)
+    new_hashes = {name: sha256(raw) for name, raw in new.items()}
+    manifest: Dict[str, Any] = {
+        "version": FORMAT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "base": {},
+        "target": {},
+        "files": {},
+        "corpus": {"names": sorted(new), "sha256": corpus_digest(new_hashes)},
+    }
+
+    out_path = Path(out_path)
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        for name in sorted(set(old) | set(new)):
+            if name not in new:
+                manifest["files"][name] = {"op": "remove"}
+                continue
+            if name in old and old[name] == new[name]:
+                continue
+            patch, changed = diff_file(old[name], new[name]) if name in old else (None, 0)
+            manifest["target"][name] = {"sha256": new_hashes[name], "size": len(new[name])}
+            # The patch must rebuild the new file exactly; otherwise ship it whole
+            if patch is not None and apply_patch(old[name], patch) != new[name]:
+                patch = None
+            if patch is not None:
+                body = json.dumps(patch, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                # A patch bigger than the file it rebuilds is not worth shipping
+                if len(body) < len(new[name]):
+                    zf.writestr(f"patches/{name}", body)
+                    manifest["base"][name] = sha256(old[name])
+                    manifest["files"][name] = {"op": "patch", "keys": changed}
+                    continue
+            zf.writestr(f"files/{name}", new[name])
+            manifest["files"][name] = {"op": "add"}
+        zf.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+    os.replace(tmp, out_path)
+    return manifest
+
+
+def reconstruct(package: Path, corpus_dir: Path) -> Tuple[dict, Dict[str, Optional[bytes]]]:
+    """Rebuild every changed file in memory: {name: bytes, or None to delete}."""
+    corpus_dir = Path(corpus_dir)
+    with zipfile.ZipFile(package) as zf:
+        manifest = json.loads(zf.read("manifest.json"))
+        if manifest.get("version") != FORMAT_VERSION:
+            raise DeltaError(f"unsupported package version {manifest.get('version')}")
+        outputs: Dict[str, Optional[bytes]] = {}
+        for name, entry in manifest["files"].items():
+            op = entry["op"]
+            if op == "remove":
+                outputs[name] = None
+                continue
+            if op == "add":
+                data = zf.read(f"files/{name}")
+            else:
+                path = corpus_dir / name
+                if not path.exists():
+                    raise DeltaError(f"{name}: missing from {corpus_dir}")
+                old_raw = path.read_bytes()
+                if sha256(old_raw) != manifest["base"].get(name):
+                    raise DeltaError(f"{name}: base file differs from the one this package was built against")
+                data = apply_patch(old_raw, json.loads(zf.read(f"patches/{name}")))
+            if sha256(data) != manifest["target"][name]["sha256"]:
+                raise DeltaError(f"{name}: reconstructed file does not match its target hash")
+            outputs[name] = data
+    return manifest, outputs
+
+
+def verify_corpus(manifest: dict, corpus_dir: Path, outputs: Dict[str, Optional[bytes]]) -> list:
+    """Problems with the corpus as it would be once outputs are applied."""
+    problems, hashes = [], {}
+    for name in manifest["corpus"]["names"]:
+        data = outputs.get(name)
+        if data is None:
+            path = Path(corpus_dir) / name
+            if not path.exists():
+                problems.append(f"{name}: missing")
+                continue
+            data = path.read_bytes()
+        hashes[name] = sha256(data)
+    if not problems and corpus_digest(hashes) != manifest["corpus"]["sha256"]:
+        problems.append("corpus digest mismatch: unchanged files differ from the package's base")
+    return problems
+
+
+def apply_package(package: Path, corpus_dir: Path, out_dir: Optional[Path] = None) -> dict:
+    """Apply to corpus_dir in place, or write the full new corpus to out_dir."""
+    corpus_dir = Path(corpus_dir)
+    manifest, outputs = reconstruct(package, corpus_dir)
+    problems = verify_corpus(manifest, corpus_dir, outputs)
+    if problems:
+        raise DeltaError("; ".join(problems))
+
+    dest = Path(out_dir) if out_dir else corpus_dir
+    dest.mkdir(parents=True, exist_ok=True)
+    if dest != corpus_dir:
+        for name in manifest["corpus"]["names"]:
+            if name not in outputs:
+                (dest / name).write_bytes((corpus_dir / name).read_bytes())
+    for name, data in outputs.items():
+        path = dest / name
+        if data is None:
+            if path.exists():
+                path.unlink()
+            continue
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    return manifest
+
+
+def summarise(manifest: dict, package: Path):
+    ops: Dict[str, int] = {}
+    for entry in manifest["files"].values():
+        ops[entry["op"]] = ops.get(entry["op"], 0) + 1
+    keys = sum(e.get("keys", 0) for e in manifest["files"].values())
+    touched = sum(manifest["target"][n]["size"] for n, e in manifest["files"].items() if e["op"] != "remove")
+    print("  files: " + (", ".join(f"{n} {op}" for op, n in sorted(ops.items())) or "no changes"))
+    print(f"  changed keys in patched files: {keys}")
+    print(f"  package {package.stat().st_size / 1024:.1f} KB vs {touched / 1024:.1f} KB of changed files")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build, verify and apply corpus delta packages")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("diff", help="build a package from OLD_DIR to NEW_DIR")
+    p.add_argument("old_dir")
+    p.add_argument("new_dir")
+    p.add_argument("-o", "--output", required=True)
+    p.add_argument("--glob", default="*.json", help="files to include (default: *.json)")
+
+    p = sub.add_parser("verify", help="rebuild in memory and check every target hash")
+    p.add_argument("package")
+    p.add_argument("corpus_dir", nargs="?", default=str(CORPUS_DIR))
+
+    p = sub.add_parser("apply", help="apply in place, or into --out")
+    p.add_argument("package")
+    p.add_argument("corpus_dir", nargs="?", default=str(CORPUS_DIR))
+    p.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "diff":
+            manifest = build_package(Path(args.old_dir), Path(args.new_dir), Path(args.output), args.glob)
+            print(f"✓ Wrote {args.output}")
+            summarise(manifest, Path(args.output))
+        elif args.command == "verify":
+            manifest, outputs = reconstruct(Path(args.package), Path(args.corpus_dir))
+            problems = verify_corpus(manifest, Path(args.corpus_dir), outputs)
+            for problem in problems:
+                print(f"❌ {problem}", file=sys.stderr)
+            if problems:
+                sys.exit(1)
+            print(f"✓ {len(outputs)} file(s) rebuild byte-exactly; "
+                  f"{len(manifest['corpus']['names'])} target files verified")
+        else:
+            manifest = apply_package(Path(args.package), Path(args.corpus_dir),
+                                     Path(args.out) if args.out else None)
+            print(f"✓ Applied {len(manifest['files'])} file change(s) to {args.out or args.corpus_dir}")
+    except DeltaError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
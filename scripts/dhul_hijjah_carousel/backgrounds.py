@@ -1,18 +1,36 @@
 """Generate dark atmospheric backgrounds (no text) via OpenRouter Nano Banana."""
 import base64
+import hashlib
 import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import BytesIO
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 from PIL import Image, ImageOps
 
+from .. import http_download
 from . import config
 
 load_dotenv()
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 MODEL = "google/gemini-3-pro-image-preview"
+MAX_WORKERS = 5       # one in-flight request per slide
+
+
+def _make_session() -> requests.Session:
+    """One pooled session shared by all worker threads (keep-alive + TLS reuse)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=MAX_WORKERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+SESSION = _make_session()
 
 
 def build_bg_prompt(slide: dict) -> str:
@@ -47,7 +65,7 @@ def _request_image(prompt: str) -> bytes:
         "messages": [{"role": "user", "content": prompt}],
         "modalities": ["image", "text"],
     }
-    resp = requests.post(
+    resp = SESSION.post(
         "https://openrouter.ai/api/v1/chat/completions",
         headers=headers, json=payload, timeout=120,
     )
@@ -59,9 +77,7 @@ def _request_image(prompt: str) -> bytes:
         if url.startswith("data:"):
             return base64.b64decode(url.split(",", 1)[1])
         if url:
-            r = requests.get(url, timeout=60)
-            r.raise_for_status()
-            return r.content
+            return http_download.fetch_bytes(url, session=SESSION, timeout=60)
     raise Exception(f"No image in response: {resp.json()}")
 
 
@@ -70,14 +86,52 @@ def generate(slide: dict) -> Image.Image:
     return normalize(Image.open(BytesIO(raw)))
 
 
-def generate_all() -> dict:
-    """Generate + cache all 5 backgrounds. Returns {index: Path}."""
-    config.BG_DIR.mkdir(parents=True, exist_ok=True)
+def cache_key(slide: dict) -> str:
+    """Content address of a background: the exact prompt + model that made it."""
+    h = hashlib.sha256(f"{MODEL}\n{build_bg_prompt(slide)}".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def cached_path(slide: dict):
+    """Cache lives under config.BG_DIR and is shared by every campaign."""
+    return config.BG_DIR / "cache" / f"{cache_key(slide)}.png"
+
+
+def generate_all(slides: list = None, bg_dir=None, force: bool = False,
+                 max_workers: int = MAX_WORKERS) -> dict:
+    """Generate + cache backgrounds for ``slides``. Returns {index: Path}.
+
+    Defaults to the 5 Dhul-Hijjah slides written to config.BG_DIR. Only
+    slides whose prompt (or MODEL) changed since the last run hit the API;
+    the rest are served from the content-addressed cache. Misses are
+    requested concurrently, so a full rebuild costs about one request's
+    latency. ``force`` regenerates every slide regardless of the cache.
+    """
+    slides = config.SLIDES if slides is None else slides
+    bg_dir = config.BG_DIR if bg_dir is None else bg_dir
+    bg_dir.mkdir(parents=True, exist_ok=True)
+    (config.BG_DIR / "cache").mkdir(parents=True, exist_ok=True)
+    misses = [s for s in slides if force or not cached_path(s).exists()]
+    hits = len(slides) - len(misses)
+    if hits:
+        print(f"  {hits} background(s) cached, {len(misses)} to generate")
+
+    if misses:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(misses))) as pool:
+            futures = {pool.submit(generate, s): s for s in misses}
+            for fut in as_completed(futures):
+                slide = futures[fut]
+                path = cached_path(slide)
+                # Write-then-rename so a crash never leaves a truncated cache hit
+                tmp = path.with_suffix(".tmp.png")
+                fut.result().save(tmp)
+                os.replace(tmp, path)
+                print(f"  bg slide {slide['index']} generated -> {path.name}")
+
     out = {}
-    for slide in config.SLIDES:
-        path = config.BG_DIR / f"bg_{slide['index']}.png"
-        img = generate(slide)
-        img.save(path)
+    for slide in slides:
+        path = bg_dir / f"bg_{slide['index']}.png"
+        shutil.copyfile(cached_path(slide), path)
         print(f"  bg slide {slide['index']} -> {path}")
         out[slide["index"]] = path
     return out
@@ -0,0 +1,128 @@
+"""Benchmark compose: per-call timings plus a blur/blend/text stage breakdown.
+
+Usage (from repo root):
+    python -m scripts.dhul_hijjah_carousel.bench [--runs N] [--json out.json]
+
+Each target runs once cold (compose layer cache cleared) and then --runs
+times warm. Stage times come from a separate cold pass under cProfile,
+cumulative time of the PIL calls that dominate rendering, so compose itself
+carries no timing hooks and the profiler's overhead stays out of cold_ms.
+"""
+import argparse
+import cProfile
+import json
+import pstats
+import statistics
+import time
+
+from PIL import Image, ImageDraw
+
+from . import compose, config
+
+# (module file suffix, function name) -> stage
+STAGES = {
+    ("Image.py", "filter"): "blur",
+    ("Image.py", "blend"): "blend",
+    ("Image.py", "alpha_composite"): "composite",
+    ("Image.py", "resize"): "resize",
+    ("ImageDraw.py", "text"): "text",
+}
+
+
+def synthetic_bg() -> Image.Image:
+    """Deterministic dark gradient standing in for a generated background."""
+    grad = Image.linear_gradient("L").resize((config.CANVAS_W, config.CANVAS_H))
+    return Image.merge("RGB", (grad.point(lambda v: v // 3),
+                               grad.point(lambda v: v // 4),
+                               grad.point(lambda v: 14 + v // 6)))
+
+
+def targets(bg: Image.Image) -> list:
+    """(label, callable) pairs covering every compose entry point."""
+    head_f = compose._font(config.FONT_DISPLAY, 92)
+    body_f = compose._font(config.FONT_BODY, 44)
+    long_text = config.SLIDES[2]["subtext"] * 2
+    canvas = Image.new("RGB", (config.CANVAS_W, config.CANVAS_H))
+    draw = ImageDraw.Draw(canvas)
+    appshot = next(s for s in config.SLIDES if s.get("app_screenshot"))
+    cta = next(s for s in config.SLIDES if s["role"] == "cta")
+    out = [
+        ("wrap", lambda: compose.wrap(long_text, body_f, compose.SAFE_W)),
+        ("_draw_block", lambda: compose._draw_block(
+            draw, config.SLIDES[0]["headline"], head_f,
+            config.COLOR_GOLD_BRIGHT, 420, 108)),
+    ]
+    for s in config.SLIDES:
+        if s is appshot or s is cta:
+            continue
+        out.append((f"render_slide[{s['index']}]",
+                    lambda s=s: compose.render_slide(s, bg)))
+    out.append(("render_cta", lambda: compose.render_cta(cta, bg)))
+    if config.APP_SCREENSHOT.exists():
+        out.append(("render_appshot", lambda: compose.render_appshot(appshot, bg)))
+    return out
+
+
+def _stages(profile: cProfile.Profile) -> dict:
+    totals = dict.fromkeys(sorted(set(STAGES.values())), 0.0)
+    for (filename, _, func), (_, _, _, cumtime, _) in pstats.Stats(profile).stats.items():
+        for (suffix, name), stage in STAGES.items():
+            if func == name and filename.endswith(suffix):
+                totals[stage] += cumtime
+    return totals
+
+
+def bench(runs: int = 5) -> list:
+    bg = synthetic_bg()
+    rows = []
+    for label, fn in targets(bg):
+        compose.clear_cache()
+        t0 = time.perf_counter()
+        fn()
+        cold = time.perf_counter() - t0
+
+        compose.clear_cache()
+        prof = cProfile.Profile()
+        prof.runcall(fn)
+        stages = _stages(prof)
+
+        warm = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            fn()
+            warm.append(time.perf_counter() - t0)
+        rows.append({
+            "target": label,
+            "cold_ms": cold * 1000,
+            "warm_median_ms": statistics.median(warm) * 1000,
+            "warm_min_ms": min(warm) * 1000,
+            "cold_stages_ms": {k: v * 1000 for k, v in stages.items()},
+        })
+    return rows
+
+
+def report(rows: list) -> None:
+    stage_names = list(rows[0]["cold_stages_ms"]) if rows else []
+    head = f"{'target':<18} {'cold':>8} {'warm p50':>9} {'warm min':>9}"
+    print(head + "".join(f" {n:>9}" for n in stage_names))
+    for r in rows:
+        line = (f"{r['target']:<18} {r['cold_ms']:>8.1f} "
+                f"{r['warm_median_ms']:>9.1f} {r['warm_min_ms']:>9.1f}")
+        print(line + "".join(f" {r['cold_stages_ms'][n]:>9.1f}" for n in stage_names))
+    print("(ms; stage columns are cProfile cumulative time from a separate cold pass)")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--json", default=None, help="also write results here")
+    args = ap.parse_args(argv)
+    rows = bench(args.runs)
+    report(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
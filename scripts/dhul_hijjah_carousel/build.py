@@ -1,39 +1,39 @@
-"""Build the 5-slide Dhul-Hijjah carousel: backgrounds -> compose -> save."""
-import sys
+"""Build the 5-slide Dhul-Hijjah carousel: backgrounds -> compose -> save.
 
-from PIL import Image
+    python -m scripts.dhul_hijjah_carousel.build [--skip-bg] [--force-bg]
+                                                [--localized [--allow-unverified]]
 
-from . import backgrounds, compose, config
+--localized also renders the Urdu and Arabic copy, one directory per
+language. It aborts until a reviewer has set translation_verified on every
+slide in config.SLIDES; --allow-unverified renders review drafts to
+<lang>_draft/ instead.
+"""
+import sys
 
+from . import config, engine
 
-def main(skip_bg: bool = False):
-    config.OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Hard gate: slide 2 Arabic must be verified before any render
-    s2 = next(s for s in config.SLIDES if s["index"] == 2)
-    if s2.get("arabic") and not s2.get("arabic_verified"):
-        raise SystemExit("ABORT: Slide 2 Arabic not user-verified (see Task 3).")
+def main(skip_bg: bool = False, force_bg: bool = False,
+         localized: bool = False, allow_unverified: bool = False):
+    campaign = engine.validate(engine.builtin_campaign())
 
-    if not skip_bg:
-        print("Generating backgrounds (Nano Banana)...")
-        backgrounds.generate_all()
+    # Hard gate: Arabic must be verified before any render
+    blocked = engine.unverified_arabic(campaign)
+    if blocked:
+        raise SystemExit(
+            f"ABORT: Slide {blocked[0]} Arabic not user-verified (see Task 3).")
 
-    for slide in config.SLIDES:
-        bg_path = config.BG_DIR / f"bg_{slide['index']}.png"
-        if not bg_path.exists():
-            raise SystemExit(f"Missing background: {bg_path}")
-        bg = Image.open(bg_path)
-        if slide.get("app_screenshot"):
-            out = compose.render_appshot(slide, bg)
-        elif slide["role"] == "cta":
-            out = compose.render_cta(slide, bg)
-        else:
-            out = compose.render_slide(slide, bg)
-        dest = config.OUTPUT_DIR / f"slide_{slide['index']}.png"
-        out.save(dest)
-        print(f"  saved {dest}")
-    print("Done. 5 slides in", config.OUTPUT_DIR)
+    langs = config.LANGS if localized else None
+    summary = engine.render_campaigns([campaign], skip_bg=skip_bg,
+                                      force_bg=force_bg, langs=langs,
+                                      allow_unverified=allow_unverified)
+    row = summary[campaign["name"]]
+    if row["status"] != "ok":
+        raise SystemExit(f"ABORT: {row['status']}")
+    print(f"Done. {row['slides']} slides in", config.OUTPUT_DIR)
 
 
 if __name__ == "__main__":
-    main(skip_bg="--skip-bg" in sys.argv)
+    main(skip_bg="--skip-bg" in sys.argv, force_bg="--force-bg" in sys.argv,
+         localized="--localized" in sys.argv,
+         allow_unverified="--allow-unverified" in sys.argv)
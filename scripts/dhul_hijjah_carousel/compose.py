@@ -1,4 +1,6 @@
 """Composite verified text onto backgrounds. Arabic via raqm layout engine."""
+import hashlib
+from collections import OrderedDict
 from functools import lru_cache
 from pathlib import Path
 
@@ -9,17 +11,120 @@ from . import config
 SAFE_W = 880          # centered text column width
 MARGIN_X = (config.CANVAS_W - SAFE_W) // 2
 
+# Darkened backgrounds and blurred glow/shadow patches are pure functions of
+# their inputs, so re-renders while iterating on copy reuse them.
+LAYER_CACHE_SIZE = 32
+_layer_cache: "OrderedDict[tuple, object]" = OrderedDict()
 
-@lru_cache(maxsize=32)
+
+def _cached(key: tuple, build):
+    if key in _layer_cache:
+        _layer_cache.move_to_end(key)
+        return _layer_cache[key]
+    value = _layer_cache[key] = build()
+    if len(_layer_cache) > LAYER_CACHE_SIZE:
+        _layer_cache.popitem(last=False)
+    return value
+
+
+def clear_cache():
+    _layer_cache.clear()
+
+
+def _digest(img: Image.Image) -> str:
+    return hashlib.blake2b(img.tobytes(), digest_size=16).hexdigest()
+
+
+def _darkened(bg: Image.Image, alpha: float) -> Image.Image:
+    """bg blended toward black by ``alpha``. Returns a fresh, drawable copy."""
+    def build():
+        img = bg.convert("RGB")
+        return Image.blend(img, Image.new("RGB", img.size, (0, 0, 0)), alpha)
+    key = ("darken", bg.mode, bg.size, _digest(bg), alpha)
+    return _cached(key, build).copy()
+
+
+def _blur_patch(layer: Image.Image, radius: int):
+    """Blur only the drawn region of a transparent RGBA layer.
+
+    Returns (patch, (x, y)) for alpha_composite, or None if nothing drawn.
+    Padding by 3x the radius covers the blur's support, so the result
+    matches blurring the whole canvas.
+    """
+    box = layer.getbbox()
+    if box is None:
+        return None
+    pad = 3 * radius
+    x0, y0 = max(0, box[0] - pad), max(0, box[1] - pad)
+    x1, y1 = min(layer.width, box[2] + pad), min(layer.height, box[3] + pad)
+    patch = layer.crop((x0, y0, x1, y1)).filter(ImageFilter.GaussianBlur(radius))
+    return patch, (x0, y0)
+
+
+def _composite(img: Image.Image, blurred) -> Image.Image:
+    """alpha_composite a _blur_patch result onto an RGBA image in place."""
+    if blurred is not None:
+        patch, dest = blurred
+        img.alpha_composite(patch, dest)
+    return img
+
+
+@lru_cache(maxsize=64)
 def _font(path: str, size: int) -> ImageFont.FreeTypeFont:
     return ImageFont.truetype(path, size, layout_engine=ImageFont.Layout.RAQM)
 
 
-def wrap(text: str, font: ImageFont.FreeTypeFont, max_w: int) -> list:
+FONT_SIZES = (38, 40, 44, 84, 88, 92)
+
+
+def preload_fonts(langs=config.LANGS):
+    """Warm _font for every language's faces (process-pool initializer)."""
+    for lang in langs:
+        style = config.LANG_STYLE[lang]
+        for size in FONT_SIZES:
+            _font(style["display"], size)
+            _font(style["body"], size)
+    _font(config.FONT_ARABIC, 60)
+
+
+def localize(slide: dict, lang: str, allow_unverified: bool = False) -> dict:
+    """Return ``slide`` with headline/subtext/cta_label swapped to ``lang``.
+
+    English is the base copy. Other languages read <field>_<lang> keys and,
+    like Arabic verses, refuse to render until a human has approved them
+    (``allow_unverified`` is for draft renders that go to the reviewer).
+    """
+    if lang not in config.LANG_STYLE:
+        raise ValueError(f"Unsupported language {lang!r}")
+    out = dict(slide, lang=lang)
+    if lang == "en":
+        return out
+    if not slide.get("translation_verified") and not allow_unverified:
+        raise ValueError(
+            f"Slide {slide['index']} has unverified {lang} translation — "
+            f"refusing to render"
+        )
+    fields = ["headline", "subtext"] + (["cta_label"] if slide["role"] == "cta" else [])
+    for field in fields:
+        key = f"{field}_{lang}"
+        if field != "cta_label" and not slide.get(field):
+            continue
+        if not slide.get(key):
+            raise ValueError(f"Slide {slide['index']} missing {key}")
+        out[field] = slide[key]
+    return out
+
+
+def _style(slide: dict) -> dict:
+    return config.LANG_STYLE[slide.get("lang", "en")]
+
+
+def wrap(text: str, font: ImageFont.FreeTypeFont, max_w: int,
+         direction: str = None) -> list:
     words, lines, cur = text.split(), [], ""
     for w in words:
         trial = f"{cur} {w}".strip()
-        if font.getlength(trial) <= max_w:
+        if font.getlength(trial, direction=direction) <= max_w:
             cur = trial
         else:
             if cur:
@@ -31,9 +136,10 @@ def wrap(text: str, font: ImageFont.FreeTypeFont, max_w: int) -> list:
 
 
 def _draw_block(draw, text, font, fill, y, line_h, glow=None, rtl=False):
+    measure = "rtl" if rtl else None
     for raw_line in text.split("\n"):
-        for line in (wrap(raw_line, font, SAFE_W) or [""]):
-            w = font.getlength(line)
+        for line in (wrap(raw_line, font, SAFE_W, measure) or [""]):
+            w = font.getlength(line, direction=measure)
             x = (config.CANVAS_W - w) / 2
             if glow is not None:
                 draw.text((x, y), line, font=font, fill=glow,
@@ -50,27 +156,29 @@ def render_slide(slide: dict, bg: Image.Image) -> Image.Image:
             f"Slide {slide['index']} has unverified Arabic — refusing to render"
         )
 
-    img = bg.convert("RGB").copy()
     # Darken for text legibility
-    overlay = Image.new("RGB", img.size, (0, 0, 0))
-    img = Image.blend(img, overlay, 0.35)
+    img = _darkened(bg, 0.35)
 
-    head_f = _font(config.FONT_DISPLAY, 92)
-    body_f = _font(config.FONT_BODY, 44)
-    sub_f = _font(config.FONT_BODY, 38)
+    style = _style(slide)
+    rtl, scale = style["rtl"], style["line"]
+    head_f = _font(style["display"], 92)
+    body_f = _font(style["body"], 44)
     ar_f = _font(config.FONT_ARABIC, 60)
+    head_h = round(108 * scale)
 
     # --- glow layer for the headline ---
-    glow_layer = Image.new("RGBA", img.size, (0, 0, 0, 0))
-    gd = ImageDraw.Draw(glow_layer)
-    _draw_block(gd, slide["headline"], head_f, config.COLOR_GOLD_BRIGHT,
-                420, 108)
-    glow_layer = glow_layer.filter(ImageFilter.GaussianBlur(18))
-    img = Image.alpha_composite(img.convert("RGBA"), glow_layer).convert("RGB")
+    def build_glow():
+        layer = Image.new("RGBA", img.size, (0, 0, 0, 0))
+        _draw_block(ImageDraw.Draw(layer), slide["headline"], head_f,
+                    config.COLOR_GOLD_BRIGHT, 420, head_h, rtl=rtl)
+        return _blur_patch(layer, 18)
+    glow_key = ("glow", slide["headline"], style["display"], 92,
+                config.COLOR_GOLD_BRIGHT, 420, head_h, rtl)
+    img = _composite(img.convert("RGBA"), _cached(glow_key, build_glow)).convert("RGB")
 
     draw = ImageDraw.Draw(img)
     y = _draw_block(draw, slide["headline"], head_f,
-                    config.COLOR_GOLD_BRIGHT, 420, 108)
+                    config.COLOR_GOLD_BRIGHT, 420, head_h, rtl=rtl)
 
     if slide.get("arabic") and slide.get("arabic_verified"):
         y += 40
@@ -80,10 +188,15 @@ def render_slide(slide: dict, bg: Image.Image) -> Image.Image:
     if slide.get("subtext"):
         y += 50
         _draw_block(draw, slide["subtext"], body_f, config.COLOR_CREAM,
-                    y, 58)
+                    y, round(58 * scale), rtl=rtl)
     return img
 
 
+def _resized(path: Path, w: int, h: int) -> Image.Image:
+    with Image.open(path) as src:
+        return src.convert("RGBA").resize((w, h), Image.LANCZOS)
+
+
 def _rounded(img: Image.Image, radius: int) -> Image.Image:
     from PIL import ImageOps
     mask = Image.new("L", img.size, 0)
@@ -95,27 +208,28 @@ def _rounded(img: Image.Image, radius: int) -> Image.Image:
 
 
 def render_cta(slide: dict, bg: Image.Image) -> Image.Image:
-    img = bg.convert("RGB").copy()
-    overlay = Image.new("RGB", img.size, (0, 0, 0))
-    img = Image.blend(img, overlay, 0.45).convert("RGBA")
+    img = _darkened(bg, 0.45).convert("RGBA")
 
     # App icon mockup, centered upper area
     icon_size = 300
     if config.APP_ICON.exists():
-        icon = Image.open(config.APP_ICON).convert("RGBA")
-        icon = icon.resize((icon_size, icon_size), Image.LANCZOS)
-        icon = _rounded(icon, 66)
+        icon = _cached(("icon", str(config.APP_ICON),
+                        config.APP_ICON.stat().st_mtime_ns, icon_size),
+                       lambda: _rounded(_resized(config.APP_ICON, icon_size, icon_size), 66))
         img.alpha_composite(icon, ((config.CANVAS_W - icon_size) // 2, 300))
 
+    style = _style(slide)
+    rtl = style["rtl"]
     draw = ImageDraw.Draw(img)
-    head_f = _font(config.FONT_DISPLAY, 88)
+    head_f = _font(style["display"], 88)
     _draw_block(draw, slide["headline"], head_f,
-                config.COLOR_GOLD_BRIGHT, 680, 104)
+                config.COLOR_GOLD_BRIGHT, 680, round(104 * style["line"]),
+                rtl=rtl)
 
     # "Download free on the App Store" pill
-    pill_f = _font(config.FONT_DISPLAY, 40)
-    label = "Download on the App Store — link in bio"
-    tw = pill_f.getlength(label)
+    pill_f = _font(style["display"], 40)
+    label = slide.get("cta_label") or config.CTA_LABEL
+    tw = pill_f.getlength(label, direction="rtl" if rtl else None)
     pad_x, pad_y = 56, 34
     pw, ph = tw + pad_x * 2, 40 + pad_y * 2
     px = (config.CANVAS_W - pw) / 2
@@ -123,46 +237,53 @@ def render_cta(slide: dict, bg: Image.Image) -> Image.Image:
     draw.rounded_rectangle([px, py, px + pw, py + ph], radius=ph / 2,
                            fill=config.COLOR_GOLD)
     draw.text((px + pad_x, py + pad_y - 4), label, font=pill_f,
-              fill=(12, 10, 8))
+              fill=(12, 10, 8), direction="rtl" if rtl else "ltr")
     return img.convert("RGB")
 
 
 def render_appshot(slide: dict, bg: Image.Image) -> Image.Image:
-    img = bg.convert("RGB").copy()
-    overlay = Image.new("RGB", img.size, (0, 0, 0))
-    img = Image.blend(img, overlay, 0.55).convert("RGBA")
+    img = _darkened(bg, 0.55).convert("RGBA")
 
+    style = _style(slide)
+    rtl, scale = style["rtl"], style["line"]
     draw = ImageDraw.Draw(img)
-    head_f = _font(config.FONT_DISPLAY, 84)
+    head_f = _font(style["display"], 84)
     _draw_block(draw, slide["headline"], head_f,
-                config.COLOR_GOLD_BRIGHT, 90, 100)
-    body_f = _font(config.FONT_BODY, 38)
-    _draw_block(draw, slide["subtext"], body_f, config.COLOR_CREAM, 210, 50)
+                config.COLOR_GOLD_BRIGHT, 90, round(100 * scale), rtl=rtl)
+    body_f = _font(style["body"], 38)
+    _draw_block(draw, slide["subtext"], body_f, config.COLOR_CREAM, 210,
+                round(50 * scale), rtl=rtl)
 
-    shot = Image.open(config.APP_SCREENSHOT).convert("RGBA")
+    with Image.open(config.APP_SCREENSHOT) as src:
+        shot_w, shot_h = src.size
     dev_h = 960
-    dev_w = round(dev_h * shot.width / shot.height)
-    shot = shot.resize((dev_w, dev_h), Image.LANCZOS)
+    dev_w = round(dev_h * shot_w / shot_h)
     radius = 48
-    shot = _rounded(shot, radius)
+    shot = _cached(("shot", str(config.APP_SCREENSHOT),
+                    config.APP_SCREENSHOT.stat().st_mtime_ns, dev_w, dev_h),
+                   lambda: _rounded(_resized(config.APP_SCREENSHOT, dev_w, dev_h), radius))
 
     cx = (config.CANVAS_W - dev_w) // 2
     cy = 350
 
-    shadow = Image.new("RGBA", img.size, (0, 0, 0, 0))
-    sd = ImageDraw.Draw(shadow)
-    sd.rounded_rectangle([cx, cy + 18, cx + dev_w, cy + dev_h + 18],
-                         radius=radius, fill=(0, 0, 0, 170))
-    shadow = shadow.filter(ImageFilter.GaussianBlur(30))
-    img = Image.alpha_composite(img, shadow)
-
-    glow = Image.new("RGBA", img.size, (0, 0, 0, 0))
-    gd = ImageDraw.Draw(glow)
-    gd.rounded_rectangle([cx - 6, cy - 6, cx + dev_w + 6, cy + dev_h + 6],
-                         radius=radius + 6,
-                         outline=config.COLOR_GOLD + (255,), width=6)
-    glow = glow.filter(ImageFilter.GaussianBlur(10))
-    img = Image.alpha_composite(img, glow)
+    def build_shadow():
+        shadow = Image.new("RGBA", img.size, (0, 0, 0, 0))
+        sd = ImageDraw.Draw(shadow)
+        sd.rounded_rectangle([cx, cy + 18, cx + dev_w, cy + dev_h + 18],
+                             radius=radius, fill=(0, 0, 0, 170))
+        return _blur_patch(shadow, 30)
+
+    def build_glow():
+        glow = Image.new("RGBA", img.size, (0, 0, 0, 0))
+        gd = ImageDraw.Draw(glow)
+        gd.rounded_rectangle([cx - 6, cy - 6, cx + dev_w + 6, cy + dev_h + 6],
+                             radius=radius + 6,
+                             outline=config.COLOR_GOLD + (255,), width=6)
+        return _blur_patch(glow, 10)
+
+    geometry = (cx, cy, dev_w, dev_h, radius)
+    _composite(img, _cached(("shadow",) + geometry, build_shadow))
+    _composite(img, _cached(("device_glow", config.COLOR_GOLD) + geometry, build_glow))
 
     img.alpha_composite(shot, (cx, cy))
     return img.convert("RGB")
@@ -16,6 +16,18 @@ COLOR_DIM = (170, 162, 150)           # captions / sources
 FONT_ARABIC = "/System/Library/Fonts/SFArabic.ttf"
 FONT_DISPLAY = "/System/Library/Fonts/Supplemental/Arial Bold.ttf"
 FONT_BODY = "/System/Library/Fonts/Supplemental/Arial.ttf"
+FONT_URDU = "/System/Library/Fonts/NotoNastaliq.ttc"
+
+# Localized render mode: per-language fonts, line-height scale (Nastaliq
+# needs taller lines) and direction. Slide copy comes from headline_<lang> /
+# subtext_<lang> / cta_label_<lang>; English uses the plain keys.
+LANGS = ("en", "ur", "ar")
+LANG_STYLE = {
+    "en": {"display": FONT_DISPLAY, "body": FONT_BODY, "line": 1.0, "rtl": False},
+    "ur": {"display": FONT_URDU, "body": FONT_URDU, "line": 1.45, "rtl": True},
+    "ar": {"display": FONT_ARABIC, "body": FONT_ARABIC, "line": 1.15, "rtl": True},
+}
+CTA_LABEL = "Download on the App Store — link in bio"
 
 # Paths
 OUTPUT_DIR = Path("dhul_hijjah_carousel")
@@ -39,6 +51,11 @@ SLIDES = [
         "subtext": "The first ten days of Dhul-Hijjah",
         "arabic": None,
         "arabic_verified": None,
+        "headline_ur": "آپ سال کے\nبہترین 10 دن\nضائع کرنے والے ہیں۔",
+        "subtext_ur": "ذوالحجہ کے پہلے دس دن",
+        "headline_ar": "أنت على وشك أن تُضيّع\nأفضل عشرة أيام\nفي السنة.",
+        "subtext_ar": "العشر الأوائل من ذي الحجة",
+        "translation_verified": False,
         "bg_prompt": "A vast dark night sky over a tiny distant silhouette of "
                      "the Kaaba on the horizon, faint warm glow rising behind it.",
     },
@@ -51,6 +68,11 @@ SLIDES = [
                     "Holy Prophet (ṣ)"),
         "arabic": "مَا مِنْ أَيَّامٍ الْعَمَلُ الصَّالِحُ فِيهِنَّ أَحَبُّ إِلَى اللَّهِ مِنْ هَٰذِهِ الْأَيَّامِ الْعَشْرِ",
         "arabic_verified": True,
+        "headline_ur": "اللہ کے نزدیک سب سے محبوب دن",
+        "subtext_ur": "“کوئی دن ایسے نہیں جن میں نیک عمل اللہ کو ان دس دنوں سے زیادہ محبوب ہو۔”\n— رسولِ اکرم (ص)",
+        "headline_ar": "أحبّ الأيام إلى الله",
+        "subtext_ar": "— رسول الله (ص)",
+        "translation_verified": False,
         "bg_prompt": "Shafts of warm golden light breaking dramatically through "
                      "heavy dark clouds in a near-black sky.",
     },
@@ -63,6 +85,11 @@ SLIDES = [
                     "every single year."),
         "arabic": None,
         "arabic_verified": None,
+        "headline_ur": "اور ہم میں سے اکثر\nانہیں یونہی گزر جانے دیتے ہیں۔",
+        "subtext_ur": "روزہ · ذکر · توبہ · روزِ عرفہ — مغفرت کا دن۔ ہر سال، بے خبری میں گزر جاتے ہیں۔",
+        "headline_ar": "وأكثرنا\nيتركها تمضي.",
+        "subtext_ar": "الصيام · الذكر · التوبة · يوم عرفة — يوم المغفرة. تمضي دون أن نلتفت إليها، كل عام.",
+        "translation_verified": False,
         "bg_prompt": "A row of dim hanging brass lanterns fading into deep "
                      "darkness, one faint warm glow remaining.",
     },
@@ -74,6 +101,11 @@ SLIDES = [
         "arabic": None,
         "arabic_verified": None,
         "app_screenshot": True,
+        "headline_ur": "اس سال ایسا نہ ہو۔",
+        "subtext_ur": "دسوں دن — عرفہ اور عید — ایپ میں رہنمائی کے ساتھ۔",
+        "headline_ar": "هذا العام، لا تدعها تفوتك.",
+        "subtext_ar": "الأيام العشرة كلها — عرفة والعيد — بإرشاد داخل التطبيق.",
+        "translation_verified": False,
         "bg_prompt": "First light of dawn breaking over a still dark desert, a "
                      "warm gold band on the horizon promising sunrise.",
     },
@@ -84,7 +116,60 @@ SLIDES = [
         "subtext": "Download Thaqalayn — free on the App Store",
         "arabic": None,
         "arabic_verified": None,
+        "headline_ur": "یہ دس دن\nاکیلے نہ گزاریں۔",
+        "subtext_ur": "ثقلین ڈاؤن لوڈ کریں — App Store پر مفت",
+        "headline_ar": "لا تقضِ هذه\nالأيام العشرة وحدك.",
+        "subtext_ar": "حمّل تطبيق ثقلين — مجاناً على App Store",
+        "cta_label_ur": "App Store سے ڈاؤن لوڈ کریں — لنک بایو میں",
+        "cta_label_ar": "حمّله من App Store — الرابط في النبذة",
+        "translation_verified": False,
         "bg_prompt": "Minimal dark backdrop with a soft centered warm gold "
                      "radial glow, deep vignette edges.",
     },
 ]
+
+# --- Multi-campaign engine (engine.py) ---
+# Reviewed slide specs (same schema as SLIDES), one JSON file per campaign.
+CAMPAIGNS_DIR = Path("scripts/dhul_hijjah_carousel/campaigns")
+CAMPAIGNS_OUTPUT_DIR = Path("carousels")
+JOURNEY_DATA_DIR = Path("Thaqalayn/Data")
+
+# Seeds for `engine export`: which journey, which days become the 3 pillars,
+# and the hook/CTA copy. Pillar headline/subtext come from the journey data.
+JOURNEY_CAMPAIGNS = {
+    "muharram": {
+        "journey": "muharram_journey.json",
+        "hook": "Ten nights.\nOne stand for truth.",
+        "hook_subtext": "The first ten days of Muharram",
+        "cta": "Walk to Ashura\nwith us.",
+        "days": [1, 8, 10],
+        "mood": "Deep crimson dusk over an empty desert plain, a single "
+                "flickering candle flame.",
+    },
+    "ramadan": {
+        "journey": "ramadan_journey.json",
+        "hook": "Thirty days.\nMake them count.",
+        "hook_subtext": "A guided journey through Ramadan",
+        "cta": "Don't let this\nRamadan pass you by.",
+        "days": [1, 21, 23],
+        "mood": "A thin crescent moon above dark still water, a warm lantern "
+                "glow on the shore.",
+    },
+    "fatimiyya": {
+        "journey": "fatimiyya_journey.json",
+        "hook": "Do you know\nwhom we grieve?",
+        "hook_subtext": "The days of Fatimiyya",
+        "cta": "Mourn her\nby knowing her.",
+        "days": [1, 4, 5],
+        "mood": "A single white rose on dark stone under soft falling light.",
+    },
+    "hajj": {
+        "journey": "hajj_journey.json",
+        "hook": "The best 10 days\nof the year.",
+        "hook_subtext": "The first ten days of Dhul-Hijjah",
+        "cta": "Don't do these\n10 days alone.",
+        "days": [1, 9, 10],
+        "mood": "Vast night desert under stars, the faint warm outline of "
+                "distant mountains.",
+    },
+}
@@ -0,0 +1,283 @@
+"""Campaign-agnostic carousel engine: slide-spec JSON -> backgrounds -> PNGs.
+
+A campaign is a JSON file holding slides in the same schema as
+config.SLIDES (index, role, headline, subtext, arabic, arabic_verified,
+bg_prompt, optional app_screenshot):
+
+    {"name": "muharram", "output_dir": "carousels/muharram", "slides": [...]}
+
+Usage (from repo root):
+    python -m scripts.dhul_hijjah_carousel.engine export [--with-arabic]
+    python -m scripts.dhul_hijjah_carousel.engine render [campaign.json ...]
+                                                 [--skip-bg] [--force-bg]
+                                                 [--workers N]
+                                                 [--langs en,ur,ar]
+                                                 [--allow-unverified]
+
+`export` seeds one campaign file per config.JOURNEY_CAMPAIGNS entry from
+the app's *_journey.json data. `render` with no files renders the built-in
+Dhul-Hijjah carousel plus every file in config.CAMPAIGNS_DIR. All slides
+of all campaigns share one process pool. With --langs every (slide x
+language) pair is a job and lands in <output_dir>/<lang>/slide_N.png.
+
+Translations render only once a reviewer has set translation_verified on
+each slide. --allow-unverified renders them anyway as review drafts, into
+<output_dir>/<lang>_draft/ so they are never mistaken for publishable
+slides. Arabic verses stay gated on arabic_verified either way.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+
+from . import backgrounds, compose, config
+
+REQUIRED_FIELDS = ("index", "role", "headline", "bg_prompt")
+ROLES = ("hook", "pillar", "cta")
+
+
+class CampaignError(ValueError):
+    pass
+
+
+def builtin_campaign() -> dict:
+    """The original Dhul-Hijjah carousel, straight from config."""
+    return {
+        "name": "dhul_hijjah",
+        "slides": config.SLIDES,
+        "output_dir": config.OUTPUT_DIR,
+        "bg_dir": config.BG_DIR,
+    }
+
+
+def validate(campaign: dict) -> dict:
+    """Check slide schema and resolve output/bg dirs. Returns the campaign."""
+    name = campaign.get("name")
+    if not name:
+        raise CampaignError("campaign has no name")
+    slides = campaign.get("slides") or []
+    if not slides:
+        raise CampaignError(f"{name}: no slides")
+    seen = set()
+    for s in slides:
+        for field in REQUIRED_FIELDS:
+            if not s.get(field):
+                raise CampaignError(f"{name}: slide {s.get('index')} missing {field}")
+        if s["role"] not in ROLES:
+            raise CampaignError(f"{name}: slide {s['index']} has unknown role {s['role']!r}")
+        if s["index"] in seen:
+            raise CampaignError(f"{name}: duplicate slide index {s['index']}")
+        seen.add(s["index"])
+
+    out_dir = Path(campaign.get("output_dir") or config.CAMPAIGNS_OUTPUT_DIR / name)
+    campaign["output_dir"] = out_dir
+    campaign["bg_dir"] = Path(campaign.get("bg_dir") or out_dir / "backgrounds")
+    return campaign
+
+
+def unverified_arabic(campaign: dict) -> list:
+    """Indexes of slides carrying Arabic that no human has approved yet."""
+    return [s["index"] for s in campaign["slides"]
+            if s.get("arabic") and not s.get("arabic_verified")]
+
+
+def unverified_translations(campaign: dict, langs) -> list:
+    """Indexes of slides whose non-English copy is not yet approved."""
+    if not any(lang != "en" for lang in langs):
+        return []
+    return [s["index"] for s in campaign["slides"]
+            if not s.get("translation_verified")]
+
+
+def load_campaign(path) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return validate(json.load(f))
+
+
+def journey_campaign(name: str, with_arabic: bool = False) -> dict:
+    """Build a 5-slide Hook -> 3 pillars -> CTA campaign from a journey file.
+
+    Pillars take their headline/subtext from the chosen days' theme and
+    reflection. With ``with_arabic`` the day's themeArabic is included but
+    left unverified: it must be approved in the exported file before render.
+    """
+    seed = config.JOURNEY_CAMPAIGNS[name]
+    with open(config.JOURNEY_DATA_DIR / seed["journey"], encoding="utf-8") as f:
+        days = {d["dayNumber"]: d for d in json.load(f)["days"]}
+
+    def bg(subject):
+        return f"{subject} {seed['mood']}"
+
+    slides = [{
+        "index": 1,
+        "role": "hook",
+        "headline": seed["hook"],
+        "subtext": seed["hook_subtext"],
+        "arabic": None,
+        "arabic_verified": None,
+        "bg_prompt": bg("An empty horizon at night, the sense of something "
+                        "about to begin."),
+    }]
+    for i, day_no in enumerate(seed["days"], start=2):
+        day = days.get(day_no)
+        if day is None:
+            raise CampaignError(f"{name}: journey has no day {day_no}")
+        slides.append({
+            "index": i,
+            "role": "pillar",
+            "headline": day["theme"],
+            "subtext": day["reflection"],
+            "arabic": day.get("themeArabic") if with_arabic else None,
+            "arabic_verified": False if with_arabic and day.get("themeArabic") else None,
+            "bg_prompt": bg(f"An abstract atmosphere evoking {day['theme']}."),
+        })
+    slides.append({
+        "index": len(slides) + 1,
+        "role": "cta",
+        "headline": seed["cta"],
+        "subtext": "Download Thaqalayn — free on the App Store",
+        "arabic": None,
+        "arabic_verified": None,
+        "bg_prompt": bg("Minimal dark backdrop with a soft centered warm "
+                        "radial glow, deep vignette edges."),
+    })
+    return {
+        "name": name,
+        "journey": seed["journey"],
+        "output_dir": str(config.CAMPAIGNS_OUTPUT_DIR / name),
+        "slides": slides,
+    }
+
+
+def export(with_arabic: bool = False) -> list:
+    config.CAMPAIGNS_DIR.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for name in config.JOURNEY_CAMPAIGNS:
+        path = config.CAMPAIGNS_DIR / f"{name}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(journey_campaign(name, with_arabic), f,
+                      ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"  exported {path}")
+        paths.append(path)
+    return paths
+
+
+def render(slide: dict, bg: Image.Image) -> Image.Image:
+    if slide.get("app_screenshot"):
+        return compose.render_appshot(slide, bg)
+    if slide["role"] == "cta":
+        return compose.render_cta(slide, bg)
+    return compose.render_slide(slide, bg)
+
+
+def _render_job(job: tuple) -> tuple:
+    """Process-pool worker: render one slide to disk. Returns (key, secs)."""
+    key, slide, lang, bg_path, dest, draft = job
+    t0 = time.perf_counter()
+    with Image.open(bg_path) as bg:
+        render(compose.localize(slide, lang, allow_unverified=draft), bg).save(dest)
+    return key, time.perf_counter() - t0
+
+
+def render_campaigns(campaigns: list, skip_bg: bool = False,
+                     force_bg: bool = False, workers: int = None,
+                     langs: tuple = None, allow_unverified: bool = False) -> dict:
+    """Render every slide of every campaign across one process pool.
+
+    ``langs=None`` renders the base copy to <output_dir>/slide_N.png; a
+    tuple of languages renders each one to <output_dir>/<lang>/. Campaigns
+    with unverified Arabic or translations are blocked (not rendered) rather
+    than aborting the whole run; with ``allow_unverified`` unverified
+    translations are rendered as drafts to <output_dir>/<lang>_draft/ instead.
+    Returns {name: {"status", "slides", "secs"}}.
+    """
+    summary, jobs = {}, []
+    for c in campaigns:
+        blocked = unverified_arabic(c)
+        if blocked:
+            summary[c["name"]] = {"status": f"BLOCKED: unverified Arabic on slide(s) {blocked}",
+                                  "slides": 0, "secs": 0.0}
+            continue
+        blocked = unverified_translations(c, langs or ())
+        if blocked and not allow_unverified:
+            summary[c["name"]] = {"status": f"BLOCKED: unverified translation on slide(s) {blocked}",
+                                  "slides": 0, "secs": 0.0}
+            continue
+        if not skip_bg:
+            print(f"Generating backgrounds for {c['name']} (Nano Banana)...")
+            backgrounds.generate_all(c["slides"], c["bg_dir"], force=force_bg)
+        for lang in (langs or ("en",)):
+            draft = lang != "en" and bool(blocked)
+            out_dir = c["output_dir"] / (f"{lang}_draft" if draft else lang) if langs else c["output_dir"]
+            out_dir.mkdir(parents=True, exist_ok=True)
+            for s in c["slides"]:
+                bg_path = c["bg_dir"] / f"bg_{s['index']}.png"
+                if not bg_path.exists():
+                    raise SystemExit(f"Missing background: {bg_path}")
+                dest = out_dir / f"slide_{s['index']}.png"
+                jobs.append(((c["name"], s["index"], lang), s, lang, bg_path, dest, draft))
+        summary[c["name"]] = {"status": "ok", "slides": 0, "secs": 0.0}
+        if blocked:
+            print(f"  {c['name']}: unverified translation on slide(s) {blocked}; rendering drafts")
+
+    t0 = time.perf_counter()
+    if jobs:
+        workers = workers or min(len(jobs), os.cpu_count() or 1)
+        # Fonts are loaded once per worker, then reused through compose._font
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=compose.preload_fonts,
+                                 initargs=(langs or ("en",),)) as pool:
+            for (name, index, lang), secs in pool.map(_render_job, jobs):
+                summary[name]["slides"] += 1
+                summary[name]["secs"] += secs
+                print(f"  {name}: slide {index} [{lang}] ({secs:.2f}s)")
+    wall = time.perf_counter() - t0
+
+    print(f"\n{'campaign':<14} {'slides':>6} {'cpu s':>7}  status")
+    for name, row in summary.items():
+        print(f"{name:<14} {row['slides']:>6} {row['secs']:>7.2f}  {row['status']}")
+    total = sum(r["slides"] for r in summary.values())
+    print(f"{total} slides in {wall:.2f}s wall")
+    return summary
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export", help="seed campaign files from *_journey.json")
+    ex.add_argument("--with-arabic", action="store_true")
+    rn = sub.add_parser("render", help="render one or more campaign files")
+    rn.add_argument("campaigns", nargs="*")
+    rn.add_argument("--skip-bg", action="store_true")
+    rn.add_argument("--force-bg", action="store_true")
+    rn.add_argument("--workers", type=int, default=None)
+    rn.add_argument("--langs", default=None,
+                    help=f"comma-separated, e.g. {','.join(config.LANGS)}")
+    rn.add_argument("--allow-unverified", action="store_true",
+                    help="render unverified translations as drafts to <lang>_draft/")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "export":
+        export(args.with_arabic)
+        return 0
+
+    if args.campaigns:
+        campaigns = [load_campaign(p) for p in args.campaigns]
+    else:
+        campaigns = [validate(builtin_campaign())]
+        campaigns += [load_campaign(p) for p in sorted(config.CAMPAIGNS_DIR.glob("*.json"))]
+    langs = tuple(args.langs.split(",")) if args.langs else None
+    summary = render_campaigns(campaigns, skip_bg=args.skip_bg,
+                               force_bg=args.force_bg, workers=args.workers,
+                               langs=langs, allow_unverified=args.allow_unverified)
+    return 1 if any(r["status"] != "ok" for r in summary.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
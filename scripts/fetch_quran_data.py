@@ -2,16 +2,24 @@
 """
 Fetch complete Quran data from Al-Quran Cloud API
 Generates quran_data.json with all surahs and verses
+
+Responses go through quran_editions' on-disk cache, so a rerun only
+revalidates; pass --offline to build entirely from the cache. Alongside
+quran_data.json it writes quran_columns.json (see quran_columns.py) for
+O(1) verse and juz/page/ruku range lookups.
 """
 
-import requests
+import argparse
 import json
-import time
 from typing import Dict, List, Any
 
+from quran_columns import build_columns, columns_path_for, save_columns
+from quran_editions import EditionError, fetch_editions, fetch_json, make_session
+
 class QuranDataFetcher:
-    def __init__(self):
-        self.base_url = "http://api.alquran.cloud/v1"
+    def __init__(self, offline: bool = False):
+        self.offline = offline
+        self.session = make_session()
         self.quran_data = {
             "surahs": [],
             "verses": {}
@@ -22,9 +30,7 @@ class QuranDataFetcher:
         print("Fetching surah metadata...")
         
         try:
-            response = requests.get(f"{self.base_url}/surah")
-            response.raise_for_status()
-            data = response.json()
+            data = fetch_json("surah", session=self.session, offline=self.offline)
             
             surahs = []
             for surah in data['data']:
@@ -41,7 +47,7 @@ class QuranDataFetcher:
             print(f"✓ Fetched metadata for {len(surahs)} surahs")
             return surahs
             
-        except requests.RequestException as e:
+        except EditionError as e:
             print(f"Error fetching surah metadata: {e}")
             return []
     
@@ -52,25 +58,15 @@ class QuranDataFetcher:
         verses = {}
         
         try:
-            # Fetch Arabic text (Uthmani script)
-            print("  → Fetching Arabic text...")
-            arabic_response = requests.get(f"{self.base_url}/quran/quran-uthmani")
-            arabic_response.raise_for_status()
-            arabic_data = arabic_response.json()
-            
-            # Fetch English translation (Sahih International)
-            print("  → Fetching English translation...")
-            translation_response = requests.get(f"{self.base_url}/quran/en.sahih")
-            translation_response.raise_for_status()
-            translation_data = translation_response.json()
-            
-            # Debug: Check response structure
-            print(f"  → Arabic data keys: {list(arabic_data['data'].keys())}")
-            print(f"  → Translation data keys: {list(translation_data['data'].keys())}")
+            # Arabic text (Uthmani script) and English translation (Sahih
+            # International), fetched concurrently
+            print("  → Fetching Arabic text and English translation...")
+            editions = fetch_editions(["quran-uthmani", "en.sahih"],
+                                      session=self.session, offline=self.offline)
             
             # Get surahs from the response
-            arabic_surahs = arabic_data['data']['surahs']
-            translation_surahs = translation_data['data']['surahs']
+            arabic_surahs = editions["quran-uthmani"]['surahs']
+            translation_surahs = editions["en.sahih"]['surahs']
                 
             # Process surahs and their ayahs
             for arabic_surah, translation_surah in zip(arabic_surahs, translation_surahs):
@@ -97,7 +93,7 @@ class QuranDataFetcher:
             print(f"✓ Fetched {total_verses} verses from {len(verses)} surahs")
             return verses
             
-        except requests.RequestException as e:
+        except EditionError as e:
             print(f"Error fetching Quran data: {e}")
             return {}
     
@@ -114,6 +110,9 @@ class QuranDataFetcher:
             file_size = os.path.getsize(filename) / (1024 * 1024)  # MB
             print(f"✓ Saved {filename} ({file_size:.2f} MB)")
             
+            columns_file = save_columns(build_columns(self.quran_data), columns_path_for(filename))
+            print(f"✓ Saved {columns_file} ({os.path.getsize(columns_file) / (1024 * 1024):.2f} MB)")
+            
         except Exception as e:
             print(f"Error saving data: {e}")
     
@@ -146,5 +145,8 @@ class QuranDataFetcher:
         print(f"Data ready for tafsir generation!")
 
 if __name__ == "__main__":
-    fetcher = QuranDataFetcher()
+    parser = argparse.ArgumentParser(description="Build quran_data.json from Al-Quran Cloud")
+    parser.add_argument("--offline", action="store_true", help="use the local edition cache only")
+    args = parser.parse_args()
+    fetcher = QuranDataFetcher(offline=args.offline)
     fetcher.fetch_all_data()
\ No newline at end of file
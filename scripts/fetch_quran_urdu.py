@@ -15,22 +15,40 @@ Shia Urdu translation. The other Shia option on this API is ur.najafi.
 Usage:
     python3 scripts/fetch_quran_urdu.py                      # merge into quran_data.json
     python3 scripts/fetch_quran_urdu.py --edition ur.najafi
+    python3 scripts/fetch_quran_urdu.py --edition ur.jawadi \
+        --edition ur.najafi=translationUrduNajafi            # several fields, one pass
     python3 scripts/fetch_quran_urdu.py --quran path/to/quran_data.json
-
-The merge is deterministic and idempotent: `translationUrdu` is placed
-immediately after `translation`, existing values are overwritten, and all other
-content / key order is preserved. The script fails loudly (no fallback) if the
-API verse set does not exactly match quran_data.json.
+    python3 scripts/fetch_quran_urdu.py --offline            # from .quran_cache/ only
+
+The edition is fetched through quran_editions, which caches it on disk and
+revalidates with a conditional GET on later runs.
+
+`--edition EDITION[=FIELD]` is repeatable. FIELD may be left out for one
+Urdu (ur.*) edition, which then fills translationUrdu; every other edition
+must name its field, so e.g. en.yusufali can never land in translationUrdu.
+All requested editions are fetched concurrently and merged in a single pass
+with a single write, so adding another translation does not add another full
+rewrite of quran_data.json.
+
+The merge is deterministic and idempotent: the merged fields are placed
+immediately after `translation` in the order given, existing values are
+overwritten, and all other content / key order is preserved. The script fails
+loudly (no fallback) if any edition's verse set does not exactly match
+quran_data.json.
 """
 
 import argparse
 import json
+import os
 import sys
-import urllib.request
 from collections import OrderedDict
 from pathlib import Path
 
-API_BASE = "http://api.alquran.cloud/v1"
+from quran_editions import EditionError, ayah_texts, fetch_editions
+
+DEFAULT_EDITION = "ur.jawadi"
+DEFAULT_FIELD = "translationUrdu"
+
 EXPECTED_SURAHS = 114
 EXPECTED_VERSES = 6236
 
@@ -40,45 +58,67 @@ def fail(message: str):
     sys.exit(1)
 
 
-def fetch_edition(edition: str) -> "OrderedDict[str, OrderedDict[str, str]]":
-    """Fetch a full-Quran edition and return {surah: {ayah: text}} (string keys)."""
-    url = f"{API_BASE}/quran/{edition}"
-    print(f"→ Fetching Urdu edition '{edition}' from {url} ...")
-    req = urllib.request.Request(url, headers={"User-Agent": "thaqalayn-quran-urdu/1.0"})
-    with urllib.request.urlopen(req, timeout=120) as resp:
-        payload = json.load(resp)
-
-    if payload.get("code") != 200 or "data" not in payload:
-        fail(f"Unexpected API response for '{edition}': code={payload.get('code')}")
-
-    edition_meta = payload["data"].get("edition", {})
-    print(f"  edition: {edition_meta.get('englishName')} "
+def check_edition(edition: str, data: dict) -> "OrderedDict[str, OrderedDict[str, str]]":
+    """Validate a fetched edition and return {surah: {ayah: text}} (string keys)."""
+    edition_meta = data.get("edition", {})
+    print(f"  {edition}: {edition_meta.get('englishName')} "
           f"({edition_meta.get('name')}) — language={edition_meta.get('language')}")
-    if edition_meta.get("language") != "ur":
-        fail(f"Edition '{edition}' is not an Urdu edition (language={edition_meta.get('language')})")
-
-    surahs = payload["data"]["surahs"]
-    result: "OrderedDict[str, OrderedDict[str, str]]" = OrderedDict()
-    total = 0
-    for surah in surahs:
-        s_key = str(surah["number"])
-        ayah_map: "OrderedDict[str, str]" = OrderedDict()
-        for ayah in surah["ayahs"]:
-            ayah_map[str(ayah["numberInSurah"])] = ayah["text"].strip()
-            total += 1
-        result[s_key] = ayah_map
+    language = edition.split(".", 1)[0]
+    if edition_meta.get("language") != language:
+        fail(f"Edition '{edition}' is not a '{language}' edition "
+             f"(language={edition_meta.get('language')})")
+
+    result = ayah_texts(data)
+    total = sum(len(ayah_map) for ayah_map in result.values())
 
     print(f"  fetched {len(result)} surahs, {total} ayahs")
     if len(result) != EXPECTED_SURAHS or total != EXPECTED_VERSES:
-        fail(f"Verse count mismatch: got {len(result)} surahs / {total} ayahs, "
+        fail(f"Verse count mismatch for '{edition}': got {len(result)} surahs / {total} ayahs, "
              f"expected {EXPECTED_SURAHS} / {EXPECTED_VERSES}")
     return result
 
 
-def merge_into(quran_path: Path, urdu: "OrderedDict[str, OrderedDict[str, str]]") -> int:
-    """Inject translationUrdu inline into quran_path. Returns count merged."""
+def fetch_edition(edition: str, offline: bool = False) -> "OrderedDict[str, OrderedDict[str, str]]":
+    """Fetch a full-Quran edition and return {surah: {ayah: text}} (string keys)."""
+    return fetch_all([edition], offline=offline)[edition]
+
+
+def fetch_all(editions, offline: bool = False) -> "OrderedDict[str, OrderedDict[str, OrderedDict[str, str]]]":
+    """Fetch several editions concurrently; {edition: {surah: {ayah: text}}}."""
+    print(f"→ Fetching edition(s) {', '.join(editions)} ...")
+    try:
+        fetched = fetch_editions(editions, offline=offline)
+    except EditionError as e:
+        fail(str(e))
+    return OrderedDict((e, check_edition(e, data)) for e, data in fetched.items())
+
+
+def _check_key_sets(verses: dict, field: str, texts: dict, name: str):
+    """Strict key-set equality: every verse must get exactly one value."""
+    for s_key, surah_verses in verses.items():
+        if s_key not in texts:
+            fail(f"{field}: surah {s_key} missing from fetched edition")
+        for v_key in surah_verses:
+            if v_key not in texts[s_key]:
+                fail(f"{field}: verse {s_key}:{v_key} missing from fetched edition")
+    for s_key, ayah_map in texts.items():
+        if s_key not in verses:
+            fail(f"{field}: surah {s_key} present in edition but absent from {name}")
+        for v_key in ayah_map:
+            if v_key not in verses[s_key]:
+                fail(f"{field}: verse {s_key}:{v_key} present in edition but absent from {name}")
+
+
+def merge_editions(quran_path: Path,
+                   fields: "OrderedDict[str, OrderedDict[str, OrderedDict[str, str]]]") -> int:
+    """Inject every {field: {surah: {ayah: text}}} inline into quran_path in one
+    pass and one atomic write. Returns the number of verses rewritten."""
     if not quran_path.exists():
         fail(f"Quran data file not found: {quran_path}")
+    if not fields:
+        fail("No editions to merge")
+    if "translation" in fields:
+        fail("Refusing to overwrite the anchor field 'translation'")
 
     with open(quran_path, encoding="utf-8") as f:
         quran = json.load(f, object_pairs_hook=OrderedDict)
@@ -87,19 +127,8 @@ def merge_into(quran_path: Path, urdu: "OrderedDict[str, OrderedDict[str, str]]"
     if not isinstance(verses, dict):
         fail(f"{quran_path.name}: missing 'verses' object")
 
-    # Strict key-set equality: every verse must get exactly one translation.
-    for s_key, surah_verses in verses.items():
-        if s_key not in urdu:
-            fail(f"Surah {s_key} missing from fetched edition")
-        for v_key in surah_verses:
-            if v_key not in urdu[s_key]:
-                fail(f"Verse {s_key}:{v_key} missing from fetched edition")
-    for s_key, ayah_map in urdu.items():
-        if s_key not in verses:
-            fail(f"Surah {s_key} present in edition but absent from {quran_path.name}")
-        for v_key in ayah_map:
-            if v_key not in verses[s_key]:
-                fail(f"Verse {s_key}:{v_key} present in edition but absent from {quran_path.name}")
+    for field, texts in fields.items():
+        _check_key_sets(verses, field, texts, quran_path.name)
 
     merged = 0
     for s_key, surah_verses in verses.items():
@@ -108,11 +137,12 @@ def merge_into(quran_path: Path, urdu: "OrderedDict[str, OrderedDict[str, str]]"
                 fail(f"Verse {s_key}:{v_key} has no 'translation' field to anchor to")
             rebuilt = OrderedDict()
             for k, v in verse_obj.items():
-                if k == "translationUrdu":
+                if k in fields:
                     continue  # drop stale copy; reinserted in canonical position
                 rebuilt[k] = v
                 if k == "translation":
-                    rebuilt["translationUrdu"] = urdu[s_key][v_key]
+                    for field, texts in fields.items():
+                        rebuilt[field] = texts[s_key][v_key]
             surah_verses[v_key] = rebuilt
             merged += 1
 
@@ -121,27 +151,57 @@ def merge_into(quran_path: Path, urdu: "OrderedDict[str, OrderedDict[str, str]]"
         text += "\n"
     json.loads(text)  # round-trip sanity check before writing
 
-    with open(quran_path, "w", encoding="utf-8") as f:
+    tmp = quran_path.with_name(quran_path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
         f.write(text)
-    print(f"✅ Merged {merged} Urdu translations into {quran_path}")
+    os.replace(tmp, quran_path)
+    print(f"✅ Merged {', '.join(fields)} into {merged} verses of {quran_path}")
     return merged
 
 
+def merge_into(quran_path: Path, urdu: "OrderedDict[str, OrderedDict[str, str]]") -> int:
+    """Inject translationUrdu inline into quran_path. Returns count merged."""
+    return merge_editions(quran_path, OrderedDict([(DEFAULT_FIELD, urdu)]))
+
+
+def parse_edition_specs(specs) -> "OrderedDict[str, str]":
+    """['ur.jawadi', 'ur.najafi=translationUrduNajafi'] -> {field: edition}."""
+    fields = OrderedDict()
+    for spec in specs:
+        edition, _, field = spec.partition("=")
+        if not field:
+            if not edition.startswith("ur."):
+                fail(f"{edition} is not an Urdu edition; name its field: --edition {edition}=FIELD")
+            if DEFAULT_FIELD in fields:
+                fail(f"{fields[DEFAULT_FIELD]} already fills {DEFAULT_FIELD}; "
+                     f"name the field for {edition}: --edition {edition}=FIELD")
+            field = DEFAULT_FIELD
+        if field in fields:
+            fail(f"Field '{field}' requested twice ({fields[field]}, {edition})")
+        fields[field] = edition
+    return fields
+
+
 def main():
-    parser = argparse.ArgumentParser(description="Fetch + merge Urdu Quran translation inline")
-    parser.add_argument("--edition", default="ur.jawadi", help="Al-Quran Cloud Urdu edition identifier")
+    parser = argparse.ArgumentParser(description="Fetch + merge Quran translations inline")
+    parser.add_argument("--edition", action="append", default=None,
+                        help="Al-Quran Cloud edition, optionally EDITION=FIELD (repeatable). "
+                             f"Default: {DEFAULT_EDITION}={DEFAULT_FIELD}")
     parser.add_argument("--quran", action="append", default=None,
                         help="Target quran_data.json path (repeatable). Default: quran_data.json")
+    parser.add_argument("--offline", action="store_true", help="Use the local edition cache only")
     args = parser.parse_args()
 
     targets = [Path(p) for p in (args.quran or ["quran_data.json"])]
-    urdu = fetch_edition(args.edition)
+    specs = parse_edition_specs(args.edition or [DEFAULT_EDITION])
+    texts = fetch_all(list(dict.fromkeys(specs.values())), offline=args.offline)
+    fields = OrderedDict((field, texts[edition]) for field, edition in specs.items())
     for target in targets:
-        merge_into(target, urdu)
+        merge_editions(target, fields)
 
     # Spot check
-    sample = urdu["1"]["1"]
-    print(f"\nSample 1:1 → {sample}")
+    for field, edition_texts in fields.items():
+        print(f"\nSample 1:1 {field} → {edition_texts['1']['1']}")
     print("Done.")
 
 
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Find near-duplicate paragraphs across the tafsir corpus with MinHash + LSH.
+
+Generated layers often restate the same paragraph for adjacent verses or
+across layers of one verse. Comparing every pair of the ~70k paragraphs is
+quadratic; instead each paragraph becomes a set of word 5-gram shingles,
+summarised by a MinHash signature, and only paragraphs that collide in at
+least one LSH band are compared. Languages (en / ur / ar, see
+tafsir_corpus.key_language) are processed in parallel, one process each.
+
+    python3 scripts/find_duplicates.py [--threshold 0.8] [--lang en] [--output build/near_duplicates.json]
+    python3 scripts/find_duplicates.py --flag      # mark English duplicates for regenerate-stale
+
+Similarity is the fraction of agreeing signature rows, an estimate of the
+Jaccard similarity of the two shingle sets. With 16 bands of 8 rows a pair
+at 0.8 is found with probability 0.95, one at 0.5 with about 0.06.
+
+The report lists clusters, largest first. Each cluster's first member (in
+corpus order) is its original and every other member carries its
+similarity to it. --flag marks the non-original English layer items via
+generate_tafsir.flag_items(), together with the original paragraph they
+repeat, so
+
+    python3 scripts/generate_tafsir.py regenerate-stale --surah N
+
+rewrites them with that paragraph in the prompt as text not to repeat. Urdu and Arabic layers are translations of the English, so
+their clusters are reported but never flagged.
+"""
+
+import argparse
+import json
+import re
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from tafsir_corpus import LANGUAGES, TAFSIR_DIR, key_language
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_OUTPUT = PROJECT_ROOT / "build" / "near_duplicates.json"
+SHINGLE = 5
+NUM_PERM = 128
+BANDS, ROWS = 16, 8
+MIN_WORDS = 20
+THRESHOLD = 0.8
+CHUNK = 50_000         # shingles hashed per step; CHUNK x NUM_PERM x 8 bytes of scratch
+MAX_BUCKET = 50        # larger LSH buckets are compared against their first member only
+SEED = 1
+ENGLISH_LAYER = re.compile(r"^layer(\d+)$")
+WORD = re.compile(r"\w+")
+
+# (surah, verse, key, paragraph index)
+Ref = Tuple[int, str, str, int]
+
+
+def load_paragraphs(lang: str) -> Tuple[List[Ref], List[str]]:
+    refs, texts = [], []
+    for path in sorted(TAFSIR_DIR.glob("tafsir_*.json"), key=lambda p: int(p.stem.split("_")[1])):
+        surah = int(path.stem.split("_")[1])
+        with open(path, encoding="utf-8") as f:
+            verses = json.load(f)
+        for verse in sorted(verses, key=int):
+            for key, value in verses[verse].items():
+                if not isinstance(value, str) or key_language(key) != lang:
+                    continue
+                for i, para in enumerate(p for p in value.split("\n\n") if p.strip()):
+                    refs.append((surah, verse, key, i))
+                    texts.append(para)
+    return refs, texts
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """uint64 hashes of the text's distinct word SHINGLE-grams."""
+    words = WORD.findall(text.lower())
+    if len(words) < MIN_WORDS:
+        return np.empty(0, dtype=np.uint64)
+    tokens = np.fromiter((zlib.crc32(w.encode("utf-8")) for w in words), dtype=np.uint64, count=len(words))
+    n = len(tokens) - SHINGLE + 1
+    h = np.zeros(n, dtype=np.uint64)
+    for j in range(SHINGLE):
+        h = h * np.uint64(0x100000001B3) + tokens[j:j + n]   # wraps mod 2**64
+    return np.unique(h)
+
+
+def minhash(shingles: List[np.ndarray]) -> np.ndarray:
+    """(documents, NUM_PERM) uint32 signatures via multiply-shift hashing.
+
+    Documents with no shingles get all-max rows and are ignored by lsh_pairs.
+    """
+    rng = np.random.default_rng(SEED)
+    a = rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+    lengths = np.array([len(s) for s in shingles], dtype=np.int64)
+    signatures = np.full((len(shingles), NUM_PERM), np.iinfo(np.uint32).max, dtype=np.uint32)
+    flat = np.concatenate(shingles) if shingles else np.empty(0, dtype=np.uint64)
+    doc_of = np.repeat(np.arange(len(shingles)), lengths)
+    with np.errstate(over="ignore"):
+        for start in range(0, len(flat), CHUNK):
+            x = flat[start:start + CHUNK]
+            docs = doc_of[start:start + CHUNK]
+            hashed = ((x[:, None] * a[None, :] + b[None, :]) >> np.uint64(32)).astype(np.uint32)
+            # docs is sorted, so each document is one contiguous run
+            bounds = np.flatnonzero(np.r_[True, docs[1:] != docs[:-1]])
+            mins = np.minimum.reduceat(hashed, bounds, axis=0)
+            ids = docs[bounds]
+            signatures[ids] = np.minimum(signatures[ids], mins)
+    return signatures
+
+
+def lsh_pairs(signatures: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Unique candidate (i, j) pairs, i < j, sharing at least one band."""
+    rng = np.random.default_rng(SEED + 1)
+    mix = rng.integers(1, 2**63, ROWS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    docs = np.flatnonzero(valid)
+    pairs = []
+    with np.errstate(over="ignore"):
+        for band in range(BANDS):
+            rows = signatures[docs, band * ROWS:(band + 1) * ROWS].astype(np.uint64)
+            keys = (rows * mix).sum(axis=1)
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            ends = np.r_[starts[1:], len(order)]
+            for s, e in zip(starts[ends - starts > 1], ends[ends - starts > 1]):
+                members = docs[order[s:e]]
+                if len(members) <= MAX_BUCKET:
+                    i, j = np.triu_indices(len(members), 1)
+                    pairs.append(np.stack([members[i], members[j]], axis=1))
+                else:
+                    head = members.min()
+                    rest = members[members != head]
+                    pairs.append(np.stack([np.full(len(rest), head), rest], axis=1))
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def similarity(signatures: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    return (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+
+
+def clusters_from(pairs: np.ndarray, n: int) -> Dict[int, List[int]]:
+    parent = np.arange(n)
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in pairs:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+    groups = defaultdict(list)
+    for i in np.unique(pairs):
+        groups[find(i)].append(int(i))
+    return groups
+
+
+def detect(lang: str, threshold: float) -> dict:
+    refs, texts = load_paragraphs(lang)
+    shingles = [shingle_hashes(t) for t in texts]
+    valid = np.array([len(s) > 0 for s in shingles])
+    signatures = minhash(shingles)
+    candidates = lsh_pairs(signatures, valid)
+    scores = similarity(signatures, candidates)
+    matched = candidates[scores >= threshold]
+
+    clusters = []
+    for root, members in clusters_from(matched, len(refs)).items():
+        members.sort()
+        original = members[0]
+        sims = similarity(signatures, np.array([[original, m] for m in members[1:]]))
+        items = [{"ref": f"{refs[original][0]}:{refs[original][1]}", "key": refs[original][2],
+                  "paragraph": refs[original][3]}]
+        for m, sim in zip(members[1:], sims):
+            s, v, key, para = refs[m]
+            items.append({"ref": f"{s}:{v}", "key": key, "paragraph": para, "similarity": round(float(sim), 3)})
+        clusters.append({"size": len(members), "minSimilarity": round(float(sims.min()), 3),
+                         "preview": texts[original][:160], "text": texts[original], "items": items})
+    clusters.sort(key=lambda c: (-c["size"], -c["minSimilarity"]))
+    duplicated = sum(c["size"] - 1 for c in clusters)
+    return {"language": lang, "paragraphs": len(refs), "shingled": int(valid.sum()),
+            "candidates": len(candidates), "pairs": len(matched), "duplicates": duplicated,
+            "clusters": clusters}
+
+
+def regeneration_flags(report: dict) -> Tuple[Dict[int, Dict[Tuple[int, int], str]],
+                                             Dict[int, Dict[Tuple[int, int], List[str]]]]:
+    """({surah: {(ayah, layer): reason}}, {surah: {(ayah, layer): [original paragraph, ...]}})
+    for non-original English layer items."""
+    flags: Dict[int, Dict[Tuple[int, int], str]] = defaultdict(dict)
+    avoid: Dict[int, Dict[Tuple[int, int], List[str]]] = defaultdict(lambda: defaultdict(list))
+    for cluster in report["clusters"]:
+        original = cluster["items"][0]
+        for item in cluster["items"][1:]:
+            match = ENGLISH_LAYER.match(item["key"])
+            if not match:
+                continue
+            surah, ayah = (int(x) for x in item["ref"].split(":"))
+            key = (ayah, int(match.group(1)))
+            flags[surah].setdefault(key, f"near-duplicate of {original['ref']} {original['key']} "
+                                         f"({item['similarity']:.2f})")
+            if cluster["text"] not in avoid[surah][key]:
+                avoid[surah][key].append(cluster["text"])
+    return flags, avoid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate paragraphs in the tafsir corpus (MinHash/LSH)")
+    parser.add_argument("--lang", action="append", choices=LANGUAGES, help="default: all languages")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="estimated Jaccard similarity")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    parser.add_argument("--flag", action="store_true",
+                        help="flag duplicated English layers in the provenance manifests for regenerate-stale")
+    parser.add_argument("--top", type=int, default=5, help="clusters to print per language")
+    args = parser.parse_args()
+
+    langs = args.lang or list(LANGUAGES)
+    with ProcessPoolExecutor(max_workers=len(langs)) as pool:
+        reports = list(pool.map(detect, langs, [args.threshold] * len(langs)))
+
+    for report in reports:
+        print(f"\n[{report['language']}] {report['paragraphs']} paragraphs, {report['candidates']} LSH candidates, "
+              f"{report['pairs']} pairs ≥ {args.threshold}, {len(report['clusters'])} clusters, "
+              f"{report['duplicates']} duplicate paragraphs")
+        for cluster in report["clusters"][:args.top]:
+            refs = ", ".join(f"{i['ref']} {i['key']}" for i in cluster["items"][:4])
+            more = f" +{cluster['size'] - 4}" if cluster["size"] > 4 else ""
+            print(f"  {cluster['size']}× ≥{cluster['minSimilarity']:.2f}  {refs}{more}")
+            print(f"      {cluster['preview'][:100]!r}")
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "threshold": args.threshold, "shingle": SHINGLE,
+                   "permutations": NUM_PERM, "bands": BANDS, "languages": reports},
+                  f, ensure_ascii=False, indent=2)
+    print(f"\n✓ Wrote {out}")
+
+    if args.flag:
+        from generate_tafsir import flag_items
+        flagged = 0
+        for report in reports:
+            flags, avoid = regeneration_flags(report)
+            for surah in sorted(flags):
+                flagged += flag_items(surah, flags[surah], avoid=avoid[surah])
+        print(f"✓ Flagged {flagged} English layer item(s); run generate_tafsir.py regenerate-stale to rewrite them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Generate quickOverview concept blocks grounded in each verse's existing
+layer1-layer5 tafsir, writing chunk files that merge_quickoverview.py
+consumes.
+
+Usage:
+    python3 scripts/generate_quickoverview.py --surah 2 [--surah 3 ...]
+    python3 scripts/generate_quickoverview.py --all [--workers 8] [--force]
+
+The prompt is the Quick Overview section of tafsir_prompts.md, read at
+startup, with the verse's layer1-layer5 text filled in as grounding.
+Verses are fanned out over a bounded thread pool. Each response is parsed
+and validated (ids, palette colours, positions, arabicHighlight must be an
+exact substring of the verse) and retried once with the validation error
+if it fails; a reply cut off at max_tokens (R1's reasoning counts against
+it) is first retried with twice the room. As soon as every verse of a block of consecutive verses is
+done, the valid ones are written to
+    <out>/quickoverview_<surah>_v<first>-<last>.json
+in merge format ({"<verse>": {"quickOverview": {"concepts": [...]}}}), so
+an interrupted run keeps everything finished so far. Verses that already
+have a quickOverview in tafsir_<s>.json or in an existing chunk under
+<out> are skipped unless --force.
+
+Then merge with:
+    python3 scripts/merge_quickoverview.py --batch new_tafsir/quickoverview/
+
+Only the English fields are generated; _urdu / _ar concept fields come
+from the translation stage.
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from generate_tafsir import MAX_TOKENS, TafsirGenerator
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PROMPTS_FILE = PROJECT_ROOT / "tafsir_prompts.md"
+TAFSIR_DIR = PROJECT_ROOT / "Thaqalayn" / "Thaqalayn" / "Data"
+DEFAULT_OUT = PROJECT_ROOT / "new_tafsir" / "quickoverview"
+BLOCK_SIZE = 10
+LAYER_CONTEXT_CHARS = 2000
+
+PALETTE = {"#E8B86D", "#7BC47F", "#9B8FBF", "#64B5F6", "#E57373"}
+POSITIONS = ("topLeft", "topRight", "bottomLeft", "bottomRight")
+REQUIRED_FIELDS = ("id", "title", "icon", "colorHex", "coreInsight",
+                   "whyItMatters", "position", "arabicHighlight")
+SLUG_RE = re.compile(r"^[a-z0-9]+(?:-[a-z0-9]+)*$")
+
+PROMPT_SECTION = "## Quick Overview Generation Prompt"
+PLACEHOLDER = re.compile(r"\{(surah_name|surah_number|ayah_number|arabic_text|translation|layer[1-5])\}")
+
+
+class ConceptError(ValueError):
+    pass
+
+
+def load_prompt(path: Path = PROMPTS_FILE) -> str:
+    """The first code block under the Quick Overview heading of tafsir_prompts.md."""
+    text = path.read_text(encoding="utf-8")
+    section = text.find(PROMPT_SECTION)
+    if section < 0:
+        raise ValueError(f"{path}: no '{PROMPT_SECTION}' section")
+    match = re.compile(r"^```[^\n]*\n(.*?)^```", re.M | re.S).search(text, section)
+    if not match:
+        raise ValueError(f"{path}: no code block under '{PROMPT_SECTION}'")
+    return match.group(1).strip()
+
+
+def render_prompt(template: str, **fields) -> str:
+    """Fill the known {placeholders}; other braces (the JSON example) stay as they are."""
+    return PLACEHOLDER.sub(lambda m: str(fields[m.group(1)]), template)
+
+
+def parse_json_reply(text: str) -> dict:
+    """JSON object from a model reply, tolerating ``` fences and chatter."""
+    start, end = text.find("{"), text.rfind("}")
+    if start < 0 or end < start:
+        raise ConceptError("no JSON object in reply")
+    try:
+        return json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise ConceptError(f"invalid JSON: {e}") from e
+
+
+def validate_concepts(data: dict, surah_num: int, ayah_num: int, arabic_text: str) -> dict:
+    """Return a clean {"concepts": [...]} or raise ConceptError."""
+    concepts = data.get("concepts") if isinstance(data, dict) else None
+    if not isinstance(concepts, list) or not 1 <= len(concepts) <= len(POSITIONS):
+        raise ConceptError(f"expected 1-{len(POSITIONS)} concepts")
+
+    prefix = f"{surah_num}:{ayah_num}:"
+    clean, ids, positions = [], set(), set()
+    for c in concepts:
+        if not isinstance(c, dict):
+            raise ConceptError(f"concept is a {type(c).__name__}, not an object")
+        missing = [f for f in REQUIRED_FIELDS if not isinstance(c.get(f), str) or not c[f].strip()]
+        if missing:
+            raise ConceptError(f"concept missing {', '.join(missing)}")
+        c = {f: c[f].strip() for f in REQUIRED_FIELDS}
+        if not c["id"].startswith(prefix) or not SLUG_RE.match(c["id"][len(prefix):]):
+            raise ConceptError(f"bad id {c['id']!r} (want {prefix}<slug>)")
+        if c["id"] in ids:
+            raise ConceptError(f"duplicate id {c['id']}")
+        c["colorHex"] = c["colorHex"].upper()
+        if c["colorHex"] not in PALETTE:
+            raise ConceptError(f"colorHex {c['colorHex']} not in palette")
+        if c["position"] not in POSITIONS or c["position"] in positions:
+            raise ConceptError(f"bad or repeated position {c['position']!r}")
+        if c["arabicHighlight"] not in arabic_text:
+            raise ConceptError(f"arabicHighlight {c['arabicHighlight']!r} is not in the verse text")
+        ids.add(c["id"])
+        positions.add(c["position"])
+        clean.append(c)
+    return {"concepts": clean}
+
+
+def existing_chunk_verses(out_dir: Path, surah_num: int) -> set:
+    """Verse keys already written to chunk files for this surah."""
+    done = set()
+    for f in out_dir.glob(f"quickoverview_{surah_num}_*.json"):
+        with open(f, encoding="utf-8") as fh:
+            done.update(k for k in json.load(fh) if k.isdigit())
+    return done
+
+
+class QuickOverviewGenerator(TafsirGenerator):
+    def __init__(self, api_key: str, max_price: float = None, workers: int = 8):
+        super().__init__(api_key, use_openrouter=True, max_price=max_price)
+        self.workers = workers
+        self._lock = threading.Lock()
+        self.stats = {"generated": 0, "failed": 0, "skipped": 0}
+        self.prompt = load_prompt()
+
+    def build_prompt(self, surah_num: int, ayah_num: int, layers: Dict[str, str]) -> str:
+        verse = self.quran_data["verses"][str(surah_num)][str(ayah_num)]
+        context = {f"layer{n}": (layers.get(f"layer{n}") or "(not available)")[:LAYER_CONTEXT_CHARS]
+                   for n in range(1, 6)}
+        return render_prompt(
+            self.prompt,
+            surah_name=self.surahs_by_number[surah_num]["englishName"],
+            surah_number=surah_num,
+            ayah_number=ayah_num,
+            arabic_text=verse["arabicText"],
+            translation=verse["translation"],
+            **context,
+        )
+
+    def generate_verse(self, surah_num: int, ayah_num: int, layers: Dict[str, str]) -> Optional[dict]:
+        """One verse's validated quickOverview, or None after one corrective retry."""
+        arabic_text = self.quran_data["verses"][str(surah_num)][str(ayah_num)]["arabicText"]
+        messages = [
+            {"role": "system", "content": "You are an expert Shia Islamic scholar with deep knowledge of Quranic commentary, classical tafsir, and the teachings of the Ahlul Bayt. You answer with JSON only."},
+            {"role": "user", "content": self.build_prompt(surah_num, ayah_num, layers)},
+        ]
+        max_tokens, attempt = MAX_TOKENS, 0
+        while attempt < 2:
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=0.,
+                    extra_body={"provider": {"max_price": {"request": self.max_price}}},
+                )
+                choice = response.choices[0]
+                reply = choice.message.content or ""
+                if choice.finish_reason == "length":
+                    if max_tokens == MAX_TOKENS:
+                        # R1's reasoning tokens count against max_tokens; give it room once
+                        print(f"  ⚠️  {surah_num}:{ayah_num} truncated at max_tokens={max_tokens}, retrying")
+                        max_tokens *= 2
+                        continue
+                    raise ConceptError(f"reply truncated at max_tokens={max_tokens}; keep it shorter")
+                return validate_concepts(parse_json_reply(reply), surah_num, ayah_num, arabic_text)
+            except ConceptError as e:
+                attempt += 1
+                print(f"  ⚠️  {surah_num}:{ayah_num} attempt {attempt}: {e}")
+                messages += [{"role": "assistant", "content": reply},
+                             {"role": "user", "content": f"That output was rejected: {e}. Return corrected JSON only."}]
+            except Exception as e:
+                print(f"  ❌ {surah_num}:{ayah_num}: {e}")
+                return None
+        return None
+
+    def pending_verses(self, surah_num: int, out_dir: Path, force: bool) -> List[tuple]:
+        """(ayah, layers) for verses that need a quickOverview."""
+        tafsir_path = TAFSIR_DIR / f"tafsir_{surah_num}.json"
+        if not tafsir_path.exists():
+            print(f"  Surah {surah_num}: no tafsir file, skipping")
+            return []
+        with open(tafsir_path, encoding="utf-8") as f:
+            tafsir = json.load(f)
+        done = set() if force else existing_chunk_verses(out_dir, surah_num)
+        pending = []
+        for key in sorted((k for k in tafsir if k.isdigit()), key=int):
+            entry = tafsir[key]
+            if not force and (entry.get("quickOverview") or key in done):
+                self.stats["skipped"] += 1
+                continue
+            if not any(entry.get(f"layer{n}") for n in range(1, 6)):
+                print(f"  {surah_num}:{key} has no layer text, skipping")
+                continue
+            pending.append((int(key), entry))
+        return pending
+
+    def write_chunk(self, out_dir: Path, surah_num: int, results: Dict[int, dict]):
+        if not results:
+            return
+        verses = sorted(results)
+        path = out_dir / f"quickoverview_{surah_num}_v{verses[0]}-{verses[-1]}.json"
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({str(v): {"quickOverview": results[v]} for v in verses},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        print(f"  ✓ {path.name} ({len(verses)} verses)")
+
+    def run(self, surahs: List[int], out_dir: Path, force: bool = False):
+        out_dir.mkdir(parents=True, exist_ok=True)
+        blocks = {}
+        for s in surahs:
+            pending = self.pending_verses(s, out_dir, force)
+            for i in range(0, len(pending), BLOCK_SIZE):
+                jobs = pending[i:i + BLOCK_SIZE]
+                blocks[(s, i)] = {"jobs": jobs, "todo": len(jobs), "results": {}}
+        total = sum(b["todo"] for b in blocks.values())
+        print(f"Generating quickOverview for {total} verses "
+              f"({self.stats['skipped']} already done) with {self.workers} workers")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self.generate_verse, s, ayah, layers): (s, i, ayah)
+                       for (s, i), b in blocks.items() for ayah, layers in b["jobs"]}
+            for future in as_completed(futures):
+                s, i, ayah = futures[future]
+                block = blocks[(s, i)]
+                result = future.result()
+                with self._lock:
+                    if result:
+                        block["results"][ayah] = result
+                        self.stats["generated"] += 1
+                    else:
+                        self.stats["failed"] += 1
+                    block["todo"] -= 1
+                    finished = block["todo"] == 0
+                    done = self.stats["generated"] + self.stats["failed"]
+                print(f"  {s}:{ayah} {'✓' if result else '✗'} ({done}/{total})")
+                if finished:
+                    self.write_chunk(out_dir, s, block["results"])
+
+        print(f"\nDone. generated={self.stats['generated']} failed={self.stats['failed']} "
+              f"skipped={self.stats['skipped']}")
+        if self.stats["failed"]:
+            print("Rerun to retry failed verses (finished ones are skipped).")
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Generate quickOverview chunks from existing tafsir layers")
+    parser.add_argument("--surah", type=int, action="append", help="surah number (repeatable)")
+    parser.add_argument("--all", action="store_true", help="every surah with a tafsir file")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests")
+    parser.add_argument("--force", action="store_true", help="regenerate verses that already have a quickOverview")
+    parser.add_argument("--out", default=str(DEFAULT_OUT))
+    parser.add_argument("--quran", default="quran_data.json")
+    parser.add_argument("--max-price", type=float, default=None)
+    args = parser.parse_args()
+
+    if args.all:
+        surahs = sorted(int(re.search(r"\d+", f.stem).group()) for f in TAFSIR_DIR.glob("tafsir_*.json"))
+    elif args.surah:
+        surahs = args.surah
+    else:
+        parser.error("give --surah N or --all")
+
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        print("Error: OPENROUTER_API_KEY not set")
+        return
+
+    generator = QuickOverviewGenerator(api_key, max_price=args.max_price, workers=args.workers)
+    if not generator.load_quran_data(args.quran):
+        return
+    generator.run(surahs, Path(args.out), force=args.force)
+
+
+if __name__ == "__main__":
+    main()
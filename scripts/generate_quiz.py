@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Generate (or check) the per-surah quiz_N.json files from tafsir layers.
+
+Usage:
+    python3 scripts/generate_quiz.py --surah 2 [--surah 3 ...] [--force]
+    python3 scripts/generate_quiz.py --all --workers 8 --budget 400
+    python3 scripts/generate_quiz.py --validate            # check existing quiz files only
+    python3 scripts/generate_quiz.py --repair              # fix answer/option shapes in place
+
+Each surah gets one request per tafsir layer (1-5), so questions are
+balanced across layers by construction. A request sees the English text
+of that layer for an evenly spaced sample of verses and must only ask
+about those verses. Every question is validated:
+
+    - type is multipleChoice (exactly 4 distinct options, answer A-D) or
+      trueFalse (options null, answer "true"/"false")
+    - layer matches the request and verseNumber exists in the surah
+    - question and explanation are non-empty
+
+Invalid questions are dropped and the layer is retried once with the
+errors. A surah is written only if every layer reaches its quota, with
+ids "<surah>_<n>" assigned in (layer, verse, question) order so reruns
+over unchanged input produce stable ids. Requests for all surahs share one
+thread pool and one --budget; surahs that would exceed it are not started.
+
+Quizzes are written to Thaqalayn/Data/quiz_N.json (existing files are
+skipped unless --force).
+
+--repair rewrites what can be fixed mechanically in existing files: a
+multipleChoice correctAnswer holding an option's text becomes its letter
+(the app compares the answer against "A"-"D"), and a trueFalse question
+with a True/False options list gets options null and a lowercase answer.
+Anything else (e.g. unbalanced layers) is reported for regeneration with
+--surah N --force.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from build_verse_index import SURAH_VERSE_COUNTS
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+TAFSIR_DIR = PROJECT_ROOT / "Thaqalayn" / "Thaqalayn" / "Data"
+QUIZ_DIR = PROJECT_ROOT / "Thaqalayn" / "Data"
+LAYERS = (1, 2, 3, 4, 5)
+LETTERS = ("A", "B", "C", "D")
+LAYER_CONTEXT_CHARS = 1200
+MAX_TOKENS = 3000
+# (max verses in surah, questions per quiz)
+QUESTION_TIERS = ((8, 5), (25, 8), (55, 10), (10 ** 6, 20))
+
+LAYER_NAMES = {
+    1: "Foundation (simple explanation, historical context)",
+    2: "Classical Shia commentary (Tabatabai, Tabrisi, Qummi)",
+    3: "Contemporary insights (modern scholars, scientific and social relevance)",
+    4: "Ahlul Bayt wisdom (hadith from the Prophet and Imams)",
+    5: "Comparative (Shia and Sunni perspectives)",
+}
+
+PROMPT = """You are writing quiz questions that test understanding of a tafsir (Quranic commentary).
+
+Surah: {surah_name} (Surah {surah_number})
+Tafsir layer {layer}: {layer_name}
+
+COMMENTARY (the only source you may use):
+{context}
+
+TASK:
+Write exactly {count} questions about the commentary above, each about ONE of the verses shown.
+About two thirds should be multipleChoice and the rest trueFalse. Vary the correct letter.
+
+Rules:
+- multipleChoice: "options" is a list of exactly 4 distinct answers, "correctAnswer" is "A", "B", "C" or "D"
+- trueFalse: "options" is null, "correctAnswer" is "true" or "false"
+- "verseNumber" is the verse the question is about (one of: {verse_list})
+- "explanation" is 1-2 sentences drawn from the commentary
+
+Return only valid JSON:
+{{"questions": [{{"type": "multipleChoice", "verseNumber": 0, "question": "...", "options": ["...", "...", "...", "..."], "correctAnswer": "B", "explanation": "..."}}]}}"""
+
+
+class BudgetExhausted(RuntimeError):
+    pass
+
+
+def questions_for(verse_count: int) -> int:
+    for max_verses, count in QUESTION_TIERS:
+        if verse_count <= max_verses:
+            return count
+    return QUESTION_TIERS[-1][1]
+
+
+def layer_quotas(total: int) -> Dict[int, int]:
+    """Split ``total`` questions over the layers, differing by at most one."""
+    base, extra = divmod(total, len(LAYERS))
+    return {layer: base + (1 if i < extra else 0) for i, layer in enumerate(LAYERS)}
+
+
+def validate_question(q: dict, surah_num: int, layer: int, verse_count: int) -> Tuple[Optional[dict], Optional[str]]:
+    """(clean question, None) or (None, reason). Normalises answer case."""
+    if not isinstance(q, dict):
+        return None, "not an object"
+    qtype = q.get("type")
+    question = (q.get("question") or "").strip() if isinstance(q.get("question"), str) else ""
+    explanation = (q.get("explanation") or "").strip() if isinstance(q.get("explanation"), str) else ""
+    if not question or not explanation:
+        return None, "empty question or explanation"
+    try:
+        verse = int(q.get("verseNumber"))
+    except (TypeError, ValueError):
+        return None, f"verseNumber {q.get('verseNumber')!r} is not a number"
+    if not 1 <= verse <= verse_count:
+        return None, f"verse {surah_num}:{verse} does not exist"
+    if q.get("layer", layer) != layer:
+        return None, f"layer {q.get('layer')} != {layer}"
+
+    answer = str(q.get("correctAnswer", "")).strip()
+    options = q.get("options")
+    if qtype == "multipleChoice":
+        if not isinstance(options, list) or len(options) != len(LETTERS):
+            return None, f"multipleChoice needs {len(LETTERS)} options"
+        options = [str(o).strip() for o in options]
+        if not all(options) or len(set(options)) != len(options):
+            return None, "empty or duplicate options"
+        if answer.upper() not in LETTERS:
+            return None, f"correctAnswer {answer[:40]!r} is not a letter A-D"
+        answer = answer.upper()
+    elif qtype == "trueFalse":
+        if options:
+            return None, "trueFalse must have options null"
+        options = None
+        answer = answer.lower()
+        if answer not in ("true", "false"):
+            return None, f"correctAnswer {answer!r} is not true/false"
+    else:
+        return None, f"unknown type {qtype!r}"
+
+    return {"type": qtype, "layer": layer, "verseNumber": verse, "question": question,
+            "options": options, "correctAnswer": answer, "explanation": explanation}, None
+
+
+def repair_question(q: dict) -> Tuple[dict, List[str]]:
+    """Copy of ``q`` with answer/option shape fixes applied, and what changed."""
+    q, changes = dict(q), []
+    answer = str(q.get("correctAnswer", "")).strip()
+    options = q.get("options")
+    if q.get("type") == "multipleChoice" and isinstance(options, list) and answer.upper() not in LETTERS:
+        matches = [i for i, o in enumerate(options) if str(o).strip().casefold() == answer.casefold()]
+        if len(matches) == 1 and matches[0] < len(LETTERS):
+            q["correctAnswer"] = LETTERS[matches[0]]
+            changes.append(f"correctAnswer {answer[:40]!r} -> {q['correctAnswer']!r}")
+    elif q.get("type") == "trueFalse" and options:
+        if sorted(str(o).strip().lower() for o in options) == ["false", "true"] and answer.lower() in ("true", "false"):
+            q["options"], q["correctAnswer"] = None, answer.lower()
+            changes.append("trueFalse options -> null")
+    return q, changes
+
+
+def repair_quiz_file(path: Path) -> List[str]:
+    """Apply repair_question to every question in ``path``; rewrite it if anything changed."""
+    with open(path, encoding="utf-8") as f:
+        quiz = json.load(f)
+    changes = []
+    for i, q in enumerate(quiz.get("questions", [])):
+        quiz["questions"][i], fixed = repair_question(q)
+        changes.extend(f"{path.name} {q.get('id')}: {c}" for c in fixed)
+    if changes:
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(quiz, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        os.replace(tmp, path)
+    return changes
+
+
+def assemble_quiz(surah_num: int, by_layer: Dict[int, List[dict]]) -> dict:
+    """Stable ordering and ids: (layer, verse, question) -> "<surah>_<n>"."""
+    questions = sorted((q for qs in by_layer.values() for q in qs),
+                       key=lambda q: (q["layer"], q["verseNumber"], q["question"]))
+    return {
+        "surahNumber": surah_num,
+        "questions": [{"id": f"{surah_num}_{i}", **q} for i, q in enumerate(questions, start=1)],
+    }
+
+
+def validate_quiz_file(path: Path) -> List[str]:
+    """Problems in an existing quiz file (schema, letters, verses, balance, ids)."""
+    with open(path, encoding="utf-8") as f:
+        quiz = json.load(f)
+    surah_num = quiz.get("surahNumber")
+    if not isinstance(surah_num, int) or not 1 <= surah_num <= 114:
+        return [f"{path.name}: bad surahNumber {surah_num!r}"]
+    verse_count = SURAH_VERSE_COUNTS[surah_num - 1]
+    problems, per_layer = [], {layer: 0 for layer in LAYERS}
+    for i, q in enumerate(quiz.get("questions", []), start=1):
+        if q.get("id") != f"{surah_num}_{i}":
+            problems.append(f"{path.name}: question {i} has id {q.get('id')!r}")
+        layer = q.get("layer")
+        if layer not in per_layer:
+            problems.append(f"{path.name} {q.get('id')}: bad layer {layer!r}")
+            continue
+        clean, reason = validate_question(q, surah_num, layer, verse_count)
+        if reason:
+            problems.append(f"{path.name} {q.get('id')}: {reason}")
+        elif clean["correctAnswer"] != q.get("correctAnswer"):
+            problems.append(f"{path.name} {q.get('id')}: correctAnswer {q.get('correctAnswer')!r} "
+                            f"should be {clean['correctAnswer']!r}")
+        per_layer[layer] += 1
+    if max(per_layer.values()) - min(per_layer.values()) > 1:
+        problems.append(f"{path.name}: unbalanced layers {per_layer} "
+                        f"(regenerate with --surah {surah_num} --force)")
+    return problems
+
+
+class QuizGenerator:
+    def __init__(self, api_key: str, max_price: float = None, workers: int = 8, budget: int = None):
+        # Imported here so --validate/--repair run without the API client installed
+        from generate_tafsir import TafsirGenerator
+
+        self.tafsir = TafsirGenerator(api_key, use_openrouter=True, max_price=max_price)
+        self.workers = workers
+        self.budget = budget
+        self.requests_made = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self, n: int) -> bool:
+        """Claim ``n`` requests from the budget; False if it would be exceeded."""
+        with self._lock:
+            if self.budget is not None and self.requests_made + n > self.budget:
+                return False
+            self.requests_made += n
+            return True
+
+    def _call(self, prompt: str) -> str:
+        """One completion; a reply cut off at max_tokens is retried once with twice the room."""
+        max_tokens = MAX_TOKENS
+        for retry in range(2):
+            if retry and not self._reserve(1):
+                raise BudgetExhausted
+            response = self.tafsir.client.chat.completions.create(
+                model=self.tafsir.model,
+                messages=[
+                    {"role": "system", "content": "You are an expert Shia Islamic scholar and educator writing accurate quiz questions. You answer with JSON only."},
+                    {"role": "user", "content": prompt},
+                ],
+                max_tokens=max_tokens,
+                temperature=0.,
+                extra_body={"provider": {"max_price": {"request": self.tafsir.max_price}}},
+            )
+            choice = response.choices[0]
+            if choice.finish_reason != "length":
+                break
+            print(f"  ⚠️  reply truncated at {max_tokens} tokens, retrying with {max_tokens * 2}")
+            max_tokens *= 2
+        return choice.message.content or ""
+
+    def sample_verses(self, tafsir: dict, layer: int, count: int) -> List[int]:
+        """Evenly spaced verses that have text for ``layer`` (deterministic)."""
+        verses = sorted(int(k) for k in tafsir if k.isdigit() and tafsir[k].get(f"layer{layer}"))
+        want = min(len(verses), max(count * 2, count + 2))
+        if want == len(verses):
+            return verses
+        step = len(verses) / want
+        return [verses[int(i * step)] for i in range(want)]
+
+    def generate_layer(self, surah_num: int, tafsir: dict, layer: int, count: int) -> List[dict]:
+        verse_count = SURAH_VERSE_COUNTS[surah_num - 1]
+        verses = self.sample_verses(tafsir, layer, count)
+        if not verses:
+            raise ValueError(f"surah {surah_num} has no layer{layer} text")
+        context = "\n\n".join(f"Verse {v}: {tafsir[str(v)][f'layer{layer}'][:LAYER_CONTEXT_CHARS]}"
+                              for v in verses)
+        prompt = PROMPT.format(
+            surah_name=self.tafsir.surahs_by_number[surah_num]["englishName"] if self.tafsir.surahs_by_number else surah_num,
+            surah_number=surah_num, layer=layer, layer_name=LAYER_NAMES[layer],
+            context=context, count=count, verse_list=", ".join(map(str, verses)),
+        )
+
+        kept: List[dict] = []
+        for attempt in range(2):
+            if attempt and not self._reserve(1):
+                raise BudgetExhausted
+            reply = self._call(prompt)
+            start, end = reply.find("{"), reply.rfind("}")
+            try:
+                raw = json.loads(reply[start:end + 1])["questions"] if start >= 0 else []
+            except (json.JSONDecodeError, KeyError, TypeError):
+                raw = []
+            errors = []
+            seen = {q["question"] for q in kept}
+            for q in raw if isinstance(raw, list) else []:
+                clean, reason = validate_question(q, surah_num, layer, verse_count)
+                if reason:
+                    errors.append(reason)
+                elif clean["verseNumber"] not in verses:
+                    errors.append(f"verse {clean['verseNumber']} was not in the provided commentary")
+                elif clean["question"] not in seen:
+                    seen.add(clean["question"])
+                    kept.append(clean)
+            if len(kept) >= count:
+                return kept[:count]
+            print(f"  ⚠️  {surah_num} layer {layer}: {len(kept)}/{count} valid "
+                  f"({'; '.join(errors[:3]) or 'unparseable reply'})")
+            prompt += (f"\n\nYour previous answer was rejected ({'; '.join(errors[:5]) or 'invalid JSON'}). "
+                       f"Return {count} valid questions.")
+        raise ValueError(f"surah {surah_num} layer {layer}: only {len(kept)}/{count} valid questions")
+
+    def generate_surah(self, surah_num: int) -> Optional[dict]:
+        with open(TAFSIR_DIR / f"tafsir_{surah_num}.json", encoding="utf-8") as f:
+            tafsir = json.load(f)
+        quotas = layer_quotas(questions_for(SURAH_VERSE_COUNTS[surah_num - 1]))
+        if not self._reserve(len(LAYERS)):
+            raise BudgetExhausted
+        with ThreadPoolExecutor(max_workers=len(LAYERS)) as layer_pool:
+            futures = {layer: layer_pool.submit(self.generate_layer, surah_num, tafsir, layer, n)
+                       for layer, n in quotas.items()}
+            by_layer = {layer: fut.result() for layer, fut in futures.items()}
+        return assemble_quiz(surah_num, by_layer)
+
+    def run(self, surahs: List[int], out_dir: Path, force: bool = False) -> int:
+        todo = []
+        for s in surahs:
+            if not (TAFSIR_DIR / f"tafsir_{s}.json").exists():
+                print(f"  Surah {s}: no tafsir file, skipping")
+            elif (out_dir / f"quiz_{s}.json").exists() and not force:
+                print(f"  Surah {s}: quiz exists, skipping (use --force)")
+            else:
+                todo.append(s)
+        print(f"Generating quizzes for {len(todo)} surahs with {self.workers} workers"
+              + (f", budget {self.budget} requests" if self.budget is not None else ""))
+
+        failed = []
+
+        def job(s):
+            try:
+                quiz = self.generate_surah(s)
+            except BudgetExhausted:
+                print(f"  Surah {s}: request budget exhausted, not written")
+                failed.append(s)
+                return
+            except Exception as e:
+                print(f"  ❌ Surah {s}: {e}")
+                failed.append(s)
+                return
+            path = out_dir / f"quiz_{s}.json"
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(quiz, f, ensure_ascii=False, indent=2)
+                f.write("\n")
+            os.replace(tmp, path)
+            print(f"  ✓ {path.name} ({len(quiz['questions'])} questions)")
+
+        # Each surah fans out to its 5 layers, so bound surah-level parallelism
+        with ThreadPoolExecutor(max_workers=max(1, self.workers // len(LAYERS))) as pool:
+            list(pool.map(job, todo))
+        print(f"\nDone. {len(todo) - len(failed)} written, {len(failed)} failed, "
+              f"{self.requests_made} requests used")
+        if failed:
+            print(f"Failed: {', '.join(map(str, sorted(failed)))}")
+        return len(failed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate or validate quiz_N.json files")
+    parser.add_argument("--surah", type=int, action="append")
+    parser.add_argument("--all", action="store_true")
+    parser.add_argument("--validate", action="store_true", help="only check existing quiz files")
+    parser.add_argument("--repair", action="store_true",
+                        help="fix answer/option shapes in existing quiz files, then validate them")
+    parser.add_argument("--force", action="store_true", help="overwrite existing quiz files")
+    parser.add_argument("--workers", type=int, default=10, help="concurrent requests")
+    parser.add_argument("--budget", type=int, default=None, help="maximum API requests for the run")
+    parser.add_argument("--out", default=str(QUIZ_DIR))
+    parser.add_argument("--quran", default="quran_data.json")
+    parser.add_argument("--max-price", type=float, default=None)
+    args = parser.parse_args()
+
+    out_dir = Path(args.out)
+    if args.validate or args.repair:
+        paths = ([out_dir / f"quiz_{s}.json" for s in args.surah] if args.surah
+                 else sorted(out_dir.glob("quiz_*.json"), key=lambda p: int(re.search(r"\d+", p.stem).group())))
+        if args.repair:
+            changes = [c for path in paths for c in repair_quiz_file(path)]
+            for c in changes:
+                print(f"🔧 {c}")
+            print(f"{len(changes)} repair(s) applied")
+        problems = [p for path in paths for p in validate_quiz_file(path)]
+        for p in problems:
+            print(f"❌ {p}")
+        print(f"{len(paths)} quiz files checked, {len(problems)} problem(s)")
+        sys.exit(1 if problems else 0)
+
+    if args.all:
+        surahs = list(range(1, 115))
+    elif args.surah:
+        surahs = args.surah
+    else:
+        parser.error("give --surah N, --all, --validate or --repair")
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        print("Error: OPENROUTER_API_KEY not set")
+        sys.exit(1)
+
+    generator = QuizGenerator(api_key, max_price=args.max_price, workers=args.workers, budget=args.budget)
+    generator.tafsir.load_quran_data(args.quran)  # optional: only used for surah names
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sys.exit(1 if generator.run(surahs, out_dir, force=args.force) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,192 @@
 """
 Generate comprehensive Shia tafsir for all Quran verses using DeepSeek
 Creates 4 layers of commentary for each verse
+
+Every completion runs under a per-layer deadline. With hedging enabled for a
+layer, a duplicate request is issued once the primary has been outstanding
+longer than that layer's recent p95 latency, and the first valid response
+wins. Duplicates count against the optional cost budget; print_request_stats()
+reports how often hedges won.
+
+Prompts are compiled once into a PromptRegistry that hashes each layer's
+template together with the system prompt. Every generated item records its
+prompt hash in a sidecar manifest (tafsir_provenance/tafsir_N.json), and
+
+    python3 scripts/generate_tafsir.py regenerate-stale [--surah N] [--layer L]
+
+re-runs only the items whose recorded hash differs from the current one.
+Items with no record at all (everything generated before manifests
+existed) are skipped by default. Adopt an existing corpus once with
+
+    python3 scripts/generate_tafsir.py stamp-provenance [--surah N] [--tradition T]
+
+which records the current hashes for unrecorded items, so later prompt
+edits mark them stale; or pass --include-unknown to regenerate-stale to
+re-run them all instead.
+
+tradition="sunni" selects the four Sunni layers and system prompt instead of
+the Shia set. To build a comparative corpus in one pass,
+
+    python3 scripts/generate_tafsir.py traditions --surah 1 [--tradition shia --tradition sunni]
+
+schedules every tradition's layers for each verse on one worker pool, sharing
+the verse lookup, rate limiter, cost budget and latency stats, and writes
+new_tafsir/tafsir_N.json and new_tafsir/tafsir_N_sunni.json. Those files are
+also the checkpoint: layers already present are skipped on the next run.
+
+With stream=True completions are read incrementally and closed at the first
+sentence boundary past word_target words, instead of paying for tokens that
+clean_incomplete_sentences would throw away. A finish_reason of "length"
+(in either mode) is retried once with a larger max_tokens. A stream that
+runs to the end reports its cost in a final usage chunk; one closed early
+is charged an estimate from its prompt and streamed characters at
+TOKEN_PRICES, so the reserved max_price never stays on the books.
 """
 
+import argparse
+import hashlib
 import json
 import os
+import sys
+import threading
 import time
+from collections import deque
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 import openai
 
+DEFAULT_HEDGE_POLICY = {
+    "hedge": False,         # issue one duplicate request after the hedge delay
+    "quantile": 0.95,       # hedge delay = this quantile of the (tradition, layer)'s recent latencies
+    "min_samples": 20,      # below this many samples use initial_delay
+    "initial_delay": 90.0,  # seconds
+    "deadline": 300.0,      # seconds before the item is given up on
+}
+LATENCY_WINDOW = 200
+PROVENANCE_DIR = Path(__file__).resolve().parent.parent / "tafsir_provenance"
+APP_DATA_DIR = Path(__file__).resolve().parent.parent / "Thaqalayn" / "Thaqalayn" / "Data"
+OUT_DIR = Path(__file__).resolve().parent.parent / "new_tafsir"
+SYSTEM_PROMPT = "You are an expert Shia Islamic scholar with deep knowledge of Quranic commentary, classical tafsir, and the teachings of the Ahlul Bayt."
+SUNNI_SYSTEM_PROMPT = "You are an expert Sunni Islamic scholar with deep knowledge of Quranic commentary, classical tafsir, and the Prophetic Sunnah."
+# tradition -> (system prompt, prompt set method, output file suffix)
+TRADITIONS = {
+    "shia": (SYSTEM_PROMPT, "get_layer_prompts", ""),
+    "sunni": (SUNNI_SYSTEM_PROMPT, "get_layer_prompts_sunni", "_sunni"),
+}
+# tradition -> where its published tafsir_N*.json files live; only the Shia
+# corpus ships in the app, the others stay in the generation output
+DATA_DIRS = {"shia": APP_DATA_DIR, "sunni": OUT_DIR}
+MAX_TOKENS = 1500
+WORD_TARGET = 250           # upper end of the prompts' 150-250 word target
+SENTENCE_END = ('.', '!', '?', '"', ')')
+# USD per token for cost estimates of streams closed before their usage chunk
+TOKEN_PRICES = {"prompt": 0.40e-6, "completion": 2.00e-6}
+CHARS_PER_TOKEN = 4
+# Appended to a flagged item's prompt with the paragraphs it duplicated (see flag_items)
+AVOID_HINT = ("\n\nThis commentary is being rewritten because it repeated the paragraph(s) below, "
+              "which already appear elsewhere in the tafsir. Do not repeat or closely paraphrase them; "
+              "say what is specific to this verse and layer instead.\n\n{paragraphs}")
+
+
+class BudgetExceeded(RuntimeError):
+    pass
+
+
+class TruncatedCompletion(RuntimeError):
+    pass
+
+class RateLimiter:
+    """Space calls at least 60/rpm seconds apart across all threads."""
+
+    def __init__(self, rpm: float):
+        self.interval = 60.0 / rpm if rpm else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class PromptRegistry:
+    """Layer templates compiled once, each with a content hash.
+
+    The hash covers the system prompt and the template text, so editing
+    either marks every item generated from it as stale.
+    """
+
+    def __init__(self, system_prompt: str, templates: Dict[int, str]):
+        self.system_prompt = system_prompt
+        self.templates = dict(templates)
+        self.hashes = {
+            layer: hashlib.sha256(f"{system_prompt}\0{template}".encode("utf-8")).hexdigest()[:16]
+            for layer, template in self.templates.items()
+        }
+
+    def render(self, layer: int, **fields) -> str:
+        return self.templates[layer].format(**fields)
+
+    def messages(self, layer: int, **fields) -> List[Dict[str, str]]:
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": self.render(layer, **fields)},
+        ]
+
+
+def write_provenance(path: Path, surah_num: int, tradition: str, items: Dict[str, Dict[str, Any]]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "surah": surah_num, "tradition": tradition,
+                   "items": dict(sorted(items.items(), key=lambda kv: int(kv[0])))},
+                  f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def flag_items(surah_num: int, flags: Dict[tuple, str], tradition: str = "shia",
+               avoid: Dict[tuple, List[str]] = None) -> int:
+    """Mark (ayah, layer) items for regenerate-stale with a reason.
+
+    ``avoid`` optionally gives, per item, paragraphs the regenerated text must
+    not repeat; regenerate_stale passes them to the prompt (AVOID_HINT). The
+    flag lives on the item's provenance record, so the next generation of
+    that item (which writes a fresh record) clears it.
+    """
+    path = PROVENANCE_DIR / f"tafsir_{surah_num}{TRADITIONS[tradition][2]}.json"
+    items = {}
+    if path.exists():
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f).get("items", {})
+    for (ayah_num, layer), reason in flags.items():
+        record = items.setdefault(str(ayah_num), {}).setdefault(f"layer{layer}", {})
+        record["flag"] = reason
+        if avoid and avoid.get((ayah_num, layer)):
+            record["avoid"] = avoid[(ayah_num, layer)]
+    if flags:
+        write_provenance(path, surah_num, tradition, items)
+    return len(flags)
+
+
 class TafsirGenerator:
-    def __init__(self, api_key: str, use_openrouter: bool = True, max_price: float = None):
-        """Initialize with API key - can use DeepSeek directly or through OpenRouter"""
+    def __init__(self, api_key: str, use_openrouter: bool = True, max_price: float = None,
+                 hedge_policies: Dict[int, Dict[str, Any]] = None, cost_budget: float = None,
+                 stream: bool = False, word_target: int = WORD_TARGET,
+                 tradition: str = "shia", rpm: float = None):
+        """Initialize with API key - can use DeepSeek directly or through OpenRouter
+
+        hedge_policies: per-layer overrides of DEFAULT_HEDGE_POLICY, e.g.
+            {5: {"hedge": True, "deadline": 240}}
+        cost_budget: total USD for all requests including hedges (None = unlimited)
+        stream: stream completions and stop early past word_target words
+        tradition: default prompt set, a TRADITIONS key
+        rpm: requests per minute across all threads, hedges included (None = unlimited)
+        """
         if use_openrouter:
             self.client = openai.OpenAI(
                 api_key=api_key,
@@ -25,14 +199,41 @@ class TafsirGenerator:
             raise NotImplementedError
         
         self.quran_data = None
+        self.surahs_by_number = {}
         self.generated_count = 0
+        self.queued_count = 0     # items the current run has queued; progress denominator
         self.total_verses = 0
+
+        self.hedge_policies = hedge_policies or {}
+        self.cost_budget = cost_budget
+        self.stream = stream
+        self.word_target = word_target
+        self.latencies: Dict[tuple, deque] = {}   # (tradition, layer) -> seconds
+        self.request_stats = {"requests": 0, "hedges": 0, "hedge_wins": 0,
+                              "deadline_misses": 0, "errors": 0, "truncated": 0,
+                              "early_stops": 0, "cost": 0.0, "estimated_costs": 0}
+        self._stats_lock = threading.Lock()
+        # Shared by every caller thread; workers are only started on submit
+        self._request_pool = ThreadPoolExecutor(max_workers=16)
+
+        if tradition not in TRADITIONS:
+            raise ValueError(f"unknown tradition {tradition!r}; expected one of {sorted(TRADITIONS)}")
+        self.tradition = tradition
+        self.registries = {
+            name: PromptRegistry(system_prompt, getattr(self, method)())
+            for name, (system_prompt, method, _) in TRADITIONS.items()
+        }
+        self.prompts = self.registries[tradition]
+        self.provenance: Dict[tuple, Dict[str, str]] = {}
+        self.limiter = RateLimiter(rpm)
+        self._verse_fields: Dict[tuple, Dict[str, Any]] = {}
         
     def load_quran_data(self, filename: str = "quran_data.json"):
         """Load Quran data from JSON file"""
         try:
             with open(filename, 'r', encoding='utf-8') as f:
                 self.quran_data = json.load(f)
+            self.surahs_by_number = {s["number"]: s for s in self.quran_data["surahs"]}
             
             # Calculate total verses
             self.total_verses = sum(len(surah_verses) for surah_verses in self.quran_data["verses"].values())
@@ -321,59 +522,252 @@ FORMATTING REQUIREMENTS:
 COMMENTARY:"""
         }
 
-    def generate_layer_commentary(self, surah_num: int, ayah_num: int, layer: int) -> Optional[str]:
-        """Generate commentary for a specific verse and layer"""
+    def layer_policy(self, layer: int) -> Dict[str, Any]:
+        return {**DEFAULT_HEDGE_POLICY, **self.hedge_policies.get(layer, {})}
+
+    def hedge_delay(self, key: tuple, policy: Dict[str, Any]) -> float:
+        """Seconds to wait on the primary before hedging: the recent p95 of its
+        (tradition, layer); the traditions' prompts differ in length and latency."""
+        samples = self.latency_samples(key)
+        if len(samples) < policy["min_samples"]:
+            return policy["initial_delay"]
+        return samples[min(len(samples) - 1, int(policy["quantile"] * len(samples)))]
+
+    def latency_samples(self, key: tuple) -> List[float]:
+        """Sorted copy of a (tradition, layer)'s recent latencies, taken under the stats lock."""
+        with self._stats_lock:
+            samples = list(self.latencies.get(key, ()))
+        return sorted(samples)
+
+    def _reserve_cost(self) -> bool:
+        """Charge one request's worst case (max_price) against the budget."""
+        with self._stats_lock:
+            if self.cost_budget is not None and self.request_stats["cost"] + self.max_price > self.cost_budget:
+                return False
+            self.request_stats["cost"] += self.max_price
+            self.request_stats["requests"] += 1
+            return True
+
+    def estimate_cost(self, messages: List[Dict[str, str]], output_chars: int) -> float:
+        """Approximate cost of a request from character counts, capped at max_price."""
+        prompt_chars = sum(len(m["content"]) for m in messages)
+        cost = (prompt_chars * TOKEN_PRICES["prompt"]
+                + output_chars * TOKEN_PRICES["completion"]) / CHARS_PER_TOKEN
+        return min(cost, self.max_price)
+
+    def _request(self, messages: List[Dict[str, str]], key: tuple, timeout: float,
+                 max_tokens: int = MAX_TOKENS) -> str:
+        """One completion's text; settles the reserved cost and records latency.
+
+        Raises TruncatedCompletion when the model hit max_tokens.
+        """
+        self.limiter.wait()
+        started = time.monotonic()
+        # usage.include makes OpenRouter report the actual cost (usage.cost) we settle against
+        extra_body = {"provider": {"max_price": {"request": self.max_price}}, "usage": {"include": True}}
+        if self.stream:
+            extra_body["stream_options"] = {"include_usage": True}
+        estimated = False
+        try:
+            response = self.client.with_options(timeout=timeout).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=0.,
+                stream=self.stream,
+                extra_body=extra_body,
+            )
+            if self.stream:
+                text, finish_reason, usage, output_chars = self._consume_stream(response)
+                actual = getattr(usage, "cost", None)
+                if not isinstance(actual, (int, float)):
+                    # Closed early (or no usage chunk): estimate rather than keep max_price
+                    actual, estimated = self.estimate_cost(messages, output_chars), True
+            else:
+                choice = response.choices[0]
+                text, finish_reason = choice.message.content or "", choice.finish_reason
+                actual = getattr(getattr(response, "usage", None), "cost", None)
+        except Exception:
+            with self._stats_lock:
+                self.request_stats["errors"] += 1
+            raise
+        with self._stats_lock:
+            if isinstance(actual, (int, float)):
+                self.request_stats["cost"] += actual - self.max_price
+            if estimated:
+                self.request_stats["estimated_costs"] += 1
+            self.latencies.setdefault(key, deque(maxlen=LATENCY_WINDOW)).append(time.monotonic() - started)
+            if finish_reason == "length":
+                self.request_stats["truncated"] += 1
+        if finish_reason == "length":
+            raise TruncatedCompletion(f"hit max_tokens={max_tokens}")
+        return text
+
+    def _consume_stream(self, stream) -> tuple:
+        """Read a streamed completion, closing it at the first sentence boundary
+        once word_target words are reached.
+
+        Returns (text, finish_reason, usage, output_chars): usage is the final
+        usage chunk's, None if the stream was closed first; output_chars counts
+        streamed reasoning as well as content.
+        """
+        parts, words, finish_reason, usage, reasoning_chars = [], 0, None, None, 0
+        for chunk in stream:
+            usage = getattr(chunk, "usage", None) or usage
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            delta = choice.delta.content if choice.delta else None
+            reasoning = getattr(choice.delta, "reasoning", None) if choice.delta else None
+            if isinstance(reasoning, str):
+                reasoning_chars += len(reasoning)
+            if delta:
+                # A chunk can split a word; recount from the joined text when it
+                # may have crossed a sentence boundary, and on every chunk once
+                # past the target (the terminator may have come in an earlier one).
+                parts.append(delta)
+                if words >= self.word_target or any(c in delta for c in SENTENCE_END):
+                    text = "".join(parts)
+                    words = len(text.split())
+                    if words >= self.word_target and text.rstrip().endswith(SENTENCE_END):
+                        stream.close()
+                        with self._stats_lock:
+                            self.request_stats["early_stops"] += 1
+                        return text, "early_stop", None, len(text) + reasoning_chars
+            if choice.finish_reason:
+                finish_reason = choice.finish_reason
+        text = "".join(parts)
+        return text, finish_reason, usage, len(text) + reasoning_chars
+
+    def _complete(self, messages: List[Dict[str, str]], layer: int, max_tokens: int = MAX_TOKENS,
+                  tradition: str = None) -> str:
+        """Completion text under the layer's deadline, hedged if its policy says so."""
+        policy = self.layer_policy(layer)
+        key = (tradition or self.tradition, layer)
+        if not self._reserve_cost():
+            raise BudgetExceeded(f"cost budget ${self.cost_budget:.2f} exhausted")
+
+        start = time.monotonic()
+        deadline = start + policy["deadline"]
+        primary = self._request_pool.submit(self._request, messages, key, policy["deadline"], max_tokens)
+        pending, hedge, last_error = {primary}, None, None
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            timeout = deadline - now
+            if policy["hedge"] and hedge is None:
+                timeout = min(timeout, max(0.0, start + self.hedge_delay(key, policy) - now))
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    text = future.result().strip()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if text:
+                    if future is hedge:
+                        with self._stats_lock:
+                            self.request_stats["hedge_wins"] += 1
+                    return text
+                last_error = ValueError("empty completion")
+            if (not done and policy["hedge"] and hedge is None
+                    and time.monotonic() < deadline and self._reserve_cost()):
+                with self._stats_lock:
+                    self.request_stats["hedges"] += 1
+                hedge = self._request_pool.submit(self._request, messages, key,
+                                                  max(1.0, deadline - time.monotonic()), max_tokens)
+                pending.add(hedge)
+
+        if pending:
+            with self._stats_lock:
+                self.request_stats["deadline_misses"] += 1
+            raise TimeoutError(f"no valid completion within {policy['deadline']:g}s")
+        raise last_error or RuntimeError("no completion")
+
+    def print_request_stats(self):
+        s = self.request_stats
+        win_rate = f"{100 * s['hedge_wins'] / s['hedges']:.0f}%" if s["hedges"] else "n/a"
+        print(f"Requests: {s['requests']} (hedges {s['hedges']}, hedge wins {s['hedge_wins']} = {win_rate}), "
+              f"deadline misses {s['deadline_misses']}, errors {s['errors']}, "
+              f"truncated {s['truncated']}, early stops {s['early_stops']}, cost ${s['cost']:.3f}"
+              + (f" ({s['estimated_costs']} estimated)" if s["estimated_costs"] else ""))
+        with self._stats_lock:
+            keys = sorted(self.latencies)
+        for tradition, layer in keys:
+            samples = self.latency_samples((tradition, layer))
+            p50 = samples[len(samples) // 2]
+            p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+            print(f"  {tradition} layer {layer}: n={len(samples)} p50={p50:.1f}s p95={p95:.1f}s")
+
+    def queue_items(self, count: int):
+        """Add ``count`` items to the run's progress denominator."""
+        with self._stats_lock:
+            self.queued_count += count
+
+    def verse_fields(self, surah_num: int, ayah_num: int) -> Dict[str, Any]:
+        """Prompt template fields for a verse, looked up once for all traditions."""
+        key = (surah_num, ayah_num)
+        fields = self._verse_fields.get(key)
+        if fields is None:
+            verse_data = self.quran_data["verses"][str(surah_num)][str(ayah_num)]
+            fields = {
+                "surah_name": self.surahs_by_number[surah_num]["englishName"],
+                "surah_number": surah_num,
+                "ayah_number": ayah_num,
+                "arabic_text": verse_data["arabicText"],
+                "translation": verse_data["translation"],
+            }
+            self._verse_fields[key] = fields
+        return fields
+
+    def generate_layer_commentary(self, surah_num: int, ayah_num: int, layer: int,
+                                  tradition: str = None, avoid: List[str] = None) -> Optional[str]:
+        """Generate commentary for a specific verse and layer
+
+        avoid: paragraphs the new text must not repeat (flagged duplicates)
+        """
         if not self.quran_data:
             return None
         
-        # Get verse data
-        verse_data = self.quran_data["verses"][str(surah_num)][str(ayah_num)]
-        surah_data = next(s for s in self.quran_data["surahs"] if s["number"] == surah_num)
-        
-        # Get prompt template
-        prompts = self.get_layer_prompts()
-        prompt = prompts[layer].format(
-            surah_name=surah_data["englishName"],
-            surah_number=surah_num,
-            ayah_number=ayah_num,
-            arabic_text=verse_data["arabicText"],
-            translation=verse_data["translation"]
-        )
+        tradition = tradition or self.tradition
+        prompts = self.registries[tradition]
+        messages = prompts.messages(layer, **self.verse_fields(surah_num, ayah_num))
+        if avoid:
+            hint = AVOID_HINT.format(paragraphs="\n\n".join(avoid))
+            messages[-1] = {**messages[-1], "content": messages[-1]["content"] + hint}
+        label = f"Layer {layer}" if tradition == "shia" else f"{tradition} Layer {layer}"
         
         try:
-            extra_body = {
-                "provider": {
-                    "max_price": {
-                         "request": self.max_price
-                    }
-                }
-            }
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are an expert Shia Islamic scholar with deep knowledge of Quranic commentary, classical tafsir, and the teachings of the Ahlul Bayt."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1500,
-                temperature=0.,
-                extra_body=extra_body 
-            )
-            
-            commentary = response.choices[0].message.content.strip()
+            try:
+                commentary = self._complete(messages, layer, tradition=tradition)
+            except TruncatedCompletion as e:
+                # R1's reasoning tokens count against max_tokens; give it room once
+                print(f"Truncated {surah_num}:{ayah_num} Layer {layer} ({e}), retrying")
+                commentary = self._complete(messages, layer, max_tokens=MAX_TOKENS * 2, tradition=tradition)
             
             # Clean up incomplete sentences
             commentary = self.clean_incomplete_sentences(commentary)
             
-            self.generated_count += 1
+            with self._stats_lock:
+                self.generated_count += 1
+                done, queued = self.generated_count, self.queued_count
+                self.provenance[(tradition, surah_num, ayah_num, layer)] = {
+                    "prompt": prompts.hashes[layer],
+                    "model": self.model,
+                    "generatedAt": datetime.now().isoformat(timespec="seconds"),
+                }
             
-            # Progress indicator
-            progress = (self.generated_count / (self.total_verses * 5)) * 100
-            print(f"Generated {surah_num}:{ayah_num} Layer {layer} ({progress:.1f}% complete)")
+            # Progress indicator (callers that queue nothing get none)
+            progress = f" ({done / queued * 100:.1f}% complete)" if queued >= done else ""
+            print(f"Generated {surah_num}:{ayah_num} {label}{progress}")
             
             return commentary
             
+        except BudgetExceeded:
+            raise
         except Exception as e:
-            print(f"Error generating commentary for {surah_num}:{ayah_num} Layer {layer}: {e}")
+            print(f"Error generating commentary for {surah_num}:{ayah_num} {label}: {e}")
             return None
         
         # Small delay to avoid rate limiting
@@ -428,19 +822,20 @@ COMMENTARY:"""
             ayah_num = int(ayah_num_str)
             surah_tafsir[ayah_num_str] = {}
             
-            # Generate all 5 layers for this verse
-            for layer in range(1, 6):
+            # Generate every layer of the current tradition for this verse
+            for layer in sorted(self.prompts.templates):
                 commentary = self.generate_layer_commentary(surah_num, ayah_num, layer)
                 if commentary:
                     surah_tafsir[ayah_num_str][f"layer{layer}"] = commentary
                 else:
                     print(f"Failed to generate layer {layer} for {surah_num}:{ayah_num}")
         
+        self.print_request_stats()
         return surah_tafsir
     
     def save_surah_tafsir(self, surah_num: int, tafsir_data: Dict[str, Dict[str, str]]):
         """Save tafsir for a surah to separate JSON file"""
-        filename = f"tafsir_{surah_num}.json"
+        filename = f"tafsir_{surah_num}{TRADITIONS[self.tradition][2]}.json"
         
         try:
             with open(filename, 'w', encoding='utf-8') as f:
@@ -450,14 +845,232 @@ COMMENTARY:"""
             file_size = os.path.getsize(filename) / 1024  # KB
             verse_count = len(tafsir_data)
             print(f"✓ Saved {filename} ({verse_count} verses, {file_size:.1f} KB)")
+            self.save_provenance(surah_num)
             
         except Exception as e:
             print(f"Error saving {filename}: {e}")
     
+    def provenance_path(self, surah_num: int, tradition: str = None) -> Path:
+        return PROVENANCE_DIR / f"tafsir_{surah_num}{TRADITIONS[tradition or self.tradition][2]}.json"
+
+    def load_provenance(self, surah_num: int, tradition: str = None) -> Dict[str, Dict[str, Dict[str, str]]]:
+        """{ayah: {"layerN": {"prompt", "model", "generatedAt"}}} for a surah."""
+        path = self.provenance_path(surah_num, tradition)
+        if not path.exists():
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("items", {})
+
+    def save_provenance(self, surah_num: int, tradition: str = None):
+        """Fold this run's records for ``surah_num`` into its sidecar manifest."""
+        tradition = tradition or self.tradition
+        with self._stats_lock:
+            records = {k: v for k, v in self.provenance.items() if k[:2] == (tradition, surah_num)}
+        if not records:
+            return
+        items = self.load_provenance(surah_num, tradition)
+        for (_, _, ayah_num, layer), record in records.items():
+            items.setdefault(str(ayah_num), {})[f"layer{layer}"] = record
+        write_provenance(self.provenance_path(surah_num, tradition), surah_num, tradition, items)
+
+    def stale_items(self, surah_num: int, tafsir_data: Dict[str, Dict[str, str]],
+                    layers: List[int] = None, include_unknown: bool = False) -> List[tuple]:
+        """(ayah, layer) whose recorded prompt hash differs from the current one,
+        or that flag_items() marked for regeneration.
+
+        Items with no provenance record are only included with include_unknown.
+        """
+        items = self.load_provenance(surah_num)
+        stale = []
+        for ayah_key in sorted((k for k in tafsir_data if k.isdigit()), key=int):
+            for layer in layers or sorted(self.prompts.hashes):
+                if f"layer{layer}" not in tafsir_data[ayah_key]:
+                    continue
+                record = items.get(ayah_key, {}).get(f"layer{layer}")
+                if record is None:
+                    if include_unknown:
+                        stale.append((int(ayah_key), layer))
+                elif record.get("flag") or record.get("prompt") != self.prompts.hashes[layer]:
+                    stale.append((int(ayah_key), layer))
+        return stale
+
+    def stamp_provenance(self, surah_numbers: List[int], data_dir: Path = None,
+                         layers: List[int] = None) -> int:
+        """Record the current prompt hashes for items in data_dir that have no
+        provenance record, treating them as generated from the current prompts.
+
+        Existing records, including flags, are left as they are. data_dir
+        defaults to the tradition's DATA_DIRS entry.
+        """
+        data_dir = data_dir or DATA_DIRS[self.tradition]
+        stamped_at = datetime.now().isoformat(timespec="seconds")
+        total = 0
+        for surah_num in surah_numbers:
+            path = Path(data_dir) / f"tafsir_{surah_num}{TRADITIONS[self.tradition][2]}.json"
+            if not path.exists():
+                continue
+            with open(path, encoding="utf-8") as f:
+                tafsir_data = json.load(f)
+            items = self.load_provenance(surah_num)
+            stamped = 0
+            for ayah_key in sorted((k for k in tafsir_data if k.isdigit()), key=int):
+                for layer in layers or sorted(self.prompts.hashes):
+                    key = f"layer{layer}"
+                    if key not in tafsir_data[ayah_key] or key in items.get(ayah_key, {}):
+                        continue
+                    items.setdefault(ayah_key, {})[key] = {
+                        "prompt": self.prompts.hashes[layer],
+                        "stampedAt": stamped_at,
+                    }
+                    stamped += 1
+            if stamped:
+                write_provenance(self.provenance_path(surah_num), surah_num, self.tradition, items)
+                print(f"✓ Surah {surah_num}: stamped {stamped} item(s)")
+            total += stamped
+        return total
+
+    def regenerate_stale(self, surah_numbers: List[int], data_dir: Path = None,
+                         layers: List[int] = None, include_unknown: bool = False,
+                         dry_run: bool = False) -> int:
+        """Re-run only stale items and patch them into data_dir/tafsir_N*.json
+        (default: the tradition's DATA_DIRS entry)."""
+        data_dir = data_dir or DATA_DIRS[self.tradition]
+        total = 0
+        for surah_num in surah_numbers:
+            path = Path(data_dir) / f"tafsir_{surah_num}{TRADITIONS[self.tradition][2]}.json"
+            if not path.exists():
+                continue
+            with open(path, encoding="utf-8") as f:
+                tafsir_data = json.load(f)
+            stale = self.stale_items(surah_num, tafsir_data, layers, include_unknown)
+            if not stale:
+                continue
+            records = self.load_provenance(surah_num)
+            total += len(stale)
+            print(f"Surah {surah_num}: {len(stale)} stale item(s)")
+            if dry_run:
+                for ayah_num, layer in stale:
+                    print(f"  {surah_num}:{ayah_num} layer {layer}")
+                continue
+            self.queue_items(len(stale))
+
+            updated = 0
+            try:
+                for ayah_num, layer in stale:
+                    record = records.get(str(ayah_num), {}).get(f"layer{layer}", {})
+                    commentary = self.generate_layer_commentary(surah_num, ayah_num, layer,
+                                                                avoid=record.get("avoid"))
+                    if commentary:
+                        tafsir_data[str(ayah_num)][f"layer{layer}"] = commentary
+                        updated += 1
+            finally:
+                # Keep what was regenerated even when the budget runs out mid-surah
+                if updated:
+                    tmp = path.with_name(path.name + ".tmp")
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        json.dump(tafsir_data, f, ensure_ascii=False, indent=2)
+                    os.replace(tmp, path)
+                    self.save_provenance(surah_num)
+                print(f"✓ Surah {surah_num}: regenerated {updated}/{len(stale)}")
+        return total
+
+    def generate_traditions(self, surah_numbers: List[int], traditions: List[str] = None,
+                            out_dir: Path = OUT_DIR, workers: int = 4,
+                            checkpoint_every: int = 25) -> Dict[str, int]:
+        """Generate several traditions' layers for the same verses in one run.
+
+        Each surah's (tradition, ayah, layer) items are queued verse by verse on
+        one pool, so the traditions share the verse lookup, rate limiter, cost
+        budget and latency stats. Every tradition is written to its own file
+        (see TRADITIONS) in out_dir. Existing files act as the checkpoint:
+        layers already present are skipped, and results are flushed every
+        checkpoint_every items. Returns the number generated per tradition.
+
+        BudgetExceeded stops the run: queued items are dropped, finished ones
+        are flushed and the exception propagates.
+        """
+        traditions = traditions or list(TRADITIONS)
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        generated = {t: 0 for t in traditions}
+
+        for surah_num in surah_numbers:
+            if str(surah_num) not in self.quran_data["verses"]:
+                print(f"Surah {surah_num}: not in quran data, skipping")
+                continue
+            paths, results = {}, {}
+            for t in traditions:
+                paths[t] = out_dir / f"tafsir_{surah_num}{TRADITIONS[t][2]}.json"
+                results[t] = {}
+                if paths[t].exists():
+                    with open(paths[t], encoding="utf-8") as f:
+                        results[t] = json.load(f)
+
+            ayahs = sorted(self.quran_data["verses"][str(surah_num)], key=int)
+            items = [
+                (t, int(a), layer)
+                for a in ayahs
+                for t in traditions
+                for layer in sorted(self.registries[t].templates)
+                if f"layer{layer}" not in results[t].get(a, {})
+            ]
+            skipped = len(ayahs) * sum(len(self.registries[t].templates) for t in traditions) - len(items)
+            print(f"\nSurah {surah_num}: {len(items)} item(s) to generate across "
+                  f"{', '.join(traditions)} ({skipped} already done)")
+            if not items:
+                continue
+            self.queue_items(len(items))
+
+            lock = threading.Lock()
+            pending = [0]
+            stop = threading.Event()
+
+            def flush():
+                for t in traditions:
+                    ordered = dict(sorted(results[t].items(), key=lambda kv: int(kv[0])))
+                    tmp = paths[t].with_name(paths[t].name + ".tmp")
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        json.dump(ordered, f, ensure_ascii=False, indent=2)
+                    os.replace(tmp, paths[t])
+                    self.save_provenance(surah_num, t)
+
+            def run(item):
+                t, ayah_num, layer = item
+                if stop.is_set():
+                    return
+                try:
+                    commentary = self.generate_layer_commentary(surah_num, ayah_num, layer, t)
+                except BudgetExceeded:
+                    stop.set()
+                    raise
+                if not commentary:
+                    print(f"Failed to generate {t} layer {layer} for {surah_num}:{ayah_num}")
+                    return
+                with lock:
+                    results[t].setdefault(str(ayah_num), {})[f"layer{layer}"] = commentary
+                    generated[t] += 1
+                    pending[0] += 1
+                    if pending[0] >= checkpoint_every:
+                        flush()
+                        pending[0] = 0
+
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    list(pool.map(run, items))
+            finally:
+                with lock:
+                    flush()
+            print(f"✓ Surah {surah_num}: " + ", ".join(f"{paths[t].name}" for t in traditions))
+
+        self.print_request_stats()
+        return generated
+
     def generate_sample_surahs(self, surah_numbers: List[int] = [1, 36, 67]):
         """Generate tafsir for sample surahs for testing"""
         print(f"=== Generating Sample Tafsir ===")
         print(f"Target surahs: {surah_numbers}")
+        self.queue_items(sum(len(self.quran_data["verses"][str(s)]) for s in surah_numbers)
+                         * len(self.prompts.templates))
         
         for surah_num in surah_numbers:
             tafsir_data = self.generate_surah_tafsir(surah_num)
@@ -474,6 +1087,7 @@ COMMENTARY:"""
         print(f"Estimated cost: $50-100\n")
         
         start_time = datetime.now()
+        self.queue_items(self.total_verses * len(self.prompts.templates))
         
         for surah_num in range(1, 115):
             tafsir_data = self.generate_surah_tafsir(surah_num)
@@ -494,7 +1108,109 @@ COMMENTARY:"""
         print(f"Total commentaries: {self.generated_count}")
         print(f"Ready for iOS app integration!")
 
+def regenerate_stale_main(argv: List[str]):
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(prog="generate_tafsir.py regenerate-stale",
+                                     description="Regenerate items whose prompt hash changed")
+    parser.add_argument("--surah", type=int, action="append", help="default: all surahs")
+    parser.add_argument("--layer", type=int, action="append", help="default: all layers")
+    parser.add_argument("--data-dir", default=None,
+                        help="default: the app data for shia, new_tafsir/ for sunni")
+    parser.add_argument("--tradition", choices=sorted(TRADITIONS), default="shia")
+    parser.add_argument("--include-unknown", action="store_true",
+                        help="also regenerate items with no provenance record (see stamp-provenance)")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        print("Error: OPENROUTER_API_KEY not set")
+        sys.exit(1)
+    generator = TafsirGenerator(api_key, tradition=args.tradition)
+    print("Current prompt hashes: " + ", ".join(f"L{k}={v}" for k, v in sorted(generator.prompts.hashes.items())))
+    if not args.dry_run and not generator.load_quran_data():
+        sys.exit(1)
+    total = generator.regenerate_stale(args.surah or list(range(1, 115)), Path(args.data_dir) if args.data_dir else None,
+                                       args.layer, args.include_unknown, args.dry_run)
+    print(f"{total} stale item(s)" + (" (dry run)" if args.dry_run else ""))
+    if not args.dry_run:
+        generator.print_request_stats()
+
+
+def stamp_provenance_main(argv: List[str]):
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(prog="generate_tafsir.py stamp-provenance",
+                                     description="Record current prompt hashes for items with no provenance")
+    parser.add_argument("--surah", type=int, action="append", help="default: all surahs")
+    parser.add_argument("--layer", type=int, action="append", help="default: all layers")
+    parser.add_argument("--data-dir", default=None,
+                        help="default: the app data for shia, new_tafsir/ for sunni")
+    parser.add_argument("--tradition", choices=sorted(TRADITIONS), default="shia")
+    args = parser.parse_args(argv)
+
+    # No requests are made; the client only needs some key to construct
+    generator = TafsirGenerator(os.getenv("OPENROUTER_API_KEY") or "unused", tradition=args.tradition)
+    print("Current prompt hashes: " + ", ".join(f"L{k}={v}" for k, v in sorted(generator.prompts.hashes.items())))
+    total = generator.stamp_provenance(args.surah or list(range(1, 115)), Path(args.data_dir) if args.data_dir else None, args.layer)
+    print(f"{total} item(s) stamped")
+
+
+def traditions_main(argv: List[str]):
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(prog="generate_tafsir.py traditions",
+                                     description="Generate several traditions' layers in one pass")
+    parser.add_argument("--surah", type=int, action="append")
+    parser.add_argument("--all", action="store_true")
+    parser.add_argument("--tradition", action="append", choices=sorted(TRADITIONS),
+                        help="default: all traditions")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rpm", type=float, default=None, help="requests per minute across all workers")
+    parser.add_argument("--budget", type=float, default=None, help="total USD for the run")
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--out", default=str(OUT_DIR))
+    args = parser.parse_args(argv)
+
+    if args.all:
+        surahs = list(range(1, 115))
+    elif args.surah:
+        surahs = args.surah
+    else:
+        parser.error("give --surah N or --all")
+
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        print("Error: OPENROUTER_API_KEY not set")
+        sys.exit(1)
+    generator = TafsirGenerator(api_key, cost_budget=args.budget, stream=args.stream, rpm=args.rpm)
+    if not generator.load_quran_data():
+        sys.exit(1)
+    try:
+        generated = generator.generate_traditions(surahs, args.tradition, Path(args.out), args.workers)
+    except BudgetExceeded as e:
+        print(f"Stopped: {e}")
+        print("Finished layers were saved; rerun with a new --budget to continue.")
+        sys.exit(1)
+    print("Generated " + ", ".join(f"{t}: {n}" for t, n in generated.items()))
+    print("Rerun the same command to fill in any failed items; finished layers are kept.")
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "regenerate-stale":
+        regenerate_stale_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "stamp-provenance":
+        stamp_provenance_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "traditions":
+        traditions_main(sys.argv[2:])
+        return
+
     print("=== Thaqalyn Tafsir Generator ===\n")
     
     # Load environment variables
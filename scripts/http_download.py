@@ -0,0 +1,158 @@
+"""Resumable, verified HTTP downloads shared by kie_kling and the carousel.
+
+download() streams into <dest>.part in large chunks, resumes with an HTTP
+Range request when a retry (or a later run) finds a partial file, checks
+the final size against Content-Length/Content-Range and an optional
+expected digest, and only then renames onto <dest>. A failed download
+never leaves a half-written file at the final path.
+
+<dest>.part.json records the URL and the server's validator (strong ETag
+or Last-Modified) the partial bytes came from. A partial file is resumed
+only for the same URL, with If-Range so a changed object is sent whole;
+otherwise it is discarded and the download starts from byte 0.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+CHUNK_SIZE = 1 << 20          # 1 MiB
+RETRIES = 4
+RETRY_BACKOFF_SEC = 2
+
+
+class DownloadError(IOError):
+    pass
+
+
+class _Retryable(Exception):
+    pass
+
+
+def _total_from_headers(resp: requests.Response, offset: int):
+    """Full object size, if the server told us."""
+    content_range = resp.headers.get("Content-Range", "")
+    if "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = resp.headers.get("Content-Length")
+    if length and length.isdigit():
+        return int(length) + (offset if resp.status_code == 206 else 0)
+    return None
+
+
+def _meta_path(part: Path) -> Path:
+    return part.with_name(part.name + ".json")
+
+
+def _discard(part: Path):
+    part.unlink(missing_ok=True)
+    _meta_path(part).unlink(missing_ok=True)
+
+
+def _validator(resp: requests.Response):
+    """A validator usable in If-Range: a strong ETag, else Last-Modified."""
+    etag = resp.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return resp.headers.get("Last-Modified")
+
+
+def _resume_point(url: str, part: Path):
+    """(offset, validator) to resume ``part`` from; discards it if from another URL."""
+    if not part.exists():
+        return 0, None
+    try:
+        with open(_meta_path(part), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = {}
+    if meta.get("url") != url:
+        _discard(part)
+        return 0, None
+    return part.stat().st_size, meta.get("validator")
+
+
+def _fetch_into(session, url: str, part: Path, timeout: float):
+    """One attempt: append to ``part`` from its current size. Returns total."""
+    offset, validator = _resume_point(url, part)
+    headers = {}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+        if validator:
+            headers["If-Range"] = validator
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as r:
+        if r.status_code == 416 and offset:
+            # Range starts at EOF: the partial file is already complete
+            return _total_from_headers(r, offset) or offset
+        if r.status_code >= 500 or r.status_code == 429:
+            raise _Retryable(f"HTTP {r.status_code}")
+        r.raise_for_status()
+        if r.status_code == 200:
+            offset = 0            # server ignored Range or the object changed: start over
+        total = _total_from_headers(r, offset)
+        if not offset:
+            with open(_meta_path(part), "w", encoding="utf-8") as f:
+                json.dump({"url": url, "validator": _validator(r)}, f)
+        with open(part, "ab" if offset else "wb") as f:
+            for chunk in r.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+    return total
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def download(url: str, dest, session=None, expected_size: int = None,
+             expected_sha256: str = None, retries: int = RETRIES,
+             timeout: float = 180) -> str:
+    """Download ``url`` to ``dest`` atomically. Returns the file's sha256.
+
+    Raises DownloadError once retries are exhausted or verification fails.
+    """
+    session = session or requests.Session()
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    part = dest.with_name(dest.name + ".part")
+
+    for attempt in range(retries + 1):
+        try:
+            total = _fetch_into(session, url, part, timeout)
+            break
+        except (_Retryable, requests.ConnectionError, requests.Timeout,
+                requests.exceptions.ChunkedEncodingError) as e:
+            if attempt == retries:
+                raise DownloadError(f"{url}: {e} (partial kept at {part})") from e
+            time.sleep(RETRY_BACKOFF_SEC * (attempt + 1))
+        except requests.HTTPError as e:
+            raise DownloadError(f"{url}: {e}") from e
+
+    size = part.stat().st_size
+    for want, label in ((total, "server"), (expected_size, "expected")):
+        if want is not None and size != want:
+            _discard(part)
+            raise DownloadError(f"{url}: got {size} bytes, {label} size {want}")
+    digest = file_sha256(part)
+    if expected_sha256 and digest != expected_sha256:
+        _discard(part)
+        raise DownloadError(f"{url}: sha256 {digest} != expected {expected_sha256}")
+    os.replace(part, dest)
+    _meta_path(part).unlink(missing_ok=True)
+    return digest
+
+
+def fetch_bytes(url: str, session=None, **kwargs) -> bytes:
+    """download() into a scratch file and return its contents."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "payload"
+        download(url, path, session=session, **kwargs)
+        return path.read_bytes()
@@ -10,10 +10,27 @@ so this adapter exists. It:
   3. Polls /api/v1/jobs/recordInfo until state == 'success' or 'fail'.
   4. Downloads the resulting MP4 to --output.
 
+Batch mode (--manifest jobs.json) takes a JSON list of jobs:
+    [{"image": "slide_1.png", "prompt": "...", "output": "clip_1.mp4",
+      "mode": "v3-0", "duration": 5}, ...]
+("mode"/"duration"/"image_url" optional). All tasks are submitted at once
+and polled together from one asyncio loop over a shared session; each clip
+downloads as soon as it finishes, so a batch takes about as long as its
+slowest job. A status table is printed at the end.
+
+Every submitted task is recorded in a local task store (--task-store,
+default .kling_tasks.json) keyed by image digest + prompt + model + mode +
+duration. A rerun with the same inputs reattaches to the recorded taskId
+instead of paying for a new generation, downloads only what is missing,
+and skips jobs whose output already exists with the recorded digest.
+--fresh ignores the store and resubmits.
+
 Env: KLING_API_KEY (Kie.ai key)
 """
 
 import argparse
+import asyncio
+import hashlib
 import json
 import os
 import sys
@@ -21,6 +38,14 @@ import time
 from pathlib import Path
 
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from .http_download import DownloadError, file_sha256
+    from .http_download import download as fetch_file
+except ImportError:  # run as a file: python3 scripts/kie_kling.py
+    from http_download import DownloadError, file_sha256
+    from http_download import download as fetch_file
 
 try:
     from dotenv import load_dotenv
@@ -28,8 +53,13 @@ try:
 except ImportError:
     pass
 
+API_BASE = "https://api.kie.ai/api/v1/jobs"
 POLL_INTERVAL_SEC = 5
+MAX_POLL_INTERVAL_SEC = 30   # batch mode backs off to this while nothing changes
+POLL_BACKOFF = 1.5
 MAX_POLL_MINUTES = 15
+MAX_POLL_ERRORS = 8          # consecutive failed polls before a task is given up on
+DEFAULT_TASK_STORE = ".kling_tasks.json"
 
 MODEL_MAP = {
     "v2-1-master": "kling/v2-1-master-image-to-video",
@@ -52,9 +82,24 @@ V3_RESOLUTION_MODE = {
 }
 
 
-def upload_to_tmpfiles(image_path: Path) -> str:
+class KlingError(Exception):
+    pass
+
+
+def make_session(pool_size: int = 10) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    return session
+
+
+def resolve_model(mode: str) -> str:
+    return MODEL_MAP.get(mode, mode if mode.startswith("kling/") else f"kling/{mode}")
+
+
+def upload_to_tmpfiles(image_path: Path, session=requests) -> str:
     with open(image_path, "rb") as f:
-        r = requests.post(
+        r = session.post(
             "https://tmpfiles.org/api/v1/upload",
             files={"file": f},
             timeout=60,
@@ -66,17 +111,122 @@ def upload_to_tmpfiles(image_path: Path) -> str:
     return direct
 
 
+def build_payload(mode: str, prompt: str, image_url: str, duration: int) -> dict:
+    model = resolve_model(mode)
+    if model.startswith("kling-3"):
+        # Kling 3.0 has a different payload shape: image_urls array, mode, sound,
+        # multi_shots, multi_prompt are all required by the OpenAPI spec.
+        return {
+            "model": model,
+            "input": {
+                "prompt": prompt,
+                "image_urls": [image_url],
+                "duration": str(duration),
+                "aspect_ratio": "9:16",
+                "sound": False,
+                "mode": V3_RESOLUTION_MODE.get(mode, "pro"),
+                "multi_shots": False,
+                "multi_prompt": [],
+            },
+        }
+    return {
+        "model": model,
+        "input": {
+            "prompt": prompt,
+            "image_url": image_url,
+            "duration": str(duration),
+            "aspect_ratio": "9:16",
+        },
+    }
+
+
+def submit_task(session, headers: dict, payload: dict) -> str:
+    """POST createTask and return the taskId. Raises KlingError."""
+    r = session.post(f"{API_BASE}/createTask", json=payload, headers=headers, timeout=60)
+    if r.status_code not in (200, 201):
+        raise KlingError(f"createTask {r.status_code}: {r.text[:600]}")
+    data = r.json()
+    if data.get("code") not in (200, 0):
+        raise KlingError(f"API code {data.get('code')}: {data.get('msg')}")
+    task_id = data.get("data", {}).get("taskId") or data.get("taskId")
+    if not task_id:
+        raise KlingError(f"no taskId in response: {data}")
+    return task_id
+
+
+def poll_task(session, headers: dict, task_id: str):
+    """One recordInfo call. Returns (state, info); on HTTP error state is None
+    and info is {"error": ...}."""
+    pr = session.get(f"{API_BASE}/recordInfo?taskId={task_id}", headers=headers, timeout=30)
+    if pr.status_code != 200:
+        print(f"  poll {task_id} {pr.status_code}: {pr.text[:200]}", file=sys.stderr)
+        return None, {"error": f"HTTP {pr.status_code}"}
+    info = pr.json().get("data", {})
+    return info.get("state"), info
+
+
+def result_url(info: dict) -> str:
+    result_json = info.get("resultJson", "{}")
+    result = json.loads(result_json) if isinstance(result_json, str) else result_json
+    urls = result.get("resultUrls") or result.get("result_urls") or []
+    if not urls:
+        raise KlingError(f"no resultUrls in {result}")
+    return urls[0]
+
+
+def download(session, video_url: str, output_path: Path) -> str:
+    """Resumable, verified download (see http_download). Returns sha256."""
+    return fetch_file(video_url, output_path, session=session)
+
+
+class TaskStore:
+    """JSON file of {job key: task record}, rewritten atomically on change."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.records = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                self.records = json.load(f)
+
+    def get(self, key: str):
+        return self.records.get(key)
+
+    def put(self, key: str, **fields) -> dict:
+        rec = self.records.setdefault(key, {})
+        rec.update(fields, updated=time.strftime("%Y-%m-%dT%H:%M:%S"))
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.records, f, indent=2)
+        os.replace(tmp, self.path)
+        return rec
+
+
+def job_key(job: dict) -> tuple:
+    """(key, image source) — same inputs map to the same paid task."""
+    source = file_sha256(job["image"]) if job["image"] else job["image_url"]
+    ident = json.dumps([source, job["prompt"], resolve_model(job["mode"]),
+                        job["mode"], job["duration"]])
+    return hashlib.sha256(ident.encode("utf-8")).hexdigest()[:20], source
+
+
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--image", required=True)
-    ap.add_argument("--prompt", required=True)
-    ap.add_argument("--output", required=True)
+    ap.add_argument("--image")
+    ap.add_argument("--prompt")
+    ap.add_argument("--output")
     ap.add_argument("--duration", type=int, default=5,
                     help="Clip duration in seconds. v2 supports 5/10; v3-0 supports 3-15.")
     ap.add_argument("--mode", default="v2-1-master",
                     help="One of v2-1-master, v2-1, v2-1-pro, v3-0, v3-0-std, v3-0-pro, v3-0-4k.")
     ap.add_argument("--image-url", default=None,
                     help="Optional: pre-uploaded public image URL (skips tmpfiles upload).")
+    ap.add_argument("--manifest", default=None,
+                    help="Batch mode: JSON list of {image, prompt, output, mode?, duration?}.")
+    ap.add_argument("--task-store", default=DEFAULT_TASK_STORE,
+                    help="Local record of submitted tasks used to reattach on rerun.")
+    ap.add_argument("--fresh", action="store_true",
+                    help="Ignore the task store and submit new generations.")
     args = ap.parse_args()
 
     api_key = os.environ.get("KLING_API_KEY")
@@ -84,114 +234,201 @@ def main():
         print("ERROR: KLING_API_KEY not set", file=sys.stderr)
         return 1
 
-    model = MODEL_MAP.get(args.mode, args.mode if args.mode.startswith("kling/") else f"kling/{args.mode}")
-    image_path = Path(args.image)
-    output_path = Path(args.output)
+    if args.manifest:
+        jobs = load_manifest(Path(args.manifest), args.mode, args.duration)
+    else:
+        if not (args.prompt and args.output and (args.image or args.image_url)):
+            ap.error("--prompt, --output and --image (or --image-url) are required without --manifest")
+        if args.image and not Path(args.image).is_file():
+            ap.error(f"image not found: {args.image}")
+        jobs = [new_job(args.image, args.image_url, args.prompt, args.mode,
+                        args.duration, args.output)]
 
-    if args.image_url:
-        image_url = args.image_url
-        print(f"Using pre-uploaded image_url={image_url}", file=sys.stderr)
+    store = TaskStore(Path(args.task_store))
+    results = asyncio.run(run_batch(jobs, api_key, store, fresh=args.fresh))
+    if args.manifest:
+        print_status_table(results)
+    elif results[0]["state"] in ("done", "skipped"):
+        print(str(results[0]["output"]))
     else:
-        print(f"Uploading {image_path.name} to tmpfiles.org...", file=sys.stderr)
-        image_url = upload_to_tmpfiles(image_path)
-        print(f"  image_url={image_url}", file=sys.stderr)
+        print(f"ERROR: {results[0]['error']}", file=sys.stderr)
+    return 0 if all(j["state"] in ("done", "skipped") for j in results) else 1
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
+
+# --- Batch mode ---
+
+def new_job(image, image_url, prompt, mode, duration, output) -> dict:
+    return {
+        "image": Path(image) if image else None,
+        "image_url": image_url,
+        "prompt": prompt,
+        "mode": mode,
+        "duration": int(duration),
+        "output": Path(output),
+        "key": None,
+        "task_id": None,
+        "state": "pending",
+        "error": None,
+        "started": None,
+        "elapsed": None,
+        "poll_errors": 0,
     }
 
-    is_v3 = model.startswith("kling-3")
-    if is_v3:
-        # Kling 3.0 has a different payload shape: image_urls array, mode, sound,
-        # multi_shots, multi_prompt are all required by the OpenAPI spec.
-        v3_mode = V3_RESOLUTION_MODE.get(args.mode, "pro")
-        submit_payload = {
-            "model": model,
-            "input": {
-                "prompt": args.prompt,
-                "image_urls": [image_url],
-                "duration": str(args.duration),
-                "aspect_ratio": "9:16",
-                "sound": False,
-                "mode": v3_mode,
-                "multi_shots": False,
-                "multi_prompt": [],
-            },
-        }
-        print(f"Submitting to Kie.ai (Kling 3.0, mode={v3_mode}, {args.duration}s)...", file=sys.stderr)
-    else:
-        submit_payload = {
-            "model": model,
-            "input": {
-                "prompt": args.prompt,
-                "image_url": image_url,
-                "duration": str(args.duration),
-                "aspect_ratio": "9:16",
-            },
-        }
-        print(f"Submitting to Kie.ai ({model}, {args.duration}s)...", file=sys.stderr)
-    r = requests.post(
-        "https://api.kie.ai/api/v1/jobs/createTask",
-        json=submit_payload,
-        headers=headers,
-        timeout=60,
-    )
-    if r.status_code not in (200, 201):
-        print(f"ERROR: createTask {r.status_code}: {r.text[:600]}", file=sys.stderr)
-        return 1
 
-    data = r.json()
-    if data.get("code") not in (200, 0):
-        print(f"ERROR: API code {data.get('code')}: {data.get('msg')}", file=sys.stderr)
-        return 1
+def load_manifest(path: Path, default_mode: str, default_duration: int) -> list:
+    with open(path, encoding="utf-8") as f:
+        entries = json.load(f)
+    jobs = []
+    for i, e in enumerate(entries):
+        for key in ("prompt", "output"):
+            if not e.get(key):
+                raise SystemExit(f"ERROR: manifest entry {i} missing {key!r}")
+        if not (e.get("image") or e.get("image_url")):
+            raise SystemExit(f"ERROR: manifest entry {i} needs image or image_url")
+        job = new_job(e.get("image"), e.get("image_url"), e["prompt"],
+                      e.get("mode", default_mode),
+                      e.get("duration", default_duration), e["output"])
+        if job["image"] and not job["image"].is_file():
+            # Fail just this job; the rest of the batch still runs
+            job["state"], job["error"] = "failed", f"image not found: {job['image']}"
+            print(f"  manifest entry {i}: {job['error']}", file=sys.stderr)
+        jobs.append(job)
+    return jobs
+
+
+def _resume(job: dict, store: TaskStore, fresh: bool) -> None:
+    """Skip or reattach ``job`` from its store record, if any."""
+    job["key"], source = job_key(job)
+    rec = None if fresh else store.get(job["key"])
+    if rec is None:
+        store.put(job["key"], image_sha256=source if job["image"] else None,
+                  image_url=job["image_url"], prompt=job["prompt"],
+                  model=resolve_model(job["mode"]), mode=job["mode"],
+                  duration=job["duration"], output=str(job["output"]),
+                  task_id=None, state="pending")
+        return
+    out = job["output"]
+    if (rec.get("state") == "done" and out.exists()
+            and rec.get("output_sha256") == file_sha256(out)):
+        job["state"], job["task_id"] = "skipped", rec.get("task_id")
+        print(f"  {out.name}: up to date (taskId={job['task_id']}), skipping", file=sys.stderr)
+        return
+    if rec.get("task_id") and rec.get("state") != "failed":
+        job["task_id"], job["state"] = rec["task_id"], "submitted"
+        job["started"] = time.time()
+        print(f"  {out.name}: reattaching to taskId={job['task_id']}", file=sys.stderr)
+
+
+async def _submit(session, headers: dict, job: dict, store: TaskStore) -> None:
+    try:
+        if not job["image_url"]:
+            job["image_url"] = await asyncio.to_thread(upload_to_tmpfiles, job["image"], session)
+        payload = build_payload(job["mode"], job["prompt"], job["image_url"], job["duration"])
+        job["task_id"] = await asyncio.to_thread(submit_task, session, headers, payload)
+        job["state"] = "submitted"
+        job["started"] = time.time()
+        # Persist before polling so a crash from here on can reattach
+        store.put(job["key"], task_id=job["task_id"], state="submitted")
+        print(f"  {job['output'].name}: taskId={job['task_id']}", file=sys.stderr)
+    except (KlingError, requests.RequestException) as e:
+        job["state"], job["error"] = "failed", str(e)
+        store.put(job["key"], state="failed", error=str(e))
 
-    task_id = data.get("data", {}).get("taskId") or data.get("taskId")
-    if not task_id:
-        print(f"ERROR: no taskId in response: {data}", file=sys.stderr)
-        return 1
 
-    print(f"taskId={task_id}. Polling...", file=sys.stderr)
+async def _download(session, job: dict, info: dict, store: TaskStore) -> None:
+    try:
+        url = result_url(info)
+        digest = await asyncio.to_thread(download, session, url, job["output"])
+        job["state"] = "done"
+        store.put(job["key"], state="done", result_url=url, output_sha256=digest)
+        print(f"  {job['output'].name}: downloaded", file=sys.stderr)
+    except (KlingError, DownloadError, requests.RequestException, OSError) as e:
+        job["state"], job["error"] = "failed", f"download: {e}"
+        # The generation itself succeeded; keep the taskId reattachable and
+        # the .part file so the next run resumes the download
+        store.put(job["key"], state="success", error=job["error"])
+    job["elapsed"] = time.time() - job["started"]
+
+
+async def run_batch(jobs: list, api_key: str, store: TaskStore,
+                    fresh: bool = False) -> list:
+    """Submit (or reattach) all jobs concurrently, then poll them together.
+
+    The poll interval starts at POLL_INTERVAL_SEC and grows by POLL_BACKOFF
+    (capped at MAX_POLL_INTERVAL_SEC) on rounds where no task changed state;
+    any state change resets it. Failed polls are logged, and a task whose
+    last MAX_POLL_ERRORS polls all failed is given up on like a timeout.
+    """
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+    session = make_session(pool_size=max(10, len(jobs)))
+    for job in jobs:
+        if job["state"] != "failed":
+            _resume(job, store, fresh)
+    to_submit = [j for j in jobs if j["state"] == "pending"]
+    if to_submit:
+        print(f"Submitting {len(to_submit)} task(s) to Kie.ai...", file=sys.stderr)
+        await asyncio.gather(*(_submit(session, headers, j, store) for j in to_submit))
+
+    downloads, interval = [], POLL_INTERVAL_SEC
+    finished = ("failed", "done", "downloading", "skipped")
     deadline = time.time() + MAX_POLL_MINUTES * 60
     while time.time() < deadline:
-        time.sleep(POLL_INTERVAL_SEC)
-        pr = requests.get(
-            f"https://api.kie.ai/api/v1/jobs/recordInfo?taskId={task_id}",
-            headers=headers,
-            timeout=30,
+        active = [j for j in jobs if j["state"] not in finished]
+        if not active:
+            break
+        await asyncio.sleep(interval)
+        polls = await asyncio.gather(
+            *(asyncio.to_thread(poll_task, session, headers, j["task_id"]) for j in active),
+            return_exceptions=True,
         )
-        if pr.status_code != 200:
-            print(f"  poll {pr.status_code}: {pr.text[:200]}", file=sys.stderr)
-            continue
-        pdata = pr.json()
-        info = pdata.get("data", {})
-        state = info.get("state")
-        print(f"  state={state}", file=sys.stderr)
-
-        if state == "success":
-            result_json = info.get("resultJson", "{}")
-            result = json.loads(result_json) if isinstance(result_json, str) else result_json
-            urls = result.get("resultUrls") or result.get("result_urls") or []
-            if not urls:
-                print(f"ERROR: no resultUrls in {result}", file=sys.stderr)
-                return 1
-            video_url = urls[0]
-            print(f"Downloading {video_url}...", file=sys.stderr)
-            vr = requests.get(video_url, timeout=180, stream=True)
-            vr.raise_for_status()
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(output_path, "wb") as f:
-                for chunk in vr.iter_content(8192):
-                    f.write(chunk)
-            print(str(output_path))
-            return 0
-
-        if state in ("fail", "failed"):
-            print(f"ERROR: task failed. failCode={info.get('failCode')} failMsg={info.get('failMsg')}", file=sys.stderr)
-            return 1
-
-    print(f"ERROR: timeout after {MAX_POLL_MINUTES}min", file=sys.stderr)
-    return 1
+        changed = False
+        for job, res in zip(active, polls):
+            if isinstance(res, Exception) or res[0] is None:
+                job["poll_errors"] += 1
+                error = repr(res) if isinstance(res, Exception) else res[1].get("error", "no state in response")
+                print(f"  {job['output'].name}: poll error "
+                      f"({job['poll_errors']}/{MAX_POLL_ERRORS}): {error}", file=sys.stderr)
+                if job["poll_errors"] >= MAX_POLL_ERRORS:
+                    # Possibly still running remotely: leave the store record reattachable
+                    job["state"] = "failed"
+                    job["error"] = f"{job['poll_errors']} consecutive poll errors, last: {error}"
+                    job["elapsed"] = time.time() - job["started"]
+                continue
+            job["poll_errors"] = 0
+            state, info = res
+            if state != job["state"]:
+                changed = True
+                print(f"  {job['output'].name}: state={state}", file=sys.stderr)
+            if state == "success":
+                job["state"] = "downloading"
+                store.put(job["key"], state="success")
+                downloads.append(asyncio.create_task(_download(session, job, info, store)))
+            elif state in ("fail", "failed"):
+                job["state"] = "failed"
+                job["error"] = f"failCode={info.get('failCode')} failMsg={info.get('failMsg')}"
+                job["elapsed"] = time.time() - job["started"]
+                store.put(job["key"], state="failed", error=job["error"])
+            else:
+                job["state"] = state
+        interval = POLL_INTERVAL_SEC if changed else min(interval * POLL_BACKOFF, MAX_POLL_INTERVAL_SEC)
+
+    for job in jobs:
+        if job["state"] not in finished:
+            # Still running remotely: leave the store record reattachable
+            job["state"], job["error"] = "failed", f"timeout after {MAX_POLL_MINUTES}min"
+    await asyncio.gather(*downloads)
+    return jobs
+
+
+def print_status_table(jobs: list) -> None:
+    print(f"\n{'output':<32} {'state':<8} {'secs':>6}  taskId / error")
+    for j in jobs:
+        secs = f"{j['elapsed']:.0f}" if j["elapsed"] is not None else "-"
+        detail = j["error"] or j["task_id"] or ""
+        print(f"{str(j['output']):<32} {j['state']:<8} {secs:>6}  {detail}")
 
 
 if __name__ == "__main__":
@@ -5,11 +5,13 @@ Merge Quick Overview JSON into Tafsir JSON files.
 Usage:
     python3 merge_quickoverview.py <quickoverview_json_path> --surah <number> [--force]
     python3 merge_quickoverview.py <quickoverview_json_path> [--force]  # If filename contains surah number
+    python3 merge_quickoverview.py --batch <dir_or_files...> [--force] [--workers N] [--index <path>]
 
 Example:
     python3 merge_quickoverview.py new_tafsir/quickoverview/quickoverview_2_complete.json --surah 2
     python3 merge_quickoverview.py new_tafsir/quickoverview/quickoverview_2_v1-5.json
     python3 merge_quickoverview.py my_custom_file.json --surah 84 --force
+    python3 merge_quickoverview.py --batch new_tafsir/quickoverview/
 
 The script will:
 1. Use the provided surah number (or parse from filename if matches known pattern)
@@ -20,12 +22,19 @@ The script will:
 Options:
     --surah <number>  Specify the surah number (required if filename doesn't contain it)
     --force           Overwrite existing quickOverview data (default: skip existing)
+
+Batch mode groups every quickoverview_<s>_*.json chunk by surah and merges
+each surah's chunks with one load and one write of tafsir_<s>.json, one
+surah per worker process. It then writes a concept index covering every
+tafsir file: {concept id: [surah, verse, title, colorHex]}.
 """
 
+import argparse
 import json
 import sys
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 
@@ -106,7 +115,8 @@ def get_verse_keys(data: dict) -> list[str]:
     return [k for k in data.keys() if k.isdigit()]
 
 
-def merge_quickoverview(tafsir_data: dict, quickoverview_data: dict, force: bool = False) -> tuple[dict, list[str], list[str]]:
+def merge_quickoverview(tafsir_data: dict, quickoverview_data: dict, force: bool = False,
+                        verbose: bool = True) -> tuple[dict, list[str], list[str]]:
     """
     Merge quickOverview data into tafsir data.
 
@@ -114,6 +124,7 @@ def merge_quickoverview(tafsir_data: dict, quickoverview_data: dict, force: bool
         tafsir_data: The existing tafsir data
         quickoverview_data: The quickOverview data to merge
         force: If True, overwrite existing quickOverview data. If False, skip existing.
+        verbose: If False, only warnings are printed (used by batch mode)
 
     Returns:
         tuple: (merged_data, list_of_merged_verses, list_of_skipped_verses)
@@ -146,7 +157,8 @@ def merge_quickoverview(tafsir_data: dict, quickoverview_data: dict, force: bool
 
         if existing_qo and not force:
             existing_concepts = len(existing_qo.get('concepts', []))
-            print(f"  Verse {verse_num}: SKIPPED (already has {existing_concepts} concepts)")
+            if verbose:
+                print(f"  Verse {verse_num}: SKIPPED (already has {existing_concepts} concepts)")
             skipped_verses.append(verse_num)
             continue
 
@@ -157,18 +169,155 @@ def merge_quickoverview(tafsir_data: dict, quickoverview_data: dict, force: bool
         # Count concepts for reporting
         concept_count = len(qo_data.get('concepts', []))
         action = "Replaced" if existing_qo else "Added"
-        print(f"  Verse {verse_num}: {action} {concept_count} concepts")
+        if verbose:
+            print(f"  Verse {verse_num}: {action} {concept_count} concepts")
 
     return tafsir_data, merged_verses, skipped_verses
 
 
+def _chunk_sort_key(filepath: str) -> tuple:
+    """_complete files first, then v<start>-<end> chunks in verse order."""
+    match = re.search(r'_v(\d+)', Path(filepath).stem)
+    return (int(match.group(1)) if match else 0, Path(filepath).name)
+
+
+def group_chunks(paths: list[str]) -> dict[int, list[str]]:
+    """Expand directories and group quickoverview chunk files by surah."""
+    files = []
+    for p in paths:
+        if os.path.isdir(p):
+            files.extend(str(f) for f in sorted(Path(p).glob("quickoverview_*.json")))
+        else:
+            files.append(p)
+
+    groups: dict[int, list[str]] = {}
+    for f in files:
+        surah_number = parse_surah_from_filename(f)
+        if surah_number is None or not 1 <= surah_number <= 114:
+            print(f"  Warning: cannot determine surah for {f}, skipping")
+            continue
+        groups.setdefault(surah_number, []).append(f)
+    for chunk_files in groups.values():
+        chunk_files.sort(key=_chunk_sort_key)
+    return dict(sorted(groups.items()))
+
+
+def surah_concepts(surah_number: int, tafsir_data: dict) -> list[tuple]:
+    """(concept id, surah, verse, title, colorHex) for every concept in a surah."""
+    out = []
+    for verse_num in sorted(get_verse_keys(tafsir_data), key=int):
+        qo = tafsir_data[verse_num].get('quickOverview') or {}
+        for concept in qo.get('concepts', []):
+            out.append((concept.get('id'), surah_number, int(verse_num),
+                        concept.get('title'), concept.get('colorHex')))
+    return out
+
+
+def merge_surah_chunks(job: tuple) -> dict:
+    """Worker: merge all chunks for one surah with a single load and write.
+
+    A job with no chunk files only collects concepts for the index.
+    """
+    surah_number, chunk_files, force, base_dir = job
+    result = {"surah": surah_number, "chunks": len(chunk_files), "merged": [],
+              "skipped": [], "errors": [], "concepts": []}
+    try:
+        tafsir_path = find_tafsir_file(surah_number, base_dir)
+    except FileNotFoundError as e:
+        result["errors"].append(str(e).splitlines()[0])
+        return result
+    tafsir_data = load_json(tafsir_path)
+
+    for chunk in chunk_files:
+        try:
+            quickoverview_data = load_json(chunk)
+        except json.JSONDecodeError as e:
+            result["errors"].append(f"{chunk}: {e}")
+            continue
+        _, merged, skipped = merge_quickoverview(tafsir_data, quickoverview_data, force, verbose=False)
+        result["merged"].extend(merged)
+        result["skipped"].extend(skipped)
+
+    if result["merged"]:
+        save_json(tafsir_path, tafsir_data)
+    result["concepts"] = surah_concepts(surah_number, tafsir_data)
+    return result
+
+
+def build_concept_index(results: list[dict]) -> dict:
+    index = {}
+    for r in results:
+        for concept_id, surah_number, verse, title, color in r["concepts"]:
+            if concept_id in index:
+                print(f"  Warning: duplicate concept id {concept_id} "
+                      f"({index[concept_id][0]}:{index[concept_id][1]} and {surah_number}:{verse})")
+            index[concept_id] = [surah_number, verse, title, color]
+    return index
+
+
+def batch_main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description="Batch-merge quickOverview chunks by surah")
+    parser.add_argument("--batch", nargs="+", required=True, metavar="PATH",
+                        help="chunk files and/or directories of quickoverview_*.json")
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--index", default=None,
+                        help="concept index output (default: Thaqalayn/Data/concept_index.json)")
+    args = parser.parse_args(argv)
+
+    base_dir = Path(__file__).parent.parent
+    groups = group_chunks(args.batch)
+    if not groups:
+        print("Error: no quickoverview chunk files found")
+        sys.exit(1)
+    print(f"Merging {sum(len(v) for v in groups.values())} chunk files across {len(groups)} surahs")
+
+    # Surahs without chunks still contribute their existing concepts to the index
+    data_dir = base_dir / "Thaqalayn" / "Thaqalayn" / "Data"
+    all_surahs = sorted(int(m.group(1)) for f in data_dir.glob("tafsir_*.json")
+                        if (m := re.fullmatch(r'tafsir_(\d+)\.json', f.name)))
+    jobs = [(s, groups.get(s, []), args.force, base_dir)
+            for s in sorted(set(all_surahs) | set(groups))]
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(merge_surah_chunks, jobs))
+
+    failed = False
+    for r in results:
+        if not r["chunks"] and not r["errors"]:
+            continue
+        line = f"  Surah {r['surah']}: {r['chunks']} chunk(s), merged {len(r['merged'])}, skipped {len(r['skipped'])}"
+        print(line + (" — file updated" if r["merged"] else ""))
+        for err in r["errors"]:
+            print(f"    Error: {err}")
+            failed = True
+
+    index = build_concept_index(results)
+    index_path = Path(args.index) if args.index else base_dir / "Thaqalayn" / "Data" / "concept_index.json"
+    with open(index_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"\nConcept index: {len(index)} concepts → {index_path}")
+
+    total_merged = sum(len(r["merged"]) for r in results)
+    total_skipped = sum(len(r["skipped"]) for r in results)
+    print(f"Done. Merged {total_merged} verses, skipped {total_skipped}"
+          + ("" if args.force or not total_skipped else " (use --force to overwrite)"))
+    if failed:
+        sys.exit(1)
+
+
 def main():
+    if '--batch' in sys.argv:
+        batch_main(sys.argv[1:])
+        return
+
     if len(sys.argv) < 2:
         print("Usage: python3 merge_quickoverview.py <quickoverview_json_path> --surah <number> [--force]")
         print("\nExample:")
         print("  python3 merge_quickoverview.py new_tafsir/quickoverview/quickoverview_2_complete.json --surah 2")
         print("  python3 merge_quickoverview.py new_tafsir/quickoverview/quickoverview_2_v1-5.json")
         print("  python3 merge_quickoverview.py my_custom_file.json --surah 84 --force")
+        print("  python3 merge_quickoverview.py --batch new_tafsir/quickoverview/ [--workers N] [--index PATH]")
         print("\nOptions:")
         print("  --surah <number>  Specify the surah number (required if not in filename)")
         print("  --force           Overwrite existing quickOverview data (default: skip existing)")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Columnar view of quran_data.json: parallel per-ayah arrays plus range indexes.
+
+Verses are numbered 0..6235 in mushaf order (the "global index"). Text
+fields (arabicText, translation, translationUrdu, ...) are stored as one
+list each, indexed by global index. juz / page / ruku / hizbQuarter /
+manzil never decrease in mushaf order, so each is stored as a list of
+start indexes instead of a value per verse: unit n covers
+``starts[n - 1]:starts[n]``. Sajda verses are a sorted index list.
+
+    cols = QuranColumns.load("quran_columns.json")
+    cols.verse(2, 255)              # O(1)
+    cols.verses_in("page", 50)      # O(1) slice bounds
+    cols.unit_of("juz", 2, 255)     # O(log n)
+
+fetch_quran_data.py writes quran_columns.json next to quran_data.json; to
+rebuild it from an existing file:
+    python3 scripts/quran_columns.py [quran_data.json] [-o quran_columns.json]
+"""
+
+import argparse
+import json
+import os
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+FORMAT_VERSION = 1
+RANGE_KEYS = ("juz", "page", "ruku", "hizbQuarter", "manzil")
+NON_TEXT_KEYS = set(RANGE_KEYS) | {"sajda"}
+
+
+def build_columns(quran_data: Dict[str, Any]) -> Dict[str, Any]:
+    """quran_data.json structure -> columnar dict (JSON-serialisable)."""
+    verses = quran_data["verses"]
+    surah_numbers = sorted(verses, key=int)
+
+    text_fields: List[str] = []
+    surah_starts: List[int] = []
+    rows = []
+    for s_key in surah_numbers:
+        surah_starts.append(len(rows))
+        for v_key in sorted(verses[s_key], key=int):
+            verse = verses[s_key][v_key]
+            for k, v in verse.items():
+                if k not in NON_TEXT_KEYS and k not in text_fields and isinstance(v, str):
+                    text_fields.append(k)
+            rows.append(verse)
+    surah_starts.append(len(rows))
+
+    ranges: Dict[str, List[int]] = {}
+    for key in RANGE_KEYS:
+        starts = [0]
+        prev = rows[0][key]
+        if prev != 1:
+            raise ValueError(f"{key} does not start at 1 (got {prev})")
+        for i, verse in enumerate(rows[1:], start=1):
+            value = verse[key]
+            if value == prev + 1:
+                starts.append(i)
+            elif value != prev:
+                raise ValueError(f"{key} jumps from {prev} to {value} at global index {i}")
+            prev = value
+        starts.append(len(rows))
+        ranges[key] = starts
+
+    return {
+        "version": FORMAT_VERSION,
+        "surahs": quran_data.get("surahs", []),
+        "surahNumbers": [int(s) for s in surah_numbers],
+        "surahStarts": surah_starts,
+        "text": {field: [verse.get(field) for verse in rows] for field in text_fields},
+        "ranges": ranges,
+        "sajda": [i for i, verse in enumerate(rows) if verse.get("sajda")],
+    }
+
+
+def save_columns(columns: Dict[str, Any], path) -> Path:
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(columns, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, path)
+    return path
+
+
+class QuranColumns:
+    """Read-only accessors over a build_columns() dict."""
+
+    def __init__(self, columns: Dict[str, Any]):
+        if columns.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported columns version {columns.get('version')}")
+        self.columns = columns
+        self.text = columns["text"]
+        self.ranges = columns["ranges"]
+        self.surah_starts = columns["surahStarts"]
+        self.sajda = columns["sajda"]
+        self._surah_pos = {n: i for i, n in enumerate(columns["surahNumbers"])}
+        self._surah_meta = {s["number"]: s for s in columns["surahs"]}
+
+    @classmethod
+    def load(cls, path) -> "QuranColumns":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    @classmethod
+    def from_quran_data(cls, quran_data: Dict[str, Any]) -> "QuranColumns":
+        return cls(build_columns(quran_data))
+
+    def __len__(self) -> int:
+        return self.surah_starts[-1]
+
+    def surah(self, surah: int) -> Dict[str, Any]:
+        """Surah metadata (englishName, versesCount, ...)."""
+        return self._surah_meta[surah]
+
+    def index(self, surah: int, ayah: int) -> int:
+        """(surah, ayah) -> global index."""
+        pos = self._surah_pos[surah]
+        start, end = self.surah_starts[pos], self.surah_starts[pos + 1]
+        if not 1 <= ayah <= end - start:
+            raise KeyError(f"{surah}:{ayah}")
+        return start + ayah - 1
+
+    def ref(self, i: int) -> Tuple[int, int]:
+        """Global index -> (surah, ayah)."""
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        pos = bisect_right(self.surah_starts, i) - 1
+        return self.columns["surahNumbers"][pos], i - self.surah_starts[pos] + 1
+
+    def verse(self, surah: int, ayah: int) -> Dict[str, Any]:
+        """The verse's text fields plus its juz/page/... numbers."""
+        i = self.index(surah, ayah)
+        out = {field: values[i] for field, values in self.text.items()}
+        for key in self.ranges:
+            out[key] = self._unit_at(key, i)
+        return out
+
+    def span(self, kind: str, n: int) -> range:
+        """Global indexes covered by juz/page/ruku/hizbQuarter/manzil ``n``."""
+        starts = self.ranges[kind]
+        if not 1 <= n < len(starts):
+            raise KeyError(f"{kind} {n}")
+        return range(starts[n - 1], starts[n])
+
+    def verses_in(self, kind: str, n: int) -> List[Tuple[int, int]]:
+        """(surah, ayah) refs in juz/page/... ``n``."""
+        return [self.ref(i) for i in self.span(kind, n)]
+
+    def _unit_at(self, kind: str, i: int) -> int:
+        return bisect_right(self.ranges[kind], i)
+
+    def unit_of(self, kind: str, surah: int, ayah: int) -> int:
+        """Which juz/page/... contains (surah, ayah)."""
+        return self._unit_at(kind, self.index(surah, ayah))
+
+    def is_sajda(self, surah: int, ayah: int) -> bool:
+        i = self.index(surah, ayah)
+        pos = bisect_right(self.sajda, i)
+        return pos > 0 and self.sajda[pos - 1] == i
+
+
+def columns_path_for(quran_path) -> Path:
+    return Path(quran_path).with_name("quran_columns.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build quran_columns.json from quran_data.json")
+    parser.add_argument("quran", nargs="?", default="quran_data.json")
+    parser.add_argument("-o", "--output", default=None)
+    args = parser.parse_args()
+
+    with open(args.quran, encoding="utf-8") as f:
+        columns = build_columns(json.load(f))
+    out = save_columns(columns, args.output or columns_path_for(args.quran))
+    print(f"✓ Wrote {out} ({len(columns['surahStarts']) - 1} surahs, "
+          f"{columns['surahStarts'][-1]} verses, text fields: {', '.join(columns['text'])})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Cached, pooled Al-Quran Cloud fetcher shared by fetch_quran_data.py and
+fetch_quran_urdu.py.
+
+Every API response is kept under .quran_cache/ (one JSON body plus a small
+.meta.json with ETag / Last-Modified / sha256). A later run sends a
+conditional GET and reuses the cached body on 304, so adding a translation
+costs one fetch of the new edition rather than a re-download of all of
+them. With offline=True nothing touches the network and a cache miss is an
+error. Several editions are fetched concurrently over one pooled session.
+
+Usage (prefetch / warm the cache):
+    python3 scripts/quran_editions.py quran-uthmani en.sahih ur.jawadi
+    python3 scripts/quran_editions.py --offline ur.jawadi     # verify cache
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+API_BASE = "http://api.alquran.cloud/v1"
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".quran_cache"
+TIMEOUT = 120
+MAX_WORKERS = 4
+USER_AGENT = "thaqalayn-quran-editions/1.0"
+
+
+class EditionError(RuntimeError):
+    pass
+
+
+def make_session(pool_size: int = MAX_WORKERS) -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=2)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def _cache_paths(cache_dir: Path, path: str):
+    stem = path.strip("/").replace("/", "_")
+    return cache_dir / f"{stem}.json", cache_dir / f"{stem}.meta.json"
+
+
+def _write_atomic(path: Path, data: bytes):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _read_cached(body_path: Path, meta_path: Path):
+    """(body, meta) if the cache entry exists and its hash checks out."""
+    try:
+        body = body_path.read_bytes()
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None, {}
+    if hashlib.sha256(body).hexdigest() != meta.get("sha256"):
+        return None, {}
+    return body, meta
+
+
+def fetch_json(path: str, session: requests.Session = None, cache_dir: Path = CACHE_DIR,
+               offline: bool = False, timeout: float = TIMEOUT) -> dict:
+    """GET {API_BASE}/{path} through the on-disk cache. Returns the payload."""
+    body_path, meta_path = _cache_paths(Path(cache_dir), path)
+    body, meta = _read_cached(body_path, meta_path)
+
+    if offline:
+        if body is None:
+            raise EditionError(f"'{path}' is not cached in {cache_dir} (offline mode)")
+        source = "cache"
+    else:
+        headers = {}
+        if body is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        session = session or make_session()
+        try:
+            resp = session.get(f"{API_BASE}/{path}", headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            raise EditionError(f"'{path}': {e}") from e
+        if resp.status_code == 304 and body is not None:
+            source = "cache (304)"
+        elif resp.status_code == 200:
+            digest = hashlib.sha256(resp.content).hexdigest()
+            source = "cache (unchanged)" if digest == meta.get("sha256") else "network"
+            body = resp.content
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            _write_atomic(body_path, body)
+            _write_atomic(meta_path, json.dumps({
+                "url": resp.url,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "sha256": digest,
+            }, indent=2).encode("utf-8"))
+        else:
+            raise EditionError(f"'{path}': HTTP {resp.status_code}")
+
+    payload = json.loads(body)
+    if payload.get("code") != 200 or "data" not in payload:
+        raise EditionError(f"Unexpected API response for '{path}': code={payload.get('code')}")
+    print(f"  {path}: {source}")
+    return payload
+
+
+def fetch_edition(edition: str, **kwargs) -> dict:
+    """Full-Quran edition: the API's ``data`` object (edition + surahs)."""
+    return fetch_json(f"quran/{edition}", **kwargs)["data"]
+
+
+def fetch_editions(editions, session: requests.Session = None,
+                   workers: int = MAX_WORKERS, **kwargs) -> "OrderedDict[str, dict]":
+    """Fetch several editions concurrently. Returns {edition: data} in input order."""
+    editions = list(editions)
+    session = session or make_session(max(workers, 1))
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(editions)))) as pool:
+        results = pool.map(lambda e: fetch_edition(e, session=session, **kwargs), editions)
+        return OrderedDict(zip(editions, results))
+
+
+def ayah_texts(data: dict) -> "OrderedDict[str, OrderedDict[str, str]]":
+    """{surah: {ayah: text}} with string keys, from an edition's data."""
+    return OrderedDict(
+        (str(surah["number"]),
+         OrderedDict((str(a["numberInSurah"]), a["text"].strip()) for a in surah["ayahs"]))
+        for surah in data["surahs"]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch Al-Quran Cloud editions into the local cache")
+    parser.add_argument("editions", nargs="+", help="edition identifiers, e.g. quran-uthmani en.sahih")
+    parser.add_argument("--offline", action="store_true", help="serve from cache only")
+    parser.add_argument("--cache-dir", default=str(CACHE_DIR))
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    try:
+        data = fetch_editions(args.editions, workers=args.workers,
+                              cache_dir=Path(args.cache_dir), offline=args.offline)
+    except EditionError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    for edition, d in data.items():
+        total = sum(len(s["ayahs"]) for s in d["surahs"])
+        print(f"✓ {edition}: {d['edition'].get('englishName')} — {total} ayahs")
+
+
+if __name__ == "__main__":
+    main()
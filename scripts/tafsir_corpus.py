@@ -0,0 +1,23 @@
+"""
+Layout of the app's tafsir corpus, shared by the scripts that read all of it.
+
+Thaqalayn/Thaqalayn/Data/tafsir_N.json maps verse numbers to layer texts.
+English keys have no suffix (layer1, quickOverview); translations carry a
+language suffix (layer1_urdu, layer2_ar).
+"""
+
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+TAFSIR_DIR = PROJECT_ROOT / "Thaqalayn" / "Thaqalayn" / "Data"
+
+# layer key suffix -> language code; keys without one (layerN, quickOverview) are English
+LANGUAGE_SUFFIXES = {"_urdu": "ur", "_ar": "ar"}
+LANGUAGES = ("en", "ur", "ar")
+
+
+def key_language(key: str) -> str:
+    for suffix, lang in LANGUAGE_SUFFIXES.items():
+        if key.endswith(suffix):
+            return lang
+    return "en"
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Corpus-wide quality metrics for every tafsir layer in every language.
+
+The layer prompts ask for 150-250 words of plain prose: no markdown, no
+bullet points. clean_incomplete_sentences() only trims truncation and the
+app's DataManager.cleanTafsirText strips markdown and preambles at display
+time, so nothing measures how far the stored text is from the brief. This
+pass does, for each (surah, verse, layer, language):
+
+    words, sentences, characters
+    markdown residue (**, __, #, `, [..](..)) and bullet / numbered lines
+    Arabic-script share of letters
+    error placeholders ("Error generating layer 3 ...", "Error: ...", empty)
+    preambles ("Here is a Layer 2 ...", "Surah X, Verse N:")
+
+Files are parsed in parallel processes into one NumPy record array;
+summaries and outlier checks are array operations over the whole corpus.
+
+    python3 scripts/tafsir_quality.py [--surah N ...] [--output build/tafsir_quality.json] [--limit 10]
+
+Translated layers are judged against the English layer of the same verse:
+their length ratio flags truncated or padded translations, and a low
+Arabic-script share flags English left untranslated.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from tafsir_corpus import LANGUAGES, TAFSIR_DIR, key_language
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_OUTPUT = PROJECT_ROOT / "build" / "tafsir_quality.json"
+WORD_RANGE = (150, 250)          # what the English layer prompts ask for
+WORD_SLACK = 0.2                 # only flag English layers 20% outside that range
+LENGTH_RATIO = (0.5, 2.0)        # translation words / English words
+MIN_SCRIPT_SHARE = 0.6           # ur / ar layers below this are mostly untranslated
+MAX_SCRIPT_SHARE = 0.3           # en layers above this are mostly Arabic script
+
+LAYER_KEY = re.compile(r"^layer(\d+)(?:_[a-z]+)?$")
+SENTENCE_END = re.compile(r"[.!?؟۔]+(?=\s|$)")
+MARKDOWN = re.compile(r"\*\*|__|^#{1,6}\s|`|\[[^\]\n]+\]\([^)\n]+\)", re.M)
+BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s", re.M)
+ARABIC_LETTER = re.compile("(?![\\W\\d_])[\u0600-\u06ff\u0750-\u077f\u08a0-\u08ff\ufb50-\ufdff\ufe70-\ufeff]")
+LETTER = re.compile(r"[^\W\d_]")
+ERROR_PLACEHOLDER = re.compile(r"^\s*(?:Error\b|Failed to generate)", re.I)
+PREAMBLE = re.compile(r"^\s*(?:Here is|Here's|\**\s*Layer \d|#+\s*Layer|\**Surah [A-Za-z-]+, Verse \d)", re.I)
+
+RECORD = np.dtype([
+    ("surah", "u2"), ("verse", "u2"), ("layer", "u1"), ("lang", "u1"),
+    ("chars", "u4"), ("words", "u4"), ("sentences", "u4"),
+    ("markdown", "u2"), ("bullets", "u2"), ("script", "f4"),
+    ("error", "?"), ("preamble", "?"),
+])
+
+
+def measure_file(path: str) -> np.ndarray:
+    """One record per layer text in a tafsir_N.json file."""
+    surah = int(Path(path).stem.split("_")[1])
+    with open(path, encoding="utf-8") as f:
+        verses = json.load(f)
+    rows = []
+    for verse, entry in verses.items():
+        for key, text in entry.items():
+            match = LAYER_KEY.match(key)
+            if not match or not isinstance(text, str):
+                continue
+            letters = len(LETTER.findall(text))
+            rows.append((
+                surah, int(verse), int(match.group(1)), LANGUAGES.index(key_language(key)),
+                len(text), len(text.split()), len(SENTENCE_END.findall(text)),
+                len(MARKDOWN.findall(text)), len(BULLET.findall(text)),
+                len(ARABIC_LETTER.findall(text)) / letters if letters else 0.0,
+                not text.strip() or bool(ERROR_PLACEHOLDER.match(text)),
+                bool(PREAMBLE.match(text)),
+            ))
+    return np.array(rows, dtype=RECORD)
+
+
+def load_metrics(surahs: List[int] = None, workers: int = None) -> np.ndarray:
+    paths = sorted(str(p) for p in TAFSIR_DIR.glob("tafsir_*.json")
+                   if not surahs or int(p.stem.split("_")[1]) in surahs)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        parts = list(pool.map(measure_file, paths, chunksize=4))
+    return np.concatenate(parts) if parts else np.empty(0, dtype=RECORD)
+
+
+def english_words(metrics: np.ndarray) -> np.ndarray:
+    """Words in the English layer of each record's (surah, verse, layer); 0 if none."""
+    key = (metrics["surah"].astype(np.int64) * 1000 + metrics["verse"]) * 100 + metrics["layer"]
+    en = metrics["lang"] == LANGUAGES.index("en")
+    en_keys, en_words = key[en], metrics["words"][en]
+    order = np.argsort(en_keys)
+    en_keys, en_words = en_keys[order], en_words[order]
+    pos = np.clip(np.searchsorted(en_keys, key), 0, max(len(en_keys) - 1, 0))
+    found = (en_keys[pos] == key) if len(en_keys) else np.zeros(len(key), dtype=bool)
+    return np.where(found, en_words[pos] if len(en_keys) else 0, 0)
+
+
+def checks(metrics: np.ndarray) -> Dict[str, np.ndarray]:
+    """{check name: boolean mask of failing records}."""
+    lang = metrics["lang"]
+    is_en = lang == LANGUAGES.index("en")
+    words = metrics["words"].astype(np.float64)
+    low, high = WORD_RANGE
+    ref = english_words(metrics).astype(np.float64)
+    ratio = np.divide(words, ref, out=np.zeros_like(words), where=ref > 0)
+    ok = ~metrics["error"]
+    return {
+        "error_placeholder": metrics["error"],
+        "preamble": metrics["preamble"] & ok,
+        "markdown": (metrics["markdown"] > 0) & ok,
+        "bullets": (metrics["bullets"] > 0) & ok,
+        "too_short": is_en & ok & (words < low * (1 - WORD_SLACK)),
+        "too_long": is_en & ok & (words > high * (1 + WORD_SLACK)),
+        "single_sentence": ok & (metrics["sentences"] <= 1),
+        "translation_length": ~is_en & ok & (ref > 0) & ((ratio < LENGTH_RATIO[0]) | (ratio > LENGTH_RATIO[1])),
+        "script_mismatch": ok & np.where(is_en, metrics["script"] > MAX_SCRIPT_SHARE,
+                                         metrics["script"] < MIN_SCRIPT_SHARE),
+    }
+
+
+def severity(metrics: np.ndarray, name: str) -> np.ndarray:
+    """Sort key for outliers of a check: larger is worse."""
+    words = metrics["words"].astype(np.float64)
+    if name == "too_short":
+        return -words
+    if name in ("too_long", "single_sentence"):
+        return words
+    if name == "markdown":
+        return metrics["markdown"].astype(np.float64)
+    if name == "bullets":
+        return metrics["bullets"].astype(np.float64)
+    if name == "script_mismatch":
+        return np.abs(metrics["script"] - 0.5)
+    if name == "translation_length":
+        ref = english_words(metrics).astype(np.float64)
+        return np.abs(np.log(np.maximum(words, 1) / np.maximum(ref, 1)))
+    return np.zeros(len(metrics))
+
+
+def summarise(metrics: np.ndarray, failing: Dict[str, np.ndarray]) -> List[dict]:
+    rows = []
+    for li, lang in enumerate(LANGUAGES):
+        for layer in np.unique(metrics["layer"][metrics["lang"] == li]):
+            sel = (metrics["lang"] == li) & (metrics["layer"] == layer)
+            good = sel & ~metrics["error"]
+            words = metrics["words"][good]
+            p5, p50, p95 = np.percentile(words, [5, 50, 95]) if len(words) else (0, 0, 0)
+            rows.append({
+                "lang": lang, "layer": int(layer), "items": int(sel.sum()),
+                "words": {"p5": float(p5), "p50": float(p50), "p95": float(p95),
+                          "mean": float(words.mean()) if len(words) else 0.0},
+                "sentencesP50": float(np.median(metrics["sentences"][good])) if good.any() else 0.0,
+                "scriptP50": round(float(np.median(metrics["script"][good])), 3) if good.any() else 0.0,
+                "failing": {name: int((mask & sel).sum()) for name, mask in failing.items()},
+            })
+    return rows
+
+
+def outliers(metrics: np.ndarray, failing: Dict[str, np.ndarray], limit: int = None) -> Dict[str, List[dict]]:
+    out = {}
+    for name, mask in failing.items():
+        idx = np.flatnonzero(mask)
+        idx = idx[np.argsort(-severity(metrics, name)[idx], kind="stable")]
+        if limit:
+            idx = idx[:limit]
+        out[name] = [
+            {"ref": f"{m['surah']}:{m['verse']}", "layer": int(m["layer"]), "lang": LANGUAGES[m["lang"]],
+             "words": int(m["words"]), "sentences": int(m["sentences"]), "markdown": int(m["markdown"]),
+             "bullets": int(m["bullets"]), "script": round(float(m["script"]), 3)}
+            for m in metrics[idx]
+        ]
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quality metrics for every tafsir layer")
+    parser.add_argument("--surah", type=int, action="append", help="default: every tafsir file")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    parser.add_argument("--limit", type=int, default=5, help="outliers printed per check (the report has all)")
+    args = parser.parse_args()
+
+    metrics = load_metrics(args.surah, args.workers)
+    if not len(metrics):
+        print(f"Error: no tafsir files found in {TAFSIR_DIR}", file=sys.stderr)
+        sys.exit(1)
+    failing = checks(metrics)
+    summary = summarise(metrics, failing)
+
+    print(f"{len(metrics)} layer texts in {len(np.unique(metrics['surah']))} surahs\n")
+    print(f"{'lang':<5}{'layer':>6}{'items':>7}{'words p5/p50/p95':>20}{'sent':>6}{'script':>8}  failing checks")
+    for row in summary:
+        w = row["words"]
+        spread = f"{w['p5']:.0f}/{w['p50']:.0f}/{w['p95']:.0f}"
+        fails = ", ".join(f"{k} {v}" for k, v in row["failing"].items() if v) or "-"
+        print(f"{row['lang']:<5}{row['layer']:>6}{row['items']:>7}{spread:>20}"
+              f"{row['sentencesP50']:>6.0f}{row['scriptP50']:>8.2f}  {fails}")
+
+    print("\nTotals: " + ", ".join(f"{name} {int(mask.sum())}" for name, mask in failing.items()))
+    for name, items in outliers(metrics, failing, args.limit).items():
+        if items:
+            print(f"\n{name}: " + ", ".join(f"{i['ref']} L{i['layer']} {i['lang']} ({i['words']}w)" for i in items))
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "items": len(metrics), "wordRange": WORD_RANGE,
+                   "summary": summary, "outliers": outliers(metrics, failing)}, f, indent=2)
+    print(f"\n✓ Wrote {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Translate English tafsir layers (layer1-layer5) into the per-language files
+that merge_urdu_layers.py / merge_arabic_layers.py consume:
+
+    new_tafsir/tafsir_<N>_ur.json   {"<verse>": {"layer1_urdu": ..., ...}}
+    new_tafsir/tafsir_<N>_ar.json   {"<verse>": {"layer1_ar": ..., ...}}
+
+Usage:
+    python3 scripts/translate_tafsir.py --surah 36 [--surah 67 ...] [--lang ur --lang ar]
+    python3 scripts/translate_tafsir.py --all --workers 6 --rpm 60
+
+Layers are split into paragraphs and every paragraph is cached under
+new_tafsir/.translation_cache/<lang>.jsonl by the sha256 of (language,
+prompt version, English text). Only paragraphs missing from the cache are
+sent, packed into batches and translated concurrently under a shared
+requests-per-minute limit, so re-running after an English fix translates
+just the edited paragraphs. Output files are then assembled entirely from
+the cache; a layer is only written once all of its paragraphs are
+translated.
+
+Layers the app data already has in the target language (layerN_urdu,
+layerN_ar in a script-checked, non-empty value) are left alone and not
+sent, unless their English changed: new_tafsir/.translation_cache/
+<lang>_sources.json records, per "<surah>:<verse>:<layer>", the hash of
+the English paragraphs each emitted translation was made from, and a
+layer whose English no longer matches is translated again. Existing
+translations with no record take the current English as their baseline
+on first run. --retranslate translates every layer regardless. Output
+files are updated in place, so layers emitted by an earlier run stay in
+them until merged.
+
+Urdu and Arabic share a script; they are told apart by the share of
+Urdu-only letters (ٹ ڈ ڑ ں ھ ہ ی ے ک گ ...), which is above 20% in
+every Urdu layer of the corpus and under 1% in every Arabic one.
+
+Adding a language is one LANGUAGES entry (a merge script for its key
+suffix is still needed on the app side).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+from generate_tafsir import RateLimiter, TafsirGenerator
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+TAFSIR_DIR = PROJECT_ROOT / "Thaqalayn" / "Thaqalayn" / "Data"
+OUT_DIR = PROJECT_ROOT / "new_tafsir"
+LAYERS = (1, 2, 3, 4, 5)
+BATCH_CHARS = 6000
+PROMPT_VERSION = 1
+ARABIC_SCRIPT = re.compile(r"[\u0600-\u06FF]")
+URDU_LETTERS = re.compile(r"[\u0679\u0688\u0691\u06A9\u06AF\u06BA\u06BE\u06C1\u06C3\u06CC\u06D2\u06D3]")
+URDU_SHARE = 0.05
+
+
+def urdu_share(text: str) -> float:
+    """Fraction of Arabic-script letters in ``text`` that only Urdu uses."""
+    total = len(ARABIC_SCRIPT.findall(text))
+    return len(URDU_LETTERS.findall(text)) / total if total else 0.0
+
+
+# code -> (language name, layer key suffix, output file suffix, script check)
+LANGUAGES = {
+    "ur": ("Urdu", "_urdu", "ur", lambda t: urdu_share(t) >= URDU_SHARE),
+    "ar": ("Arabic", "_ar", "ar", lambda t: bool(ARABIC_SCRIPT.search(t)) and urdu_share(t) < URDU_SHARE),
+}
+
+PROMPT = """Translate each English paragraph of Shia Quranic commentary below into {language}.
+
+Rules:
+- Keep the meaning exact; do not add, drop or soften anything
+- Keep Quranic quotations, names of scholars and book titles recognisable; use the standard {language} forms
+- Use the honorifics customary in {language} Shia writing
+- Return only JSON: {{"translations": [...]}} with exactly {count} strings, in the same order
+
+PARAGRAPHS:
+{paragraphs}"""
+
+
+def paragraphs(text: str) -> List[str]:
+    return [p.strip() for p in text.split("\n\n") if p.strip()]
+
+
+def cache_key(lang: str, text: str) -> str:
+    return hashlib.sha256(f"{lang}\0{PROMPT_VERSION}\0{text}".encode("utf-8")).hexdigest()
+
+
+def source_hash(text: str) -> str:
+    """Hash of a layer's English paragraphs (whitespace between them ignored)."""
+    return hashlib.sha256("\n\n".join(paragraphs(text)).encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """Append-only JSONL of {"h": hash, "t": translation} per language."""
+
+    def __init__(self, lang: str, cache_dir: Path):
+        self.path = cache_dir / f"{lang}.jsonl"
+        self.entries: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from an interrupted run
+                    self.entries[row["h"]] = row["t"]
+
+    def get(self, key: str):
+        return self.entries.get(key)
+
+    def put_many(self, rows: Dict[str, str]):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                for key, text in rows.items():
+                    f.write(json.dumps({"h": key, "t": text}, ensure_ascii=False) + "\n")
+            self.entries.update(rows)
+
+
+class SourceRecord:
+    """{"<surah>:<verse>:<layer>": source_hash} of the English each translation was made from."""
+
+    def __init__(self, lang: str, cache_dir: Path):
+        self.path = cache_dir / f"{lang}_sources.json"
+        self.hashes: Dict[str, str] = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                self.hashes = json.load(f)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.hashes, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+class TafsirTranslator(TafsirGenerator):
+    def __init__(self, api_key: str, max_price: float = None, model: str = None,
+                 workers: int = 6, rpm: float = 60, retranslate: bool = False):
+        super().__init__(api_key, use_openrouter=True, max_price=max_price)
+        if model:
+            self.model = model
+        self.workers = workers
+        self.retranslate = retranslate
+        self.limiter = RateLimiter(rpm)
+        self.stats = {"requests": 0, "translated": 0, "cached": 0, "existing": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def translate_batch(self, lang: str, texts: List[str]) -> List[str]:
+        name, _, _, script = LANGUAGES[lang]
+        numbered = "\n\n".join(f"[{i + 1}]\n{t}" for i, t in enumerate(texts))
+        prompt = PROMPT.format(language=name, count=len(texts), paragraphs=numbered)
+        self.limiter.wait()
+        with self._lock:
+            self.stats["requests"] += 1
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": f"You are a careful translator of Islamic scholarship into {name}. You answer with JSON only."},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=8000,
+            temperature=0.,
+            extra_body={"provider": {"max_price": {"request": self.max_price}}},
+        )
+        reply = response.choices[0].message.content or ""
+        start, end = reply.find("{"), reply.rfind("}")
+        out = json.loads(reply[start:end + 1])["translations"]
+        if not isinstance(out, list) or len(out) != len(texts):
+            raise ValueError(f"expected {len(texts)} translations, got {len(out) if isinstance(out, list) else type(out).__name__}")
+        out = [str(t).strip() for t in out]
+        if not all(t and script(t) for t in out):
+            raise ValueError(f"empty or non-{name} translation in batch")
+        return out
+
+    def _run_batch(self, lang: str, cache: TranslationCache, batch: List[str]):
+        for attempt in range(2):
+            try:
+                result = self.translate_batch(lang, batch)
+                break
+            except Exception as e:
+                print(f"  ⚠️  {lang} batch of {len(batch)} (attempt {attempt + 1}): {e}")
+        else:
+            with self._lock:
+                self.stats["failed"] += len(batch)
+            return
+        cache.put_many({cache_key(lang, en): tr for en, tr in zip(batch, result)})
+        with self._lock:
+            self.stats["translated"] += len(batch)
+            done = self.stats["translated"] + self.stats["failed"]
+        print(f"  {lang}: +{len(batch)} paragraphs ({done} done)")
+
+    def load_surahs(self, surahs: List[int]) -> Dict[int, dict]:
+        data = {}
+        for s in surahs:
+            path = TAFSIR_DIR / f"tafsir_{s}.json"
+            if not path.exists():
+                print(f"  Surah {s}: no tafsir file, skipping")
+                continue
+            with open(path, encoding="utf-8") as f:
+                data[s] = json.load(f)
+        return data
+
+    def wanted(self, entry: dict, layer: int, lang: str, recorded: str = None) -> bool:
+        """Whether a verse's layer still needs a translation into ``lang``.
+
+        ``recorded`` is the source hash its translation was made from, if known;
+        a translation whose English has changed since is stale.
+        """
+        if self.retranslate:
+            return True
+        _, suffix, _, script = LANGUAGES[lang]
+        current = entry.get(f"layer{layer}{suffix}")
+        if not (isinstance(current, str) and current.strip() and script(current)):
+            return True
+        return recorded is not None and recorded != source_hash(entry.get(f"layer{layer}") or "")
+
+    def run(self, surahs: List[int], langs: List[str], out_dir: Path = OUT_DIR):
+        tafsir = self.load_surahs(surahs)
+        caches = {lang: TranslationCache(lang, out_dir / ".translation_cache") for lang in langs}
+        sources = {lang: SourceRecord(lang, out_dir / ".translation_cache") for lang in langs}
+
+        # Which layers to translate, and the unique uncached paragraphs per language in corpus order
+        todo = {lang: {s: {} for s in tafsir} for lang in langs}
+        pending = {lang: [] for lang in langs}
+        for lang in langs:
+            seen, hashes = set(), sources[lang].hashes
+            for s, verses in tafsir.items():
+                for key in sorted((k for k in verses if k.isdigit()), key=int):
+                    todo[lang][s][key] = []
+                    for layer in LAYERS:
+                        ref = f"{s}:{key}:{layer}"
+                        if not self.wanted(verses[key], layer, lang, hashes.get(ref)):
+                            if verses[key].get(f"layer{layer}"):
+                                self.stats["existing"] += 1
+                                hashes.setdefault(ref, source_hash(verses[key][f"layer{layer}"]))
+                            continue
+                        todo[lang][s][key].append(layer)
+                        for p in paragraphs(verses[key].get(f"layer{layer}") or ""):
+                            h = cache_key(lang, p)
+                            if h in seen:
+                                continue
+                            seen.add(h)
+                            if caches[lang].get(h) is None:
+                                pending[lang].append(p)
+                            else:
+                                self.stats["cached"] += 1
+
+        batches = []
+        for lang, texts in pending.items():
+            batch, size = [], 0
+            for t in texts:
+                if batch and size + len(t) > BATCH_CHARS:
+                    batches.append((lang, batch))
+                    batch, size = [], 0
+                batch.append(t)
+                size += len(t)
+            if batch:
+                batches.append((lang, batch))
+        print(f"{sum(len(t) for t in pending.values())} paragraphs to translate in {len(batches)} "
+              f"requests ({self.stats['cached']} cached, {self.stats['existing']} layers already translated) "
+              f"with {self.workers} workers")
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(lambda lb: self._run_batch(lb[0], caches[lb[0]], lb[1]), batches))
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for lang in langs:
+            _, suffix, file_suffix, _ = LANGUAGES[lang]
+            for s, verses in tafsir.items():
+                out = self.assemble(verses, lang, suffix, caches[lang], todo[lang][s])
+                if not out:
+                    continue
+                for key, layers in out.items():
+                    for name in layers:
+                        layer = int(name[len("layer"):-len(suffix)])
+                        sources[lang].hashes[f"{s}:{key}:{layer}"] = source_hash(verses[key][f"layer{layer}"])
+                path = out_dir / f"tafsir_{s}_{file_suffix}.json"
+                merged = {}
+                if path.exists():
+                    with open(path, encoding="utf-8") as f:
+                        merged = json.load(f)
+                for key, layers in out.items():
+                    merged.setdefault(key, {}).update(layers)
+                merged = {key: merged[key] for key in sorted(merged, key=int)}
+                tmp = path.with_name(path.name + ".tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(merged, f, ensure_ascii=False, indent=2)
+                os.replace(tmp, path)
+                layers = sum(len(v) for v in out.values())
+                print(f"  ✓ {path.name} ({layers} layers)")
+            sources[lang].save()
+
+        print(f"\nDone. requests={self.stats['requests']} translated={self.stats['translated']} "
+              f"cached={self.stats['cached']} existing={self.stats['existing']} failed={self.stats['failed']}")
+        if self.stats["failed"]:
+            print("Rerun to retry failed paragraphs (finished ones come from the cache).")
+
+    @staticmethod
+    def assemble(verses: dict, lang: str, suffix: str, cache: TranslationCache,
+                 todo: Dict[str, List[int]] = None) -> dict:
+        """{verse: {layerN<suffix>: text}} for layers whose paragraphs are all cached.
+
+        ``todo`` limits each verse to the given layers (default: all).
+        """
+        out = {}
+        for key in sorted((k for k in verses if k.isdigit()), key=int):
+            layers = {}
+            for layer in (todo[key] if todo is not None else LAYERS):
+                parts = [cache.get(cache_key(lang, p)) for p in paragraphs(verses[key].get(f"layer{layer}") or "")]
+                if parts and all(parts):
+                    layers[f"layer{layer}{suffix}"] = "\n\n".join(parts)
+            if layers:
+                out[key] = layers
+        return out
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Translate English tafsir layers into new_tafsir/tafsir_N_<lang>.json")
+    parser.add_argument("--surah", type=int, action="append")
+    parser.add_argument("--all", action="store_true")
+    parser.add_argument("--lang", action="append", choices=sorted(LANGUAGES), help="default: all languages")
+    parser.add_argument("--workers", type=int, default=6)
+    parser.add_argument("--rpm", type=float, default=60, help="requests per minute across all workers")
+    parser.add_argument("--model", default=None, help="override the OpenRouter model")
+    parser.add_argument("--max-price", type=float, default=None)
+    parser.add_argument("--out", default=str(OUT_DIR))
+    parser.add_argument("--retranslate", action="store_true",
+                        help="also translate layers whose app translation is present and up to date")
+    args = parser.parse_args()
+
+    if args.all:
+        surahs = list(range(1, 115))
+    elif args.surah:
+        surahs = args.surah
+    else:
+        parser.error("give --surah N or --all")
+
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        print("Error: OPENROUTER_API_KEY not set")
+        return
+
+    translator = TafsirTranslator(api_key, max_price=args.max_price, model=args.model,
+                                  workers=args.workers, rpm=args.rpm, retranslate=args.retranslate)
+    translator.run(surahs, args.lang or sorted(LANGUAGES), Path(args.out))
+
+
+if __name__ == "__main__":
+    main()
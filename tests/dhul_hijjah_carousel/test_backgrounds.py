@@ -20,3 +20,36 @@ def test_build_bg_prompt_includes_shared_style_and_no_text_rule():
     assert "Kaaba" in p
     assert "no text" in p.lower()
     assert config.BG_STYLE in p
+
+
+def test_cache_key_is_stable_and_tracks_prompt():
+    s = dict(config.SLIDES[0])
+    assert backgrounds.cache_key(s) == backgrounds.cache_key(dict(s))
+    changed = dict(s, bg_prompt=s["bg_prompt"] + " More stars.")
+    assert backgrounds.cache_key(changed) != backgrounds.cache_key(s)
+    # Headline/subtext edits must not invalidate the background
+    assert backgrounds.cache_key(dict(s, headline="x")) == backgrounds.cache_key(s)
+
+
+def test_generate_all_only_requests_changed_prompts(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "BG_DIR", tmp_path)
+    calls = []
+
+    def fake_generate(slide):
+        calls.append(slide["index"])
+        return Image.new("RGB", (config.CANVAS_W, config.CANVAS_H))
+
+    monkeypatch.setattr(backgrounds, "generate", fake_generate)
+    out = backgrounds.generate_all()
+    assert sorted(calls) == [1, 2, 3, 4, 5]
+    assert all(p.exists() for p in out.values())
+
+    calls.clear()
+    backgrounds.generate_all()
+    assert calls == []
+
+    slides = [dict(s) for s in config.SLIDES]
+    slides[2]["bg_prompt"] += " Softer glow."
+    monkeypatch.setattr(config, "SLIDES", slides)
+    backgrounds.generate_all()
+    assert calls == [3]
@@ -1,4 +1,4 @@
-from PIL import Image
+from PIL import Image, ImageChops
 from scripts.dhul_hijjah_carousel import compose, config
 
 
@@ -6,6 +6,10 @@ def _blank_bg():
     return Image.new("RGB", (config.CANVAS_W, config.CANVAS_H), (8, 9, 14))
 
 
+def _differs(a, b):
+    return ImageChops.difference(a, b).getbbox() is not None
+
+
 def test_wrap_text_respects_max_width():
     lines = compose.wrap("a " * 60, compose._font(config.FONT_BODY, 40), 800)
     assert len(lines) > 1
@@ -21,7 +25,7 @@ def test_render_slide_returns_exact_canvas():
 def test_render_slide_changes_pixels():
     bg = _blank_bg()
     out = compose.render_slide(config.SLIDES[0], bg.copy())
-    assert list(out.getdata()) != list(bg.getdata()), "no text drawn"
+    assert _differs(out, bg), "no text drawn"
 
 
 def test_arabic_renders_when_present_and_verified():
@@ -47,7 +51,7 @@ def test_render_cta_returns_exact_canvas_and_draws():
     bg = Image.new("RGB", (config.CANVAS_W, config.CANVAS_H), (8, 9, 14))
     out = compose.render_cta(config.SLIDES[4], bg.copy())
     assert out.size == (config.CANVAS_W, config.CANVAS_H)
-    assert list(out.getdata()) != list(bg.getdata())
+    assert _differs(out, bg)
 
 
 def test_render_appshot_returns_canvas_and_draws():
@@ -56,4 +60,68 @@ def test_render_appshot_returns_canvas_and_draws():
     out = compose.render_appshot(slide, bg.copy())
     assert out.size == (config.CANVAS_W, config.CANVAS_H)
     assert out.mode == "RGB"
-    assert list(out.getdata()) != list(bg.getdata())
+    assert _differs(out, bg)
+
+
+def test_blur_patch_matches_full_canvas_blur():
+    from PIL import ImageDraw, ImageFilter
+    layer = Image.new("RGBA", (config.CANVAS_W, config.CANVAS_H), (0, 0, 0, 0))
+    ImageDraw.Draw(layer).rectangle([300, 400, 700, 520], fill=(247, 197, 110, 255))
+    full = Image.alpha_composite(_blank_bg().convert("RGBA"),
+                                 layer.filter(ImageFilter.GaussianBlur(18)))
+    patched = compose._composite(_blank_bg().convert("RGBA"),
+                                 compose._blur_patch(layer, 18))
+    assert not _differs(full, patched)
+
+
+def test_darkened_background_is_cached_but_returned_as_copy():
+    compose.clear_cache()
+    bg = _blank_bg()
+    a = compose._darkened(bg, 0.35)
+    a.paste((255, 0, 0), (0, 0, 10, 10))
+    b = compose._darkened(bg, 0.35)
+    assert len(compose._layer_cache) == 1
+    assert b.getpixel((0, 0)) != (255, 0, 0)
+
+
+def test_render_slide_identical_on_cache_hit():
+    compose.clear_cache()
+    first = compose.render_slide(config.SLIDES[0], _blank_bg())
+    again = compose.render_slide(config.SLIDES[0], _blank_bg())
+    assert not _differs(first, again)
+
+
+def test_localize_english_is_base_copy():
+    out = compose.localize(config.SLIDES[0], "en")
+    assert out["headline"] == config.SLIDES[0]["headline"]
+    assert out["lang"] == "en"
+
+
+def test_localize_refuses_unverified_translation():
+    slide = dict(config.SLIDES[0], translation_verified=False)
+    try:
+        compose.localize(slide, "ur")
+        assert False, "should have raised"
+    except ValueError as e:
+        assert "unverified" in str(e).lower()
+
+
+def test_localize_swaps_fields_and_requires_cta_label():
+    slide = dict(config.SLIDES[4], translation_verified=True)
+    out = compose.localize(slide, "ar")
+    assert out["headline"] == slide["headline_ar"]
+    assert out["cta_label"] == slide["cta_label_ar"]
+    del slide["cta_label_ar"]
+    try:
+        compose.localize(slide, "ar")
+        assert False, "should have raised"
+    except ValueError as e:
+        assert "cta_label_ar" in str(e)
+
+
+def test_render_slide_rtl_languages_draw():
+    slide = dict(config.SLIDES[0], translation_verified=True)
+    for lang in ("ur", "ar"):
+        out = compose.render_slide(compose.localize(slide, lang), _blank_bg())
+        assert out.size == (config.CANVAS_W, config.CANVAS_H)
+        assert _differs(out, _blank_bg())
@@ -0,0 +1,94 @@
+import pytest
+from PIL import Image
+from scripts.dhul_hijjah_carousel import config, engine
+
+
+def test_builtin_campaign_validates_and_uses_config_paths():
+    c = engine.validate(engine.builtin_campaign())
+    assert c["slides"] is config.SLIDES
+    assert c["output_dir"] == config.OUTPUT_DIR
+    assert c["bg_dir"] == config.BG_DIR
+
+
+@pytest.mark.parametrize("name", sorted(config.JOURNEY_CAMPAIGNS))
+def test_journey_campaign_matches_slide_schema(name):
+    c = engine.validate(engine.journey_campaign(name))
+    assert [s["index"] for s in c["slides"]] == [1, 2, 3, 4, 5]
+    assert [s["role"] for s in c["slides"]] == ["hook", "pillar", "pillar", "pillar", "cta"]
+    assert engine.unverified_arabic(c) == []
+
+
+def test_journey_arabic_is_exported_unverified():
+    c = engine.validate(engine.journey_campaign("hajj", with_arabic=True))
+    assert engine.unverified_arabic(c) == [2, 3, 4]
+
+
+@pytest.mark.parametrize("path", sorted(config.CAMPAIGNS_DIR.glob("*.json")))
+def test_committed_campaign_files_load(path):
+    c = engine.load_campaign(path)
+    assert c["output_dir"] == config.CAMPAIGNS_OUTPUT_DIR / c["name"]
+
+
+def test_validate_rejects_missing_headline():
+    bad = {"name": "x", "slides": [dict(config.SLIDES[0], headline="")]}
+    with pytest.raises(engine.CampaignError, match="headline"):
+        engine.validate(bad)
+
+
+def test_render_campaigns_blocks_unverified_and_renders_the_rest(tmp_path):
+    slides = [dict(s) for s in config.SLIDES if not s.get("app_screenshot")]
+    bg_dir = tmp_path / "bg"
+    bg_dir.mkdir()
+    for s in slides:
+        Image.new("RGB", (config.CANVAS_W, config.CANVAS_H), (8, 9, 14)).save(
+            bg_dir / f"bg_{s['index']}.png")
+    ok = engine.validate({"name": "ok", "slides": slides,
+                          "output_dir": tmp_path / "ok", "bg_dir": bg_dir})
+    bad_slides = [dict(s) for s in slides]
+    bad_slides[1]["arabic_verified"] = False
+    bad = engine.validate({"name": "bad", "slides": bad_slides,
+                           "output_dir": tmp_path / "bad", "bg_dir": bg_dir})
+
+    summary = engine.render_campaigns([ok, bad], skip_bg=True, workers=2)
+    assert summary["ok"]["slides"] == len(slides)
+    assert summary["bad"]["status"].startswith("BLOCKED")
+    assert not (tmp_path / "bad").exists()
+    for s in slides:
+        with Image.open(tmp_path / "ok" / f"slide_{s['index']}.png") as im:
+            assert im.size == (config.CANVAS_W, config.CANVAS_H)
+
+
+def test_localized_render_blocked_until_translations_verified(tmp_path):
+    c = engine.validate(engine.builtin_campaign())
+    c = dict(c, output_dir=tmp_path, bg_dir=tmp_path)
+    summary = engine.render_campaigns([c], skip_bg=True, langs=("en", "ur"))
+    assert "translation" in summary["dhul_hijjah"]["status"]
+
+
+def test_localized_render_writes_one_dir_per_language(tmp_path):
+    slides = [dict(s, translation_verified=True) for s in config.SLIDES
+              if not s.get("app_screenshot")]
+    for s in slides:
+        Image.new("RGB", (config.CANVAS_W, config.CANVAS_H), (8, 9, 14)).save(
+            tmp_path / f"bg_{s['index']}.png")
+    c = engine.validate({"name": "i18n", "slides": slides,
+                         "output_dir": tmp_path / "out", "bg_dir": tmp_path})
+    summary = engine.render_campaigns([c], skip_bg=True, langs=config.LANGS)
+    assert summary["i18n"]["slides"] == len(slides) * len(config.LANGS)
+    for lang in config.LANGS:
+        assert len(list((tmp_path / "out" / lang).glob("slide_*.png"))) == len(slides)
+
+
+def test_allow_unverified_renders_translations_as_drafts(tmp_path):
+    slides = [dict(s) for s in config.SLIDES if not s.get("app_screenshot")]
+    for s in slides:
+        Image.new("RGB", (config.CANVAS_W, config.CANVAS_H), (8, 9, 14)).save(
+            tmp_path / f"bg_{s['index']}.png")
+    c = engine.validate({"name": "draft", "slides": slides,
+                         "output_dir": tmp_path / "out", "bg_dir": tmp_path})
+    summary = engine.render_campaigns([c], skip_bg=True, langs=("en", "ur"),
+                                      allow_unverified=True)
+    assert summary["draft"]["status"] == "ok"
+    assert len(list((tmp_path / "out" / "en").glob("slide_*.png"))) == len(slides)
+    assert len(list((tmp_path / "out" / "ur_draft").glob("slide_*.png"))) == len(slides)
+    assert not (tmp_path / "out" / "ur").exists()
@@ -0,0 +1,93 @@
+"""Pixel regression against golden renders.
+
+Goldens live in tests/dhul_hijjah_carousel/golden/ and are rendered from
+bench.synthetic_bg(), so they depend only on code + fonts, not on generated
+backgrounds. Record or refresh them after an intended visual change with:
+
+    UPDATE_GOLDEN=1 python -m pytest tests/dhul_hijjah_carousel/test_regression.py
+
+Record them on macOS: config.LANG_STYLE points at system fonts there.
+Until a case's golden is recorded it is reported as xfail (not a pass or
+a skip), so an unrecorded slide or language stays visible in the summary.
+
+A failing case writes <name>.actual.png and <name>.diff.png to pytest's
+tmp dir for inspection.
+"""
+import os
+from pathlib import Path
+
+import pytest
+from PIL import Image
+from scripts.dhul_hijjah_carousel import bench, compose, config, engine
+
+np = pytest.importorskip("numpy")
+
+GOLDEN_DIR = Path(__file__).parent / "golden"
+UPDATE = os.environ.get("UPDATE_GOLDEN") == "1"
+
+# A channel may drift by up to CHANNEL_TOL (font hinting, resampling);
+# at most MAX_BAD_FRACTION of pixels may exceed it.
+CHANNEL_TOL = 8
+MAX_BAD_FRACTION = 0.001
+
+
+def _cases():
+    for s in config.SLIDES:
+        yield f"slide_{s['index']}_en", s, "en"
+    verified = dict(config.SLIDES[0], translation_verified=True)
+    for lang in ("ur", "ar"):
+        yield f"slide_1_{lang}", verified, lang
+
+
+CASES = list(_cases())
+
+
+def pixel_diff(a: Image.Image, b: Image.Image):
+    """Return (fraction of pixels over tolerance, max channel delta, mask)."""
+    x = np.asarray(a.convert("RGB"), dtype=np.int16)
+    y = np.asarray(b.convert("RGB"), dtype=np.int16)
+    delta = np.abs(x - y).max(axis=2)
+    bad = delta > CHANNEL_TOL
+    return bad.mean(), int(delta.max()), bad
+
+
+@pytest.fixture(scope="module")
+def bg():
+    return bench.synthetic_bg()
+
+
+@pytest.mark.parametrize("name,slide,lang", CASES, ids=[c[0] for c in CASES])
+def test_render_matches_golden(name, slide, lang, bg, tmp_path):
+    if slide.get("app_screenshot") and not config.APP_SCREENSHOT.exists():
+        pytest.skip(f"{config.APP_SCREENSHOT} missing")
+    golden = GOLDEN_DIR / f"{name}.png"
+    if not UPDATE and not golden.exists():
+        pytest.xfail(f"no golden for {name} yet (record it with UPDATE_GOLDEN=1)")
+
+    out = engine.render(compose.localize(slide, lang), bg)
+    if UPDATE:
+        GOLDEN_DIR.mkdir(exist_ok=True)
+        out.save(golden)
+        pytest.skip(f"golden updated: {golden}")
+
+    with Image.open(golden) as g:
+        assert g.size == out.size
+        frac, worst, mask = pixel_diff(out, g)
+    if frac > MAX_BAD_FRACTION:
+        out.save(tmp_path / f"{name}.actual.png")
+        Image.fromarray((mask * 255).astype("uint8")).save(tmp_path / f"{name}.diff.png")
+    assert frac <= MAX_BAD_FRACTION, (
+        f"{name}: {frac:.4%} of pixels differ (max delta {worst}); "
+        f"see {tmp_path}"
+    )
+
+
+def test_pixel_diff_flags_changes_and_tolerates_noise():
+    a = Image.new("RGB", (100, 100), (10, 10, 10))
+    b = a.copy()
+    b.putpixel((0, 0), (10 + CHANNEL_TOL, 10, 10))
+    assert pixel_diff(a, b)[0] == 0
+    b.paste((200, 10, 10), (0, 0, 10, 10))
+    frac, worst, _ = pixel_diff(a, b)
+    assert frac == pytest.approx(0.01)
+    assert worst == 190